@@ -1,10 +1,18 @@
+import typing as _t
 from django.contrib import admin
 from django.db import models
 from django.db.models import QuerySet
-from django.http import HttpRequest, HttpResponse
+from django.http import HttpRequest, StreamingHttpResponse
 from django.forms import Textarea
-from django.urls import resolve
-from . import models as fc_models, exporters as fc_exporters
+from django.urls import resolve, reverse
+from django.utils.html import format_html, format_html_join
+from . import (
+    models as fc_models,
+    exporters as fc_exporters,
+    jobs as fc_jobs,
+    signals as fc_signals,
+)
+from .forms import DownloadOptionsForm
 
 
 class TextAreaFormFieldOverride:
@@ -65,7 +73,13 @@ class FormAdmin(admin.ModelAdmin):
     prepopulated_fields = {"slug": ("title",)}
     readonly_fields = ("num_responses",)
     inlines = (FormQuestionInline, FormResponderInline)
-    actions = ["export_questions", "export_responses"]
+    actions = [
+        "export_questions",
+        "export_responses",
+        "export_archive",
+        "export_questions_in_background",
+        "export_responses_in_background",
+    ]
     fieldsets = (
         (
             None,
@@ -85,42 +99,116 @@ class FormAdmin(admin.ModelAdmin):
         ("Editors", {"fields": ("editors",)}),
     )
 
+    @staticmethod
+    def _csv_response(
+        request: _t.Optional[HttpRequest],
+        content: _t.Iterable[str],
+        filename: str,
+    ) -> StreamingHttpResponse:
+        """Stream the CSV, compressed if the browser accepts it."""
+        compression, content_encoding = DownloadOptionsForm().get_compression(
+            request
+        )
+        return fc_exporters.streaming_csv_response(
+            content,
+            filename,
+            compression=compression,
+            content_encoding=content_encoding,
+        )
+
     @admin.action(description="Export questions")
     def export_questions(
         self,
         request: HttpRequest,
         queryset: QuerySet[fc_models.Form],
-    ) -> HttpResponse:
+    ) -> StreamingHttpResponse:
         """Export questions to a CSV file."""
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = "attachment; filename=questions.csv"
-        fc_exporters.export_questions(
-            fc_models.FormQuestion.objects.filter(
-                form_id__in=queryset.values_list("id", flat=True)
+        return FormAdmin._csv_response(
+            request,
+            fc_exporters.stream_questions(
+                fc_models.FormQuestion.objects.filter(
+                    form_id__in=queryset.values_list("id", flat=True)
+                )
             ),
-            response,
+            "questions.csv",
         )
-        return response
 
     @admin.action(description="Export responses")
     def export_responses(
         self,
         request: HttpRequest,
         queryset: QuerySet[fc_models.Form],
-    ) -> HttpResponse:
+    ) -> StreamingHttpResponse:
         """Export responses to a CSV file."""
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = "attachment; filename=responses.csv"
-        fc_exporters.export_responses(
-            fc_models.FormResponse.objects.filter(
-                form_responder__form_id__in=queryset.values_list(
-                    "id", flat=True
-                )
+        return FormAdmin._csv_response(
+            request,
+            fc_exporters.stream_responses(
+                fc_models.FormResponse.objects.filter(
+                    form_responder__form_id__in=queryset.values_list(
+                        "id", flat=True
+                    )
+                ),
+                documents=fc_exporters.form_documents(
+                    queryset.values_list("id", flat=True)
+                ),
             ),
-            response,
+            "responses.csv",
+        )
+
+    @admin.action(description="Export questions and responses per form (ZIP)")
+    def export_archive(
+        self,
+        request: HttpRequest,
+        queryset: QuerySet[fc_models.Form],
+    ) -> StreamingHttpResponse:
+        """Export a ZIP archive with a questions CSV and a responses CSV for
+        each form.
+        """
+        response = StreamingHttpResponse(
+            fc_exporters.stream_form_archive(queryset),
+            content_type="application/zip",
         )
+        response["Content-Disposition"] = "attachment; filename=forms.zip"
         return response
 
+    def _queue_export(
+        self,
+        request: HttpRequest,
+        queryset: QuerySet[fc_models.Form],
+        kind: str,
+    ) -> None:
+        """Queue an export job for the selected forms."""
+        job = fc_jobs.create_export_job(request.user, kind, queryset)
+        self.message_user(
+            request,
+            format_html(
+                'Export queued. <a href="{}">Follow its progress here</a>.',
+                reverse("admin:form_creator_exportjob_change", args=[job.id]),
+            ),
+        )
+
+    @admin.action(description="Export questions in the background")
+    def export_questions_in_background(
+        self,
+        request: HttpRequest,
+        queryset: QuerySet[fc_models.Form],
+    ) -> None:
+        """Queue a job to export questions to a CSV file."""
+        self._queue_export(
+            request, queryset, fc_models.ExportJob.KindChoices.QUESTIONS
+        )
+
+    @admin.action(description="Export responses in the background")
+    def export_responses_in_background(
+        self,
+        request: HttpRequest,
+        queryset: QuerySet[fc_models.Form],
+    ) -> None:
+        """Queue a job to export responses to a CSV file."""
+        self._queue_export(
+            request, queryset, fc_models.ExportJob.KindChoices.RESPONSES
+        )
+
 
 @admin.register(fc_models.FormResponder)
 class FormResponderAdmin(admin.ModelAdmin):
@@ -134,4 +222,83 @@ class FormResponderAdmin(admin.ModelAdmin):
     )
     date_hierarchy = "created_dt"
     raw_id_fields = ("form", "user")
+    readonly_fields = ("document_answers",)
+    exclude = ("answers",)
     inlines = (FormResponseInline,)
+
+    def get_inlines(self, request: HttpRequest, obj=None) -> tuple:
+        """Responders whose answers are stored as a document have no
+        responses to edit.
+        """
+        if obj is not None and obj.stores_document:
+            return ()
+        return super().get_inlines(request, obj)
+
+    def save_formset(self, request, form, formset, change) -> None:
+        """Discard the exports and summary of the form when responses are
+        deleted, as deleting them sends no signal.
+        """
+        super().save_formset(request, form, formset, change)
+        if formset.deleted_objects:
+            fc_signals.responses_changed(formset.instance.form_id)
+
+    @admin.display(description="Answers")
+    def document_answers(self, obj: fc_models.FormResponder) -> str:
+        """List each question with its answer, for responders whose answers
+        are stored as a document.
+        """
+        if obj is None or not obj.stores_document:
+            return "-"
+        answers = obj.get_answers()
+        questions = fc_models.FormQuestion.objects.filter(
+            id__in=answers
+        ).values_list("id", "question")
+        return format_html(
+            "<table>{}</table>",
+            format_html_join(
+                "",
+                "<tr><th>{}</th><td>{}</td></tr>",
+                (
+                    (question, answers[question_id] or "")
+                    for question_id, question in questions
+                ),
+            ),
+        )
+
+
+@admin.register(fc_models.ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "kind",
+        "status",
+        "progress",
+        "requested_by",
+        "created_dt",
+        "finished_dt",
+    )
+    list_filter = ("status", "kind")
+    date_hierarchy = "created_dt"
+    raw_id_fields = ("requested_by",)
+    filter_horizontal = ("forms",)
+    readonly_fields = (
+        "status",
+        "progress",
+        "rows_total",
+        "rows_written",
+        "download",
+        "error",
+        "created_dt",
+        "started_dt",
+        "finished_dt",
+    )
+    exclude = ("file",)
+
+    @admin.display(description="Download")
+    def download(self, obj: fc_models.ExportJob) -> str:
+        """Link to the file once the export has completed."""
+        if obj.status != obj.StatusChoices.COMPLETED or not obj.file:
+            return "-"
+        return format_html(
+            '<a href="{}">{}</a>', obj.get_download_url(), obj.filename
+        )
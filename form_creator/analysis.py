@@ -0,0 +1,252 @@
+"""This module contains methods to analyse the answers to numeric questions:
+the count, mean, standard deviation, range, percentiles and a histogram.
+
+The answers are read from the `number_answer` column kept by the
+`typed_answers` module as flat values, a chunk at a time, without building
+model instances or parsing the text answers. Answers stored as documents
+have no such column, so they are converted as the documents are read.
+
+When NumPy is installed the values are read straight into an array and the
+statistics are worked out in a vectorised way, otherwise in pure Python.
+Both give the same results.
+"""
+
+import bisect
+import itertools
+import math
+import statistics
+import typing as _t
+from django.db.models import QuerySet
+from . import models as fc_models, typed_answers
+from .conf import get_setting
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+# The percentiles worked out by default.
+PERCENTILES = (25, 50, 75, 90)
+
+
+class NumericAnalysis(_t.NamedTuple):
+    """The analysis of a set of numeric answers. The statistics are None when
+    there are no answers.
+    """
+
+    count: int
+    mean: _t.Optional[float]
+    # The population standard deviation.
+    std: _t.Optional[float]
+    min: _t.Optional[float]
+    max: _t.Optional[float]
+    # Interpolated linearly between the nearest answers, keyed by percentile.
+    percentiles: _t.Dict[int, float]
+    # The number of answers in each bin of equal width between the minimum
+    # and maximum. The last bin includes the maximum.
+    histogram: _t.List[int]
+    # The edges of the bins, one more than there are bins.
+    bin_edges: _t.List[float]
+
+
+def _empty(bins: int) -> NumericAnalysis:
+    return NumericAnalysis(0, None, None, None, None, {}, [0] * bins, [])
+
+
+def _bin_edges(low: float, high: float, bins: int) -> _t.List[float]:
+    """Get the edges of bins of equal width. A single value is given a range
+    of one, as NumPy does.
+    """
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    width = (high - low) / bins
+    return [low + width * i for i in range(bins)] + [high]
+
+
+def analyse_python(
+    values: _t.Iterable[float],
+    bins: int = 10,
+    percentiles: _t.Iterable[int] = PERCENTILES,
+) -> NumericAnalysis:
+    """Analyse numeric answers in pure Python.
+
+    :param values: The answers.
+    :type values: Iterable[float]
+    :param bins: The number of bins in the histogram.
+    :type bins: int
+    :param percentiles: The percentiles to work out.
+    :type percentiles: Iterable[int]
+    :return: The analysis.
+    :rtype: NumericAnalysis
+    """
+    values = sorted(values)
+    count = len(values)
+    if not count:
+        return _empty(bins)
+
+    results = {}
+    for percentile in percentiles:
+        position = percentile / 100 * (count - 1)
+        low = math.floor(position)
+        high = min(low + 1, count - 1)
+        results[percentile] = values[low] + (values[high] - values[low]) * (
+            position - low
+        )
+
+    edges = _bin_edges(values[0], values[-1], bins)
+    histogram = [0] * bins
+    start = 0
+    for i, edge in enumerate(edges[1:-1]):
+        end = bisect.bisect_left(values, edge, start)
+        histogram[i] = end - start
+        start = end
+    histogram[-1] = count - start
+
+    return NumericAnalysis(
+        count=count,
+        mean=statistics.fmean(values),
+        std=statistics.pstdev(values),
+        min=values[0],
+        max=values[-1],
+        percentiles=results,
+        histogram=histogram,
+        bin_edges=edges,
+    )
+
+
+def analyse_numpy(
+    values: _t.Iterable[float],
+    bins: int = 10,
+    percentiles: _t.Iterable[int] = PERCENTILES,
+) -> NumericAnalysis:
+    """Analyse numeric answers with NumPy. The arguments are the same as for
+    `analyse_python`.
+    """
+    if not isinstance(values, numpy.ndarray):
+        values = numpy.fromiter(values, dtype=numpy.float64)
+    if not values.size:
+        return _empty(bins)
+
+    percentiles = list(percentiles)
+    histogram, edges = numpy.histogram(values, bins=bins)
+    return NumericAnalysis(
+        count=int(values.size),
+        mean=float(values.mean()),
+        std=float(values.std()),
+        min=float(values.min()),
+        max=float(values.max()),
+        percentiles=dict(
+            zip(
+                percentiles,
+                numpy.percentile(values, percentiles).tolist(),
+            )
+        ),
+        histogram=histogram.tolist(),
+        bin_edges=edges.tolist(),
+    )
+
+
+def analyse(
+    values: _t.Iterable[float],
+    bins: int = 10,
+    percentiles: _t.Iterable[int] = PERCENTILES,
+) -> NumericAnalysis:
+    """Analyse numeric answers, with NumPy where it is installed. The
+    arguments are the same as for `analyse_python`.
+    """
+    if numpy is not None:
+        return analyse_numpy(values, bins, percentiles)
+    return analyse_python(values, bins, percentiles)
+
+
+def _document_numbers(
+    question: fc_models.FormQuestion,
+    form_responders: QuerySet[fc_models.FormResponder],
+    chunk_size: int,
+) -> _t.Iterator[float]:
+    """Yield the numeric answers to a question stored as documents."""
+    # Keys made of digits are taken for array indexes when looked up in the
+    # database, so whole documents are read.
+    key = str(question.id)
+    for answers in (
+        form_responders.filter(form_id=question.form_id, answers__isnull=False)
+        .order_by()
+        .values_list("answers", flat=True)
+        .iterator(chunk_size=chunk_size)
+    ):
+        number = typed_answers.typed_values(
+            question.field_type, answers.get(key)
+        )["number_answer"]
+        if number is not None:
+            yield number
+
+
+def numeric_values(
+    question: fc_models.FormQuestion,
+    form_responses: _t.Optional[QuerySet[fc_models.FormResponse]] = None,
+    chunk_size: _t.Optional[int] = None,
+    form_responders: _t.Optional[QuerySet[fc_models.FormResponder]] = None,
+) -> _t.Iterator[float]:
+    """Yield the numeric answers to a question, fetched as flat values in
+    chunks of `chunk_size`, whether they are stored as responses or as
+    documents.
+
+    :param question: A numeric question.
+    :type question: FormQuestion
+    :param form_responses: Only read the answers among these responses.
+    :type form_responses: QuerySet[FormResponse]
+    :param chunk_size: The number of answers fetched at a time. Defaults to
+        the `FORM_CREATOR_EXPORT_CHUNK_SIZE` setting.
+    :type chunk_size: int
+    :param form_responders: Only read the answers stored as documents by
+        these responders.
+    :type form_responders: QuerySet[FormResponder]
+    :raises ValueError: If the question is not numeric.
+    """
+    if typed_answers.typed_column(question.field_type) != "number_answer":
+        raise ValueError(f"{question} is not a numeric question.")
+    if form_responses is None:
+        form_responses = fc_models.FormResponse.objects.all()
+    if form_responders is None:
+        form_responders = fc_models.FormResponder.objects.all()
+    chunk_size = chunk_size or get_setting("EXPORT_CHUNK_SIZE")
+    return itertools.chain(
+        form_responses.filter(question=question, number_answer__isnull=False)
+        .order_by()
+        .values_list("number_answer", flat=True)
+        .iterator(chunk_size=chunk_size),
+        _document_numbers(question, form_responders, chunk_size),
+    )
+
+
+def analyse_question(
+    question: fc_models.FormQuestion,
+    form_responses: _t.Optional[QuerySet[fc_models.FormResponse]] = None,
+    bins: int = 10,
+    percentiles: _t.Iterable[int] = PERCENTILES,
+    form_responders: _t.Optional[QuerySet[fc_models.FormResponder]] = None,
+) -> NumericAnalysis:
+    """Analyse the answers to a numeric question.
+
+    :param question: A numeric question.
+    :type question: FormQuestion
+    :param form_responses: Only analyse the answers among these responses.
+    :type form_responses: QuerySet[FormResponse]
+    :param bins: The number of bins in the histogram.
+    :type bins: int
+    :param percentiles: The percentiles to work out.
+    :type percentiles: Iterable[int]
+    :param form_responders: Only analyse the answers stored as documents by
+        these responders.
+    :type form_responders: QuerySet[FormResponder]
+    :return: The analysis.
+    :rtype: NumericAnalysis
+    :raises ValueError: If the question is not numeric.
+    """
+    return analyse(
+        numeric_values(
+            question, form_responses, form_responders=form_responders
+        ),
+        bins,
+        percentiles,
+    )
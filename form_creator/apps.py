@@ -5,3 +5,6 @@ class FormCreatorConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "form_creator"
     verbose_name = "Form Creator"
+
+    def ready(self):
+        from . import signals  # noqa: F401
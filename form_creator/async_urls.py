@@ -0,0 +1,63 @@
+"""The app's URLs, using the async views where there is one. Include this
+module instead of `form_creator.urls` when serving the app under ASGI.
+"""
+
+from django.urls import path
+from . import async_views, views
+
+app_name = "form_creator"
+
+urlpatterns = [
+    path("forms/", async_views.FormListView.as_view(), name="form_list"),
+    path("forms/create/", views.FormCreateView.as_view(), name="form_create"),
+    path(
+        "forms/<int:pk>-<slug:slug>/",
+        async_views.FormDetailView.as_view(),
+        name="form_detail",
+    ),
+    path(
+        "forms/<int:pk>-<slug:slug>/edit/",
+        views.FormUpdateView.as_view(),
+        name="form_edit",
+    ),
+    path(
+        "forms/<int:pk>-<slug:slug>/delete/",
+        views.FormDeleteView.as_view(),
+        name="form_delete",
+    ),
+    path(
+        "forms/<int:pk>-<slug:slug>/response/",
+        async_views.FormResponseView.as_view(),
+        name="form_response",
+    ),
+    path(
+        "forms/<int:pk>-<slug:slug>/export/questions/",
+        async_views.download_questions,
+        name="download_questions",
+    ),
+    path(
+        "forms/<int:pk>-<slug:slug>/export/responses/",
+        async_views.download_responses,
+        name="download_responses",
+    ),
+    path(
+        "forms/<int:pk>-<slug:slug>/summary/",
+        async_views.form_summary,
+        name="form_summary",
+    ),
+    path(
+        "forms/<int:pk>-<slug:slug>/questions/edit/",
+        views.FormQuestionsEditView.as_view(),
+        name="form_questions_edit",
+    ),
+    path(
+        "exports/<int:pk>/",
+        views.export_job_status,
+        name="export_job_status",
+    ),
+    path(
+        "exports/<int:pk>/download/",
+        views.export_job_download,
+        name="export_job_download",
+    ),
+]
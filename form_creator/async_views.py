@@ -0,0 +1,327 @@
+"""Async versions of the views for serving the app under ASGI. They use
+Django's async ORM API, and the exports are streamed from async iterators, so
+a single worker can serve many slow clients at once.
+
+Include `form_creator.async_urls` instead of `form_creator.urls` to use them.
+The views not in this module are the same as in `form_creator.views`.
+"""
+
+import typing as _t
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.core.exceptions import BadRequest
+from django.http import (
+    FileResponse,
+    HttpRequest,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import redirect, render
+from django.views import View
+from . import (
+    models as fc_models,
+    forms as fc_forms,
+    views as fc_views,
+    exporters as fc_exporters,
+    export_cache as fc_export_cache,
+    ingestion as fc_ingestion,
+    pagination as fc_pagination,
+    summary as fc_summary,
+)
+from .conf import get_setting
+from .decorators import (
+    aget_form,
+    aget_user,
+    login_required,
+    redirect_if_form_completed,
+    with_form,
+)
+from .schema import aget_schema
+
+
+class FormListView(fc_views.FormListView):
+    """The async version of `views.FormListView`. The page of forms is
+    fetched before the template is rendered.
+    """
+
+    template_name = "form_creator/form_list.html"
+
+    async def get(self, request: HttpRequest, *args, **kwargs):
+        await aget_user(request)
+        self.page = await fc_pagination.apaginate(
+            self.get_queryset(),
+            self.get_paginate_by(None),
+            self.get_cursor(),
+        )
+        self.object_list = self.page.object_list
+        return self.render_to_response(self.get_context_data())
+
+    def paginate_queryset(self, queryset, page_size):
+        return (
+            None,
+            self.page,
+            self.page.object_list,
+            self.page.has_other_pages,
+        )
+
+
+async def _afetch(queryset):
+    """Evaluate a queryset, filling its result cache."""
+    async for _ in queryset:
+        pass
+    return queryset
+
+
+class FormDetailView(View):
+    """The async version of `views.FormDetailView`."""
+
+    template_name = "form_creator/form_detail.html"
+
+    async def get(self, request: HttpRequest, pk: int, slug: str):
+        form = await aget_form(request, pk, slug)
+        user = await aget_user(request)
+        can_edit = await form.acan_edit(user)
+        if can_edit:
+            # The questions are listed for editors. They are fetched here as
+            # the template cannot query the database from an async view.
+            form._prefetched_objects_cache = {
+                "questions": await _afetch(
+                    form.questions.select_related(
+                        "related_question__form"
+                    ).prefetch_related("choice_options")
+                )
+            }
+
+        return render(
+            request,
+            self.template_name,
+            {
+                "object": form,
+                "form": form,
+                "can_edit": can_edit,
+                "can_delete": await form.acan_delete(user),
+                "completed_form": await form.acompleted_by(user),
+                "can_complete_form": await form.acan_complete_form(user),
+            },
+        )
+
+
+def _respondable(handler):
+    """Apply the checks made before a user responds to a form."""
+    return login_required(with_form()(redirect_if_form_completed()(handler)))
+
+
+class FormResponseView(View):
+    """The async version of `views.FormResponseView`. Submissions are staged
+    without leaving the event loop when `FORM_CREATOR_BUFFER_SUBMISSIONS` is
+    enabled. Otherwise, they are saved in a single transaction in a thread.
+    """
+
+    template_name = "form_creator/form_response.html"
+    success_url = None
+
+    async def get(self, request: HttpRequest, pk: int, slug: str):
+        return await _respondable(self.show_form)(request, pk, slug)
+
+    async def post(self, request: HttpRequest, pk: int, slug: str):
+        return await _respondable(self.submit_form)(request, pk, slug)
+
+    async def show_form(
+        self, request: HttpRequest, form: fc_models.Form
+    ) -> HttpResponse:
+        """Show the form to respond to."""
+        response_form = fc_forms.CaptureResponseForm(
+            form, schema=await aget_schema(form)
+        )
+        return render(
+            request,
+            self.template_name,
+            {"object": form, "form": response_form},
+        )
+
+    async def submit_form(
+        self, request: HttpRequest, form: fc_models.Form
+    ) -> HttpResponse:
+        """Save a response to the form."""
+        response_form = fc_forms.CaptureResponseForm(
+            form, request.POST, schema=await aget_schema(form)
+        )
+        if not response_form.is_valid():
+            messages.error(request, "Please correct the errors below.")
+            return render(
+                request,
+                self.template_name,
+                {"object": form, "form": response_form},
+            )
+
+        if not get_setting("BUFFER_SUBMISSIONS"):
+            await sync_to_async(response_form.save)(request.user)
+            messages.success(request, "Response saved.")
+        elif await fc_ingestion.aenqueue(
+            form, request.user, response_form.get_answers()
+        ):
+            messages.success(request, "Response received.")
+        else:
+            messages.error(request, "You have already responded.")
+        return redirect(self.success_url or form.get_absolute_url())
+
+
+async def _aread(filelike, block_size: int) -> _t.AsyncIterator[bytes]:
+    """Read a file in blocks without blocking the event loop."""
+    read = sync_to_async(filelike.read, thread_sensitive=False)
+    while True:
+        block = await read(block_size)
+        if not block:
+            break
+        yield block
+
+
+async def _aiterate(iterator: _t.Iterator) -> _t.AsyncIterator:
+    """Iterate over a sync iterator, which may query the database, without
+    blocking the event loop.
+    """
+    done = object()
+    step = sync_to_async(next)
+    while True:
+        item = await step(iterator, done)
+        if item is done:
+            break
+        yield item
+
+
+async def _acached_csv_response(*args, **kwargs) -> HttpResponse:
+    """The async version of `export_cache.cached_csv_response`. A cached
+    file is read in blocks as it is sent rather than all at once, and an
+    export which is not cached is rendered as it is sent.
+    """
+    response = await sync_to_async(fc_export_cache.cached_csv_response)(
+        *args, **kwargs
+    )
+    if isinstance(response, FileResponse):
+        response.streaming_content = _aread(
+            response.file_to_stream, response.block_size
+        )
+    elif response.streaming and not response.is_async:
+        response.streaming_content = _aiterate(
+            iter(response.streaming_content)
+        )
+    return response
+
+
+@with_form(can_edit=True)
+async def download_questions(
+    request: HttpRequest, form: fc_models.Form
+) -> StreamingHttpResponse:
+    """The async version of `views.download_questions`."""
+    options = fc_forms.DownloadOptionsForm(request.GET)
+    if not options.is_valid():
+        raise BadRequest(options.errors.as_text())
+
+    form_questions = fc_models.FormQuestion.objects.filter(form=form)
+    compression, content_encoding = options.get_compression(request)
+    if get_setting("EXPORT_CACHE"):
+        return await _acached_csv_response(
+            request,
+            form,
+            fc_export_cache.QUESTIONS,
+            lambda: fc_exporters.stream_questions(form_questions),
+            "questions.csv",
+            compression=compression,
+            content_encoding=content_encoding,
+        )
+    return fc_exporters.streaming_csv_response(
+        fc_exporters.astream_questions(form_questions),
+        "questions.csv",
+        compression=compression,
+        content_encoding=content_encoding,
+    )
+
+
+@with_form(can_edit=True)
+async def download_responses(
+    request: HttpRequest, form: fc_models.Form
+) -> StreamingHttpResponse:
+    """The async version of `views.download_responses`."""
+    options = fc_forms.ExportOptionsForm(request.GET)
+    if not options.is_valid():
+        raise BadRequest(options.errors.as_text())
+
+    form_responses = options.filter_responses(
+        fc_models.FormResponse.objects.filter(form_responder__form=form)
+    )
+    documents = options.filter_documents(
+        fc_exporters.form_documents([form.id])
+    )
+    wide = options.cleaned_data["layout"] == options.LAYOUT_WIDE
+    columns = options.cleaned_data["columns"]
+    compression, content_encoding = options.get_compression(request)
+    if get_setting("EXPORT_CACHE") and not (
+        options.is_narrowed or options.is_incremental
+    ):
+        return await _acached_csv_response(
+            request,
+            form,
+            (
+                fc_export_cache.WIDE_RESPONSES
+                if wide
+                else fc_export_cache.RESPONSES
+            ),
+            (
+                (lambda: fc_exporters.stream_wide_responses(form))
+                if wide
+                else (
+                    lambda: fc_exporters.stream_responses(
+                        form_responses, documents=documents
+                    )
+                )
+            ),
+            "responses.csv",
+            compression=compression,
+            content_encoding=content_encoding,
+        )
+
+    cursor = None
+    if options.is_incremental:
+        form_responses, cursor = await fc_exporters.aapply_cursor(
+            form_responses,
+            after_id=options.cleaned_data["after_id"],
+            after_dt=options.cleaned_data["after"],
+        )
+        documents, cursor = await fc_exporters.aapply_document_cursor(
+            documents,
+            cursor,
+            after_dt=options.cleaned_data["after"],
+            after_document_id=options.cleaned_data["after_document_id"],
+        )
+
+    if wide:
+        content = fc_exporters.astream_wide_responses(
+            form,
+            form_responses,
+            question_ids=options.cleaned_data["questions"],
+            columns=columns,
+            documents=documents,
+        )
+    else:
+        content = fc_exporters.astream_responses(
+            form_responses, columns, documents=documents
+        )
+
+    response = fc_exporters.streaming_csv_response(
+        content,
+        "responses.csv",
+        compression=compression,
+        content_encoding=content_encoding,
+    )
+    if cursor is not None:
+        options.set_cursor_headers(response, cursor)
+    return response
+
+
+@with_form(can_edit=True)
+async def form_summary(
+    request: HttpRequest, form: fc_models.Form
+) -> JsonResponse:
+    """The async version of `views.form_summary`."""
+    return JsonResponse(await sync_to_async(fc_summary.get_summary)(form))
@@ -0,0 +1,141 @@
+"""This module contains methods to compress exports as they are streamed.
+Chunks are compressed one at a time, so the compressed output is never held
+in memory as a whole.
+
+gzip is always available. zstd is available when the `zstandard` package is
+installed.
+"""
+
+import typing as _t
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+GZIP = "gzip"
+ZSTD = "zstd"
+
+CONTENT_TYPES = {
+    GZIP: "application/gzip",
+    ZSTD: "application/zstd",
+}
+
+EXTENSIONS = {
+    GZIP: ".gz",
+    ZSTD: ".zst",
+}
+
+
+def available_methods() -> _t.List[str]:
+    """Get the compression methods which can be used, most preferred first."""
+    methods = [GZIP]
+    if zstandard is not None:
+        methods.insert(0, ZSTD)
+    return methods
+
+
+def _encode(
+    chunks: _t.Iterable[_t.Union[str, bytes]],
+    charset: str,
+) -> _t.Iterator[bytes]:
+    """Encode any text chunks to bytes."""
+    for chunk in chunks:
+        yield chunk.encode(charset) if isinstance(chunk, str) else chunk
+
+
+def _compress(compressor, chunks: _t.Iterable[bytes]) -> _t.Iterator[bytes]:
+    """Feed each chunk through the compressor, yielding whatever output is
+    ready, and finally the remaining output once the input is exhausted.
+    """
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _compressor(method: str):
+    """Create a compressor for the method."""
+    if method == GZIP:
+        # The window bits offset of 16 writes a gzip header and trailer.
+        return zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    if method == ZSTD and zstandard is not None:
+        return zstandard.ZstdCompressor().compressobj()
+    raise ValueError(f"Unsupported compression method: {method}")
+
+
+def compress_stream(
+    chunks: _t.Iterable[_t.Union[str, bytes]],
+    method: str,
+    charset: str = "utf-8",
+) -> _t.Iterator[bytes]:
+    """Compress the chunks as they are produced.
+
+    :param chunks: The content to compress. Text is encoded using `charset`.
+    :type chunks: Iterable[str or bytes]
+    :param method: The compression method, one of `available_methods()`.
+    :type method: str
+    :param charset: The encoding to use for text chunks.
+    :type charset: str
+    :return: The compressed content.
+    :rtype: Iterator[bytes]
+    """
+    return _compress(_compressor(method), _encode(chunks, charset))
+
+
+async def _acompress(
+    compressor,
+    chunks: _t.AsyncIterable[_t.Union[str, bytes]],
+    charset: str,
+) -> _t.AsyncIterator[bytes]:
+    """The async version of `_compress`, which also encodes text chunks."""
+    async for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode(charset)
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def acompress_stream(
+    chunks: _t.AsyncIterable[_t.Union[str, bytes]],
+    method: str,
+    charset: str = "utf-8",
+) -> _t.AsyncIterator[bytes]:
+    """The async version of `compress_stream`."""
+    return _acompress(_compressor(method), chunks, charset)
+
+
+def _is_refused(param: str) -> bool:
+    """Check if an `Accept-Encoding` parameter gives a quality of zero."""
+    key, _, value = param.partition("=")
+    if key.strip().lower() != "q":
+        return False
+    try:
+        return float(value) == 0
+    except ValueError:
+        return False
+
+
+def accepted_method(accept_encoding: str) -> _t.Optional[str]:
+    """Pick the preferred compression method from an `Accept-Encoding`
+    header.
+
+    :param accept_encoding: The value of the `Accept-Encoding` header.
+    :type accept_encoding: str
+    :return: The preferred method accepted by the client, if any.
+    :rtype: str or None
+    """
+    accepted = set()
+    for coding in accept_encoding.split(","):
+        name, *params = (part.strip() for part in coding.split(";"))
+        if not any(_is_refused(param) for param in params):
+            accepted.add(name.lower())
+
+    for method in available_methods():
+        if method in accepted:
+            return method
+    return None
@@ -0,0 +1,64 @@
+"""Application settings. Each setting can be overridden in the project's
+settings module by prefixing its name with `FORM_CREATOR_`.
+"""
+
+import typing as _t
+from django.conf import settings
+
+# The ways the answers to a form can be stored. See `RESPONSE_STORAGE`.
+STORAGE_ROWS = "rows"
+STORAGE_DOCUMENT = "document"
+
+DEFAULTS = {
+    # Number of rows fetched from the database per round-trip when exporting.
+    "EXPORT_CHUNK_SIZE": 2000,
+    # Number of rows written by an export job between progress updates.
+    "EXPORT_PROGRESS_INTERVAL": 1000,
+    # Number of processes used to export responses in the background.
+    "EXPORT_WORKERS": 1,
+    # Number of seconds after which an export job still marked as running is
+    # assumed to have been abandoned by its worker, and is run again.
+    "EXPORT_JOB_TIMEOUT": 60 * 60,
+    # Whether to cache downloaded exports as files until their content
+    # changes.
+    "EXPORT_CACHE": False,
+    # Number of compiled form schemas kept in each process.
+    "SCHEMA_CACHE_SIZE": 256,
+    # Number of seconds compiled form schemas are kept in Django's cache.
+    "SCHEMA_CACHE_TIMEOUT": 60 * 60,
+    # Whether to stage submissions to be written by `flush_submissions`
+    # instead of writing them during the request.
+    "BUFFER_SUBMISSIONS": False,
+    # Number of staged submissions written per transaction.
+    "SUBMISSION_BATCH_SIZE": 500,
+    # How new submissions are stored. `STORAGE_ROWS` saves a `FormResponse`
+    # row per answer, whereas `STORAGE_DOCUMENT` saves all of the answers as
+    # a single JSON document on the `FormResponder`.
+    "RESPONSE_STORAGE": STORAGE_ROWS,
+    # Whether to keep running statistics of the answers to each question as
+    # responses are saved. Off by default, as every submission to a form then
+    # updates the same rows, so concurrent submissions wait on each other.
+    "ANSWER_STATS": False,
+    # Number of seconds form summaries are kept in Django's cache.
+    "SUMMARY_CACHE_TIMEOUT": 60 * 60,
+    # Number of forms on each page of the form list.
+    "FORM_LIST_PAGE_SIZE": 50,
+    # Whether to cache the forms looked up by views. See `form_cache`.
+    "FORM_CACHE": False,
+    # Number of cached forms kept in each process.
+    "FORM_CACHE_SIZE": 256,
+    # Number of seconds cached forms are kept in each process.
+    "FORM_CACHE_LOCAL_TIMEOUT": 5,
+    # Number of seconds cached forms are kept in Django's cache.
+    "FORM_CACHE_TIMEOUT": 60 * 5,
+}
+
+
+def get_setting(name: str) -> _t.Any:
+    """Get the value of a setting, falling back to the default.
+
+    :param name: The name of the setting without the `FORM_CREATOR_` prefix.
+    :type name: str
+    :return: The value of the setting.
+    """
+    return getattr(settings, f"FORM_CREATOR_{name}", DEFAULTS[name])
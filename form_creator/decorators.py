@@ -1,9 +1,189 @@
+import asyncio
+import typing as _t
 from functools import wraps
+from asgiref.sync import sync_to_async
 from django.shortcuts import get_object_or_404, redirect
-from django.http import HttpRequest, HttpResponse
+from django.http import Http404, HttpRequest, HttpResponse
 from django.contrib import messages
+from django.contrib.auth import get_user_model
+from django.contrib.auth.decorators import (
+    login_required as _sync_login_required,
+)
+from django.contrib.auth.views import redirect_to_login
 from django.core.exceptions import PermissionDenied
-from . import models as fc_models
+from django.db.models import QuerySet
+from . import models as fc_models, form_cache as fc_form_cache
+from .conf import get_setting
+
+User = get_user_model()
+
+
+def _load_user(request: HttpRequest) -> User:
+    """Evaluate the lazily loaded user on the request."""
+    request.user.is_authenticated
+    return request.user
+
+
+async def aget_user(request: HttpRequest) -> User:
+    """Get the user making the request from an async view. The session and
+    user are only loaded synchronously, so this is done in a thread once,
+    after which `request.user` can be used freely.
+
+    :param request: The request object.
+    :type request: HttpRequest
+    :return: The user.
+    :rtype: User
+    """
+    return await sync_to_async(_load_user)(request)
+
+
+def login_required(func):
+    """Django's `login_required`, which also supports async views."""
+    if not asyncio.iscoroutinefunction(func):
+        return _sync_login_required(func)
+
+    @wraps(func)
+    async def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await func(request, *args, **kwargs)
+
+    return wrapper
+
+
+# The attribute of the request holding the forms looked up while handling it.
+_FORMS_ATTR = "_form_creator_forms"
+
+
+def _forms_queryset(user: _t.Optional[User]) -> QuerySet[fc_models.Form]:
+    """Get the forms along with the user's relationship to each of them, so
+    that the user's permissions are checked without further queries.
+    """
+    return fc_models.Form.objects.with_permissions_for(user)
+
+
+def _from_cache(
+    cached: _t.Optional[fc_form_cache.CachedForm],
+    user: _t.Optional[User],
+) -> fc_models.Form:
+    """Get the form from the form cache, annotated with the user's
+    permissions.
+    """
+    if cached is None:
+        raise Http404("No Form matches the given query.")
+    return cached.for_user(user)
+
+
+def _seen_forms(request: HttpRequest) -> _t.Dict[int, fc_models.Form]:
+    """Get the forms already looked up while handling the request, keyed by
+    primary key.
+    """
+    forms = getattr(request, _FORMS_ATTR, None)
+    if forms is None:
+        forms = {}
+        setattr(request, _FORMS_ATTR, forms)
+    return forms
+
+
+def _remember(
+    request: HttpRequest,
+    form: fc_models.Form,
+) -> fc_models.Form:
+    """Keep a form looked up while handling the request. The form also
+    remembers the responders it finds, so each user's response is only
+    looked up once.
+    """
+    form.remember_responders()
+    _seen_forms(request)[form.pk] = form
+    return form
+
+
+def get_form(
+    request: HttpRequest,
+    pk: int,
+    slug: str,
+    can_edit: bool = False,
+    can_delete: bool = False,
+) -> fc_models.Form:
+    """Get the form the request is for, as looked up by `with_form`. The
+    form is fetched along with the user's permissions for it in a single
+    query, or from the form cache when it is enabled, once per request.
+    After that the same instance is returned to every view, mixin and
+    decorator that asks for it.
+
+    :param request: The request object.
+    :type request: HttpRequest
+    :param pk: The primary key of the form.
+    :type pk: int
+    :param slug: The slug of the form.
+    :type slug: str
+    :param can_edit: If True, the user must be allowed to edit the form.
+    :type can_edit: bool
+    :param can_delete: If True, the user must be allowed to delete the form.
+    :type can_delete: bool
+    :return: The form.
+    :rtype: Form
+    """
+    form = _seen_forms(request).get(int(pk))
+    if form is None:
+        user = getattr(request, "user", None)
+        if get_setting("FORM_CACHE"):
+            form = _from_cache(fc_form_cache.get_cached_form(pk), user)
+        else:
+            form = get_object_or_404(_forms_queryset(user), pk=pk, slug=slug)
+        _remember(request, form)
+    if form.slug != slug:
+        raise Http404("No Form matches the given query.")
+
+    if can_edit and not form.can_edit(request.user):
+        raise PermissionDenied
+    if can_delete and not form.can_delete(request.user):
+        raise PermissionDenied
+    return form
+
+
+async def aget_form(
+    request: HttpRequest,
+    pk: int,
+    slug: str,
+    can_edit: bool = False,
+    can_delete: bool = False,
+) -> fc_models.Form:
+    """The async version of `get_form`.
+
+    :param request: The request object.
+    :type request: HttpRequest
+    :param pk: The primary key of the form.
+    :type pk: int
+    :param slug: The slug of the form.
+    :type slug: str
+    :param can_edit: If True, the user must be allowed to edit the form.
+    :type can_edit: bool
+    :param can_delete: If True, the user must be allowed to delete the form.
+    :type can_delete: bool
+    :return: The form.
+    :rtype: Form
+    """
+    user = await aget_user(request)
+    form = _seen_forms(request).get(int(pk))
+    if form is None:
+        if get_setting("FORM_CACHE"):
+            form = _from_cache(await fc_form_cache.aget_cached_form(pk), user)
+        else:
+            try:
+                form = await _forms_queryset(user).aget(pk=pk, slug=slug)
+            except fc_models.Form.DoesNotExist:
+                raise Http404("No Form matches the given query.")
+        _remember(request, form)
+    if form.slug != slug:
+        raise Http404("No Form matches the given query.")
+
+    if can_edit and not await form.acan_edit(user):
+        raise PermissionDenied
+    if can_delete and not await form.acan_delete(user):
+        raise PermissionDenied
+    return form
 
 
 def with_form(can_edit=False, can_delete=False):
@@ -11,6 +191,8 @@ def with_form(can_edit=False, can_delete=False):
     If the user is not allowed to see the form, raise a PermissionDenied.
     If the form does not exist, raise a 404.
 
+    Both sync and async views can be decorated.
+
     :param can_edit: If True, the user must be allowed to edit the form.
     :type can_edit: bool
     :param can_delete: If True, the user must be allowed to delete the form.
@@ -18,6 +200,22 @@ def with_form(can_edit=False, can_delete=False):
     """
 
     def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(
+                request: HttpRequest,
+                pk: int,
+                slug: str,
+                *args,
+                **kwargs,
+            ) -> HttpResponse:
+                """The async version of `wrapper`."""
+                form = await aget_form(request, pk, slug, can_edit, can_delete)
+                return await func(request, form, *args, **kwargs)
+
+            return async_wrapper
+
         @wraps(func)
         def wrapper(
             request: HttpRequest,
@@ -39,12 +237,7 @@ def with_form(can_edit=False, can_delete=False):
             :rtype: HttpResponse
             """
 
-            form = get_object_or_404(fc_models.Form, pk=pk, slug=slug)
-            if can_edit and not form.can_edit(request.user):
-                raise PermissionDenied
-            if can_delete and not form.can_delete(request.user):
-                raise PermissionDenied
-
+            form = get_form(request, pk, slug, can_edit, can_delete)
             return func(request, form, *args, **kwargs)
 
         return wrapper
@@ -55,12 +248,33 @@ def with_form(can_edit=False, can_delete=False):
 def redirect_if_form_completed(redirect_url: str = "/"):
     """If the form has been completed, redirect to the redirect_url.
 
+    Both sync and async views can be decorated.
+
     :param redirect_url: The URL to redirect to if the form is already
         completed.
     :type redirect_url: str
     """
 
     def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(
+                request: HttpRequest, form: fc_models.Form, *args, **kwargs
+            ):
+                """The async version of `wrapper`."""
+                user = await aget_user(request)
+                if await form.acompleted_by(user):
+                    messages.error(
+                        request,
+                        "You have already completed this form.",
+                    )
+                    return redirect(redirect_url)
+
+                return await func(request, form, *args, **kwargs)
+
+            return async_wrapper
+
         @wraps(func)
         def wrapper(
             request: HttpRequest, form: fc_models.Form, *args, **kwargs
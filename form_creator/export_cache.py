@@ -0,0 +1,287 @@
+"""This module contains methods to cache rendered exports as files. A cached
+export is keyed by the form and a content version which changes whenever the
+form, its questions or its responses change, so a stale file is never
+served. Files are served with `FileResponse`, letting the server send them
+without copying them through Python, along with `ETag` and `Last-Modified`
+headers so that repeat downloads of an unchanged export return 304.
+
+An export which is not cached is streamed as it is rendered, and a copy is
+kept as it goes. Once the whole export has been sent, the copy is stored
+under a name of its own and then published by storing a marker holding that
+name. Only published copies are served, so a copy which is still being
+stored, or was left behind by a request which failed, is never served and
+never stops the export from being cached.
+"""
+
+import re
+import tempfile
+import typing as _t
+import uuid
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Max
+from django.http import (
+    FileResponse,
+    HttpRequest,
+    HttpResponse,
+    StreamingHttpResponse,
+)
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import content_disposition_header, http_date, quote_etag
+from . import models as fc_models, compression as fc_compression
+
+CACHE_DIR = "form_creator/export_cache"
+
+QUESTIONS = "questions"
+RESPONSES = "responses"
+WIDE_RESPONSES = "responses-wide"
+
+# The suffix of the marker which publishes a complete copy of an export.
+COMPLETE_SUFFIX = ".complete"
+
+# Matches the suffix added to the name of an export for each copy of it.
+_COPY_SUFFIX = re.compile(r"\.[0-9a-f]{32}")
+
+
+def content_version(form: fc_models.Form, kind: str) -> str:
+    """Get the version of the content of an export. Questions exports change
+    with the form, whereas responses exports also change with each new
+    response, whether it is stored as rows or as a document.
+
+    :param form: The form being exported.
+    :type form: Form
+    :param kind: The kind of export, one of `QUESTIONS`, `RESPONSES` or
+        `WIDE_RESPONSES`.
+    :type kind: str
+    :return: The version of the content.
+    :rtype: str
+    """
+    if kind == QUESTIONS:
+        return form.version.hex
+    last_id = fc_models.FormResponse.objects.filter(
+        form_responder__form=form
+    ).aggregate(last_id=Max("id"))["last_id"]
+    last_document_id = fc_models.FormResponder.objects.filter(
+        form=form, answers__isnull=False
+    ).aggregate(last_id=Max("id"))["last_id"]
+    return f"{form.version.hex}-{last_id or 0}-{last_document_id or 0}"
+
+
+def _directory(form_id: int) -> str:
+    """Get the directory holding the cached exports of a form."""
+    return f"{CACHE_DIR}/{form_id}"
+
+
+def cache_name(
+    form_id: int,
+    kind: str,
+    version: str,
+    compression: _t.Optional[str] = None,
+) -> str:
+    """Get the name of the file an export is cached in.
+
+    :param form_id: The id of the form being exported.
+    :type form_id: int
+    :param kind: The kind of export.
+    :type kind: str
+    :param version: The version of the content.
+    :type version: str
+    :param compression: The method the file is compressed with, if any.
+    :type compression: str
+    :return: The name of the file in the default storage.
+    :rtype: str
+    """
+    extension = fc_compression.EXTENSIONS.get(compression, "")
+    return f"{_directory(form_id)}/{kind}.{version}.csv{extension}"
+
+
+def _marker(name: str) -> str:
+    """Get the name of the marker which publishes a copy of an export."""
+    return f"{name}{COMPLETE_SUFFIX}"
+
+
+def _is_copy(name: str, filename: str) -> bool:
+    """Indicate if a file is the export itself or a copy of it."""
+    return filename == name or (
+        filename.startswith(name)
+        and _COPY_SUFFIX.fullmatch(filename, len(name)) is not None
+    )
+
+
+def _published(name: str) -> _t.Optional[str]:
+    """Get the name of the published copy of an export, if there is one."""
+    try:
+        with default_storage.open(_marker(name), "rb") as marker:
+            copy = marker.read().decode()
+    except FileNotFoundError:
+        return None
+    if not _is_copy(name, copy) or not default_storage.exists(copy):
+        return None
+    return copy
+
+
+def _publish(name: str, tmp: _t.IO[bytes]) -> None:
+    """Store a complete copy of an export and publish it, unless another
+    request has published one first. Any other copies, such as those left
+    behind by requests which failed, are then deleted.
+    """
+    copy = default_storage.save(f"{name}.{uuid.uuid4().hex}", File(tmp))
+    if default_storage.exists(_marker(name)) and _published(name) is None:
+        # The copy the marker published has been deleted under it.
+        default_storage.delete(_marker(name))
+    marker = default_storage.save(_marker(name), ContentFile(copy.encode()))
+    if marker != _marker(name):
+        default_storage.delete(marker)
+        default_storage.delete(copy)
+        return
+
+    directory = name.rsplit("/", 1)[0]
+    for other in _list_names(directory):
+        if other != copy and _is_copy(name, other):
+            default_storage.delete(other)
+
+
+def _tee(
+    content: _t.Iterable[_t.Union[str, bytes]],
+    name: str,
+) -> _t.Iterator[bytes]:
+    """Yield the content while keeping a copy of it, which is published once
+    all of it has been yielded.
+    """
+    with tempfile.TemporaryFile() as tmp:
+        for chunk in content:
+            chunk = chunk.encode() if isinstance(chunk, str) else chunk
+            tmp.write(chunk)
+            yield chunk
+        tmp.seek(0)
+        _publish(name, tmp)
+
+
+def _list_names(directory: str) -> _t.List[str]:
+    """Get the names of the files in a directory of the default storage."""
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return [f"{directory}/{filename}" for filename in files]
+
+
+def _list(form_id: int) -> _t.List[str]:
+    """Get the names of the copies of the cached exports of a form, whether
+    they are published or not.
+    """
+    return [
+        name
+        for name in _list_names(_directory(form_id))
+        if not name.endswith(COMPLETE_SUFFIX)
+    ]
+
+
+def _delete(names: _t.Iterable[str]) -> None:
+    """Delete cached exports. The markers go first, so that no export is
+    served while it is deleted.
+    """
+    names = sorted(names, key=lambda name: not name.endswith(COMPLETE_SUFFIX))
+    for name in names:
+        default_storage.delete(name)
+
+
+def _prune(form_id: int, kind: str, version: str) -> None:
+    """Delete the cached exports of a kind from earlier versions."""
+    prefix = f"{_directory(form_id)}/{kind}."
+    current = f"{prefix}{version}."
+    _delete(
+        name
+        for name in _list_names(_directory(form_id))
+        if name.startswith(prefix) and not name.startswith(current)
+    )
+
+
+def invalidate(form_id: int) -> None:
+    """Delete all the cached exports of a form.
+
+    :param form_id: The id of the form.
+    :type form_id: int
+    """
+    _delete(_list_names(_directory(form_id)))
+
+
+def cached_csv_response(
+    request: HttpRequest,
+    form: fc_models.Form,
+    kind: str,
+    render: _t.Callable[[], _t.Iterable[str]],
+    filename: str,
+    compression: _t.Optional[str] = None,
+    content_encoding: bool = False,
+) -> HttpResponse:
+    """Create a response which serves an export from the cache. If there is
+    no up to date copy, the export is streamed as it is rendered and cached
+    once it has all been sent. Returns a 304 response if the client already
+    has the current version.
+
+    :param request: The request for the export.
+    :type request: HttpRequest
+    :param form: The form being exported.
+    :type form: Form
+    :param kind: The kind of export.
+    :type kind: str
+    :param render: Called to render the export when it is not cached. The
+        export is rendered as the response is streamed.
+    :type render: Callable[[], Iterable[str]]
+    :param filename: The name of the file to download as.
+    :type filename: str
+    :param compression: A method from `compression.available_methods()` to
+        compress the file with.
+    :type compression: str
+    :param content_encoding: If True, the compression is declared in the
+        `Content-Encoding` header. Otherwise, a compressed file is
+        downloaded.
+    :type content_encoding: bool
+    :return: The response.
+    :rtype: HttpResponse
+    """
+    version = content_version(form, kind)
+    name = cache_name(form.id, kind, version, compression)
+    etag = quote_etag(f"{kind}-{version}-{compression or 'identity'}")
+    copy = _published(name)
+    last_modified = None
+    if copy is not None:
+        last_modified = int(
+            default_storage.get_modified_time(copy).timestamp()
+        )
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+
+    content_type = "text/csv"
+    if compression and not content_encoding:
+        content_type = fc_compression.CONTENT_TYPES[compression]
+        filename += fc_compression.EXTENSIONS[compression]
+
+    if response is None and copy is not None:
+        response = FileResponse(
+            default_storage.open(copy, "rb"),
+            as_attachment=True,
+            filename=filename,
+            content_type=content_type,
+        )
+    elif response is None:
+        content = render()
+        if compression:
+            content = fc_compression.compress_stream(content, compression)
+        response = StreamingHttpResponse(
+            _tee(content, name), content_type=content_type
+        )
+        response["Content-Disposition"] = content_disposition_header(
+            True, filename
+        )
+        _prune(form.id, kind, version)
+    if compression and content_encoding:
+        response["Content-Encoding"] = compression
+        patch_vary_headers(response, ["Accept-Encoding"])
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
@@ -1,59 +1,1094 @@
 """This module contains methods to export data from the database."""
 
 import csv
-from django.db.models import QuerySet
-from . import models as fc_models
+import typing as _t
+import zipfile
+from datetime import datetime
+from itertools import chain, groupby
+from operator import itemgetter
+from django.db.models import Max, QuerySet
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from . import models as fc_models, compression as fc_compression
+from .conf import get_setting
+
+QUESTION_HEADERS = [
+    "Form",
+    "Question",
+    "Type",
+    "Required",
+    "Seq. No.",
+    "Choices",
+    "Related Question",
+]
+
+# The columns which can be selected for a response export, keyed by name, with
+# their header and the field they are read from. The joins are done in SQL so
+# that no model instances need to be built, and only for the columns selected.
+RESPONSE_FIELDS = {
+    "form": ("Form", "form_responder__form__title"),
+    "username": ("Username", "form_responder__user__username"),
+    "email": ("Email", "form_responder__user__email"),
+    "answered_on": ("Answered On", "form_responder__created_dt"),
+    "question": ("Question", "question__question"),
+    "answer": ("Answer", "answer"),
+}
+
+RESPONSE_HEADERS = [header for header, _ in RESPONSE_FIELDS.values()]
+
+# The columns about the responder which lead each row of the wide export. A
+# column per question follows.
+WIDE_RESPONSE_FIELDS = ("form", "username", "email", "answered_on")
+
+WIDE_RESPONSE_HEADERS = [
+    RESPONSE_FIELDS[name][0] for name in WIDE_RESPONSE_FIELDS
+]
+
+# The columns fetched for each row of the questions export.
+QUESTION_COLUMNS = (
+    "form__title",
+    "question",
+    "field_type",
+    "required",
+    "seq_no",
+    "choices",
+    "related_question__form__title",
+    "related_question__question",
+)
+
+RESPONSE_COLUMNS = tuple(field for _, field in RESPONSE_FIELDS.values())
+
+# Number of CSV rows joined together before being handed to the response when
+# streaming. Avoids a write to the socket for every row.
+STREAM_BATCH_SIZE = 500
+
+
+class Echo:
+    """A file-like object which hands back whatever is written to it instead
+    of storing it. This lets `csv.writer` produce rows one at a time for
+    streaming.
+    """
+
+    def write(self, value: str) -> str:
+        """Return the value rather than writing it anywhere."""
+        return value
+
+
+class ExportCursor(_t.NamedTuple):
+    """The high-water mark of an incremental export. Passing these values back
+    in the next export returns only the responses which arrived since.
+    """
+
+    last_id: _t.Optional[int]
+    last_dt: _t.Optional[datetime]
+    # The id of the latest responder whose answers are stored as a document.
+    last_document_id: _t.Optional[int] = None
+
+
+def apply_cursor(
+    form_responses: QuerySet[fc_models.FormResponse],
+    after_id: _t.Optional[int] = None,
+    after_dt: _t.Optional[datetime] = None,
+) -> _t.Tuple[QuerySet[fc_models.FormResponse], ExportCursor]:
+    """Limit the responses to those newer than `after_id` and/or `after_dt`
+    and get the cursor for the next export.
+
+    The responses are capped at the cursor so that any which arrive while the
+    export is running are left for the next export rather than being missed.
+
+    :param form_responses: The responses to export.
+    :type form_responses: QuerySet[FormResponse]
+    :param after_id: Only include responses with a greater id.
+    :type after_id: int
+    :param after_dt: Only include responses submitted after this time.
+    :type after_dt: datetime
+    :return: The limited responses ordered by id, and the new cursor.
+    :rtype: Tuple[QuerySet[FormResponse], ExportCursor]
+    """
+    form_responses = _after_cursor(form_responses, after_id, after_dt)
+    latest = form_responses.aggregate(**_CURSOR_AGGREGATES)
+    return _cap_at_cursor(form_responses, latest, after_id, after_dt)
+
+
+async def aapply_cursor(
+    form_responses: QuerySet[fc_models.FormResponse],
+    after_id: _t.Optional[int] = None,
+    after_dt: _t.Optional[datetime] = None,
+) -> _t.Tuple[QuerySet[fc_models.FormResponse], ExportCursor]:
+    """The async version of `apply_cursor`."""
+    form_responses = _after_cursor(form_responses, after_id, after_dt)
+    latest = await form_responses.aaggregate(**_CURSOR_AGGREGATES)
+    return _cap_at_cursor(form_responses, latest, after_id, after_dt)
+
+
+_CURSOR_AGGREGATES = {
+    "last_id": Max("id"),
+    "last_dt": Max("form_responder__created_dt"),
+}
+
+
+def _after_cursor(
+    form_responses: QuerySet[fc_models.FormResponse],
+    after_id: _t.Optional[int],
+    after_dt: _t.Optional[datetime],
+) -> QuerySet[fc_models.FormResponse]:
+    """Limit the responses to those newer than the cursor."""
+    if after_id is not None:
+        form_responses = form_responses.filter(id__gt=after_id)
+    if after_dt is not None:
+        form_responses = form_responses.filter(
+            form_responder__created_dt__gt=after_dt
+        )
+    return form_responses
+
+
+def _cap_at_cursor(
+    form_responses: QuerySet[fc_models.FormResponse],
+    latest: dict,
+    after_id: _t.Optional[int],
+    after_dt: _t.Optional[datetime],
+) -> _t.Tuple[QuerySet[fc_models.FormResponse], ExportCursor]:
+    """Limit the responses to those up to the latest at the time of the
+    export and get the new cursor.
+    """
+    if latest["last_id"] is None:
+        return form_responses.none(), ExportCursor(after_id, after_dt)
+
+    form_responses = form_responses.filter(id__lte=latest["last_id"])
+    return form_responses.order_by("id"), ExportCursor(**latest)
+
+
+class ResponseDocuments(_t.NamedTuple):
+    """Responders whose answers are stored as a document, to be exported
+    along with the responses stored as rows. Only the answers to
+    `question_ids` are exported, if given.
+    """
+
+    form_responders: QuerySet[fc_models.FormResponder]
+    question_ids: _t.Optional[_t.Tuple[int, ...]] = None
+
+
+def form_documents(form_ids: _t.Iterable[int]) -> ResponseDocuments:
+    """Get the responders to the forms whose answers are stored as a
+    document.
+    """
+    return ResponseDocuments(
+        fc_models.FormResponder.objects.filter(
+            form_id__in=list(form_ids), answers__isnull=False
+        )
+    )
+
+
+def filter_documents(
+    documents: ResponseDocuments,
+    start: _t.Optional[datetime] = None,
+    end: _t.Optional[datetime] = None,
+    question_ids: _t.Optional[_t.Iterable[int]] = None,
+    responder_ids: _t.Optional[_t.Iterable[int]] = None,
+) -> ResponseDocuments:
+    """The version of `filter_responses` for answers stored as documents."""
+    form_responders = documents.form_responders
+    if start is not None:
+        form_responders = form_responders.filter(created_dt__gte=start)
+    if end is not None:
+        form_responders = form_responders.filter(created_dt__lt=end)
+    if responder_ids:
+        form_responders = form_responders.filter(id__in=responder_ids)
+    return ResponseDocuments(
+        form_responders,
+        tuple(question_ids) if question_ids else documents.question_ids,
+    )
+
+
+def apply_document_cursor(
+    documents: ResponseDocuments,
+    cursor: ExportCursor,
+    after_dt: _t.Optional[datetime] = None,
+    after_document_id: _t.Optional[int] = None,
+) -> _t.Tuple[ResponseDocuments, ExportCursor]:
+    """Limit the documents to those newer than `after_document_id` and/or
+    `after_dt`, and move the cursor returned by `apply_cursor` on to the
+    latest of them.
+
+    Documents have no response ids, so they have a cursor of their own, the
+    id of their responder. The cursor never moves back, whichever kind of
+    answer is newer.
+
+    :param documents: The documents to export.
+    :type documents: ResponseDocuments
+    :param cursor: The cursor for the responses stored as rows.
+    :type cursor: ExportCursor
+    :param after_dt: Only include documents submitted after this time.
+    :type after_dt: datetime
+    :param after_document_id: Only include documents of responders with a
+        greater id.
+    :type after_document_id: int
+    :return: The limited documents and the new cursor.
+    :rtype: Tuple[ResponseDocuments, ExportCursor]
+    """
+    form_responders = _documents_after(documents, after_dt, after_document_id)
+    latest = form_responders.aggregate(**_DOCUMENT_CURSOR_AGGREGATES)
+    return _cap_documents(
+        documents, form_responders, cursor, latest, after_document_id
+    )
+
+
+async def aapply_document_cursor(
+    documents: ResponseDocuments,
+    cursor: ExportCursor,
+    after_dt: _t.Optional[datetime] = None,
+    after_document_id: _t.Optional[int] = None,
+) -> _t.Tuple[ResponseDocuments, ExportCursor]:
+    """The async version of `apply_document_cursor`."""
+    form_responders = _documents_after(documents, after_dt, after_document_id)
+    latest = await form_responders.aaggregate(**_DOCUMENT_CURSOR_AGGREGATES)
+    return _cap_documents(
+        documents, form_responders, cursor, latest, after_document_id
+    )
+
+
+_DOCUMENT_CURSOR_AGGREGATES = {
+    "last_id": Max("id"),
+    "last_dt": Max("created_dt"),
+}
+
+
+def _documents_after(
+    documents: ResponseDocuments,
+    after_dt: _t.Optional[datetime],
+    after_document_id: _t.Optional[int],
+) -> QuerySet[fc_models.FormResponder]:
+    """Limit the documents to those newer than the cursor."""
+    form_responders = documents.form_responders
+    if after_document_id is not None:
+        form_responders = form_responders.filter(id__gt=after_document_id)
+    if after_dt is not None:
+        form_responders = form_responders.filter(created_dt__gt=after_dt)
+    return form_responders
+
+
+def _cap_documents(
+    documents: ResponseDocuments,
+    form_responders: QuerySet[fc_models.FormResponder],
+    cursor: ExportCursor,
+    latest: dict,
+    after_document_id: _t.Optional[int],
+) -> _t.Tuple[ResponseDocuments, ExportCursor]:
+    """Limit the documents to those up to the latest at the time of the
+    export and move the cursor on to it.
+    """
+    if latest["last_id"] is None:
+        return (
+            documents._replace(form_responders=form_responders.none()),
+            cursor._replace(last_document_id=after_document_id),
+        )
+
+    form_responders = form_responders.filter(id__lte=latest["last_id"])
+    last_dt = cursor.last_dt
+    if last_dt is None or latest["last_dt"] > last_dt:
+        last_dt = latest["last_dt"]
+    return (
+        documents._replace(form_responders=form_responders),
+        cursor._replace(last_dt=last_dt, last_document_id=latest["last_id"]),
+    )
+
+
+# The response fields which are read from the answers in a document rather
+# than from the responder.
+_DOCUMENT_ANSWER_FIELDS = ("question_id", "question__question", "answer")
+_RESPONDER_PREFIX = "form_responder__"
+
+
+def _document_values(
+    documents: ResponseDocuments,
+    fields: _t.Sequence[str],
+    named: bool = False,
+) -> QuerySet:
+    """Get the answers of each document, followed by the responder fields
+    matching the response `fields`.
+    """
+    responder_fields = [
+        (
+            "id"
+            if field == "form_responder_id"
+            else field.replace(_RESPONDER_PREFIX, "", 1)
+        )
+        for field in fields
+        if field not in _DOCUMENT_ANSWER_FIELDS
+    ]
+    return documents.form_responders.order_by("id").values_list(
+        "answers", *responder_fields, named=named
+    )
+
+
+def _document_questions(documents: ResponseDocuments) -> QuerySet:
+    """Get the id and text of the questions answered in the documents, in the
+    order their answers are exported.
+    """
+    questions = fc_models.FormQuestion.objects.filter(
+        form_id__in=documents.form_responders.values("form_id")
+    ).order_by("seq_no", "id")
+    if documents.question_ids:
+        questions = questions.filter(id__in=documents.question_ids)
+    return questions.values_list("id", "question")
+
+
+def _document_expander(
+    fields: _t.Sequence[str],
+    questions: _t.Dict[int, str],
+) -> _t.Callable[[tuple], _t.Iterator[tuple]]:
+    """Create a function turning a row from `_document_values` into a row
+    per answer, with the same values as reading the response `fields` from
+    the answers stored as rows. Answers to questions which have since been
+    deleted are skipped.
+    """
+
+    def expand(values: tuple) -> _t.Iterator[tuple]:
+        answers, *responder = values
+        for question_id, question in questions.items():
+            key = str(question_id)
+            if key not in answers:
+                continue
+            answer_values = {
+                "question_id": question_id,
+                "question__question": question,
+                "answer": answers[key],
+            }
+            responder_values = iter(responder)
+            yield tuple(
+                (
+                    answer_values[field]
+                    if field in answer_values
+                    else next(responder_values)
+                )
+                for field in fields
+            )
+
+    return expand
+
+
+def document_rows(
+    documents: ResponseDocuments,
+    fields: _t.Sequence[str],
+    chunk_size: _t.Optional[int] = None,
+) -> _t.Iterator[tuple]:
+    """Yield a row per answer stored in the documents, with the values of
+    the response `fields`, so that they can be exported along with the
+    responses stored as rows. The documents are read in chunks of
+    `chunk_size`.
+    """
+    chunk_size = chunk_size or get_setting("EXPORT_CHUNK_SIZE")
+    expand = _document_expander(fields, dict(_document_questions(documents)))
+    for values in _document_values(documents, fields).iterator(
+        chunk_size=chunk_size
+    ):
+        yield from expand(values)
+
+
+def _question_row(values: tuple) -> tuple:
+    """Format the `QUESTION_COLUMNS` of a question as a CSV row."""
+    (
+        form_title,
+        question,
+        field_type,
+        required,
+        seq_no,
+        choices,
+        related_form_title,
+        related_question,
+    ) = values
+    return (
+        form_title,
+        question,
+        field_type,
+        required and "Yes" or "No",
+        seq_no,
+        choices,
+        # Matches `FormQuestion.__str__` for the related question.
+        (
+            f"{related_form_title} - {related_question}"
+            if related_question is not None
+            else None
+        ),
+    )
+
+
+def question_rows(
+    form_questions: QuerySet[fc_models.FormQuestion],
+    chunk_size: _t.Optional[int] = None,
+) -> _t.Iterator[tuple]:
+    """Yield a CSV row for each question."""
+    chunk_size = chunk_size or get_setting("EXPORT_CHUNK_SIZE")
+    for values in form_questions.values_list(*QUESTION_COLUMNS).iterator(
+        chunk_size=chunk_size
+    ):
+        yield _question_row(values)
+
+
+def _selected(
+    columns: _t.Optional[_t.Iterable[str]],
+    names: _t.Iterable[str],
+) -> _t.List[str]:
+    """Get the names of the selected columns in the export order. All of them
+    are selected if `columns` is not given.
+    """
+    if columns is None:
+        return list(names)
+    return [name for name in names if name in columns]
+
+
+def response_headers(
+    columns: _t.Optional[_t.Iterable[str]] = None,
+) -> _t.List[str]:
+    """Get the headers of the selected columns of the response export."""
+    return [
+        RESPONSE_FIELDS[name][0]
+        for name in _selected(columns, RESPONSE_FIELDS)
+    ]
+
+
+def response_rows(
+    form_responses: QuerySet[fc_models.FormResponse],
+    chunk_size: _t.Optional[int] = None,
+    columns: _t.Optional[_t.Iterable[str]] = None,
+    documents: _t.Optional[ResponseDocuments] = None,
+) -> _t.Iterator[tuple]:
+    """Yield a CSV row for each response. The responses are read as flat
+    tuples using a server-side cursor in chunks of `chunk_size` so that only a
+    chunk is held in memory at any time.
+
+    `columns` limits the export to the named `RESPONSE_FIELDS`. Only those
+    columns are selected, so tables which are not needed are not joined.
+
+    The answers in `documents` are exported after the responses.
+    """
+    chunk_size = chunk_size or get_setting("EXPORT_CHUNK_SIZE")
+    fields = _response_fields(columns)
+    rows = (
+        _export_order(form_responses)
+        .values_list(*fields)
+        .iterator(chunk_size=chunk_size)
+    )
+    if documents is None:
+        return rows
+    return chain(rows, document_rows(documents, fields, chunk_size))
+
+
+def _export_order(
+    form_responses: QuerySet[fc_models.FormResponse],
+) -> QuerySet[fc_models.FormResponse]:
+    """Order the responses by responder and question id, unless they have
+    already been ordered. The default ordering of `FormResponse` sorts on
+    columns of the responder and question, which would join their tables.
+    """
+    if form_responses.query.order_by:
+        return form_responses
+    return form_responses.order_by("form_responder_id", "question_id")
+
+
+def _response_fields(columns: _t.Optional[_t.Iterable[str]]) -> _t.List[str]:
+    """Get the fields the selected columns of the response export are read
+    from.
+    """
+    return [
+        RESPONSE_FIELDS[name][1]
+        for name in _selected(columns, RESPONSE_FIELDS)
+    ]
+
+
+def wide_response_rows(
+    form_responses: QuerySet[fc_models.FormResponse],
+    question_ids: _t.Sequence[int],
+    chunk_size: _t.Optional[int] = None,
+    columns: _t.Optional[_t.Iterable[str]] = None,
+    documents: _t.Optional[ResponseDocuments] = None,
+) -> _t.Iterator[list]:
+    """Yield a CSV row for each person who responded, with a column per
+    question in the order given by `question_ids`.
+
+    The responses are read in a single pass ordered by responder, so only the
+    answers of one responder are held in memory at any time.
+
+    `columns` limits the leading columns to the named `WIDE_RESPONSE_FIELDS`.
+    The responders in `documents` are exported after the others.
+    """
+    chunk_size = chunk_size or get_setting("EXPORT_CHUNK_SIZE")
+    positions = {question_id: i for i, question_id in enumerate(question_ids)}
+    responses = _wide_response_values(form_responses, columns).iterator(
+        chunk_size=chunk_size
+    )
+    if documents is not None:
+        responses = chain(
+            responses,
+            document_rows(
+                documents, _wide_response_fields(columns), chunk_size
+            ),
+        )
+    for _, answers in groupby(responses, key=itemgetter(0)):
+        row = None
+        for values in answers:
+            row = _add_wide_answer(row, values, positions)
+        yield row
+
+
+def _wide_response_values(
+    form_responses: QuerySet[fc_models.FormResponse],
+    columns: _t.Optional[_t.Iterable[str]],
+    named: bool = False,
+) -> QuerySet:
+    """Get the responder id, leading columns, question id and answer of each
+    response, ordered by responder.
+    """
+    return form_responses.order_by("form_responder_id").values_list(
+        *_wide_response_fields(columns), named=named
+    )
+
+
+def _wide_response_fields(
+    columns: _t.Optional[_t.Iterable[str]],
+) -> _t.List[str]:
+    """Get the fields read for each answer in the wide export."""
+    return [
+        "form_responder_id",
+        *(
+            RESPONSE_FIELDS[name][1]
+            for name in _selected(columns, WIDE_RESPONSE_FIELDS)
+        ),
+        "question_id",
+        "answer",
+    ]
+
+
+def _add_wide_answer(
+    row: _t.Optional[list],
+    values: tuple,
+    positions: _t.Dict[int, int],
+) -> list:
+    """Add an answer from `_wide_response_values` to a responder's row,
+    starting the row if it is the responder's first answer.
+    """
+    _, *responder, question_id, answer = values
+    if row is None:
+        row = responder + [None] * len(positions)
+    position = positions.get(question_id)
+    if position is not None:
+        row[len(responder) + position] = answer
+    return row
+
+
+def filter_responses(
+    form_responses: QuerySet[fc_models.FormResponse],
+    start: _t.Optional[datetime] = None,
+    end: _t.Optional[datetime] = None,
+    question_ids: _t.Optional[_t.Iterable[int]] = None,
+    responder_ids: _t.Optional[_t.Iterable[int]] = None,
+) -> QuerySet[fc_models.FormResponse]:
+    """Limit the responses to export. The filters are added to the query so
+    that only the matching rows are read.
+
+    :param form_responses: The responses to export.
+    :type form_responses: QuerySet[FormResponse]
+    :param start: Only include responses submitted on or after this time.
+    :type start: datetime
+    :param end: Only include responses submitted before this time.
+    :type end: datetime
+    :param question_ids: Only include answers to these questions.
+    :type question_ids: Iterable[int]
+    :param responder_ids: Only include answers from these responders.
+    :type responder_ids: Iterable[int]
+    :return: The limited responses.
+    :rtype: QuerySet[FormResponse]
+    """
+    if start is not None:
+        form_responses = form_responses.filter(
+            form_responder__created_dt__gte=start
+        )
+    if end is not None:
+        form_responses = form_responses.filter(
+            form_responder__created_dt__lt=end
+        )
+    if question_ids:
+        form_responses = form_responses.filter(question_id__in=question_ids)
+    if responder_ids:
+        form_responses = form_responses.filter(
+            form_responder_id__in=responder_ids
+        )
+    return _export_order(form_responses)
+
+
+def _form_responses(
+    form: fc_models.Form,
+) -> QuerySet[fc_models.FormResponse]:
+    """Get all of the responses to the form."""
+    return fc_models.FormResponse.objects.filter(form_responder__form=form)
+
+
+def _wide_response_layout(
+    form: fc_models.Form,
+    question_ids: _t.Optional[_t.Iterable[int]] = None,
+    columns: _t.Optional[_t.Iterable[str]] = None,
+) -> _t.Tuple[_t.List[str], _t.List[int]]:
+    """Get the headers of the wide export along with the ids of the questions
+    in the order their columns appear.
+    """
+    headers = _wide_leading_headers(columns)
+    ids = []
+    for question_id, question in _wide_layout_questions(form, question_ids):
+        headers.append(question)
+        ids.append(question_id)
+    return headers, ids
+
+
+async def _awide_response_layout(
+    form: fc_models.Form,
+    question_ids: _t.Optional[_t.Iterable[int]] = None,
+    columns: _t.Optional[_t.Iterable[str]] = None,
+) -> _t.Tuple[_t.List[str], _t.List[int]]:
+    """The async version of `_wide_response_layout`."""
+    headers = _wide_leading_headers(columns)
+    ids = []
+    async for question_id, question in _wide_layout_questions(
+        form, question_ids
+    ):
+        headers.append(question)
+        ids.append(question_id)
+    return headers, ids
+
+
+def _wide_leading_headers(
+    columns: _t.Optional[_t.Iterable[str]],
+) -> _t.List[str]:
+    """Get the headers of the columns which lead each row of the wide
+    export.
+    """
+    return [
+        RESPONSE_FIELDS[name][0]
+        for name in _selected(columns, WIDE_RESPONSE_FIELDS)
+    ]
+
+
+def _wide_layout_questions(
+    form: fc_models.Form,
+    question_ids: _t.Optional[_t.Iterable[int]],
+) -> QuerySet:
+    """Get the id and text of each question in the wide export, in the order
+    their columns appear.
+    """
+    questions = form.questions.order_by("seq_no", "id")
+    if question_ids:
+        questions = questions.filter(id__in=question_ids)
+    return questions.values_list("id", "question")
+
+
+def write_csv(headers: list, rows: _t.Iterable[tuple], output) -> None:
+    """Write the headers followed by each row to `output` as CSV."""
+    writer = csv.writer(output)
+    writer.writerow(headers)
+    for row in rows:
+        writer.writerow(row)
+
+
+def stream_csv(headers: list, rows: _t.Iterable[tuple]) -> _t.Iterator[str]:
+    """Yield the headers followed by the rows as CSV text. The headers are
+    yielded on their own so that the first bytes can be sent immediately,
+    after which rows are yielded in batches of `STREAM_BATCH_SIZE`.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(headers)
+
+    batch = []
+    for row in rows:
+        batch.append(writer.writerow(row))
+        if len(batch) >= STREAM_BATCH_SIZE:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
 
 
 def export_questions(form_questions: QuerySet[fc_models.FormQuestion], output):
     """Export the questions in a form to a CSV file."""
-    writer = csv.writer(output)
-    writer.writerow(
-        [
-            "Form",
-            "Question",
-            "Type",
-            "Required",
-            "Seq. No.",
-            "Choices",
-            "Related Question",
-        ]
-    )
-    for question in form_questions:
-        writer.writerow(
-            [
-                question.form.title,
-                question.question,
-                question.field_type,
-                question.required and "Yes" or "No",
-                question.seq_no,
-                question.choices,
-                question.related_question,
-            ]
-        )
-
-
-def export_responses(form_responses: QuerySet[fc_models.FormResponse], output):
-    """Export the responses in a form to a CSV file."""
-    writer = csv.writer(output)
-    writer.writerow(
-        [
-            "Form",
-            "Username",
-            "Email",
-            "Answered On",
-            "Question",
-            "Answer",
-        ]
-    )
-    for response in form_responses:
-        writer.writerow(
-            [
-                response.form_responder.form,
-                response.form_responder.user.username,
-                response.form_responder.user.email,
-                response.form_responder.created_dt,
-                response.question.question,
-                response.answer,
-            ]
+    write_csv(QUESTION_HEADERS, question_rows(form_questions), output)
+
+
+def export_responses(
+    form_responses: QuerySet[fc_models.FormResponse],
+    output,
+    columns: _t.Optional[_t.Iterable[str]] = None,
+    documents: _t.Optional[ResponseDocuments] = None,
+):
+    """Export the responses in a form to a CSV file.
+
+    `columns` limits the export to the named `RESPONSE_FIELDS`. The answers
+    in `documents` are exported after the responses.
+    """
+    write_csv(
+        response_headers(columns),
+        response_rows(form_responses, columns=columns, documents=documents),
+        output,
+    )
+
+
+def export_wide_responses(
+    form: fc_models.Form,
+    output,
+    form_responses: _t.Optional[QuerySet[fc_models.FormResponse]] = None,
+    question_ids: _t.Optional[_t.Iterable[int]] = None,
+    columns: _t.Optional[_t.Iterable[str]] = None,
+    documents: _t.Optional[ResponseDocuments] = None,
+):
+    """Export the responses to a form to a CSV file with one row per
+    responder and one column per question.
+
+    `form_responses` and `documents` can be given to export a subset of the
+    form's responses, `question_ids` to limit the question columns and
+    `columns` to limit the leading columns to the named
+    `WIDE_RESPONSE_FIELDS`.
+    """
+    form_responses, documents = _wide_sources(form, form_responses, documents)
+    headers, question_ids = _wide_response_layout(form, question_ids, columns)
+    write_csv(
+        headers,
+        wide_response_rows(
+            form_responses,
+            question_ids,
+            columns=columns,
+            documents=documents,
+        ),
+        output,
+    )
+
+
+def _wide_sources(
+    form: fc_models.Form,
+    form_responses: _t.Optional[QuerySet[fc_models.FormResponse]],
+    documents: _t.Optional[ResponseDocuments],
+) -> _t.Tuple[QuerySet[fc_models.FormResponse], ResponseDocuments]:
+    """Default to all of the form's responses and documents when no subset of
+    the responses is given.
+    """
+    if form_responses is None:
+        form_responses = _form_responses(form)
+        if documents is None:
+            documents = form_documents([form.id])
+    return form_responses, documents
+
+
+def stream_questions(
+    form_questions: QuerySet[fc_models.FormQuestion],
+) -> _t.Iterator[str]:
+    """Stream the questions in a form as CSV text."""
+    return stream_csv(QUESTION_HEADERS, question_rows(form_questions))
+
+
+def stream_responses(
+    form_responses: QuerySet[fc_models.FormResponse],
+    columns: _t.Optional[_t.Iterable[str]] = None,
+    documents: _t.Optional[ResponseDocuments] = None,
+) -> _t.Iterator[str]:
+    """Stream the responses in a form as CSV text.
+
+    The arguments are the same as for `export_responses`.
+    """
+    return stream_csv(
+        response_headers(columns),
+        response_rows(form_responses, columns=columns, documents=documents),
+    )
+
+
+def stream_wide_responses(
+    form: fc_models.Form,
+    form_responses: _t.Optional[QuerySet[fc_models.FormResponse]] = None,
+    question_ids: _t.Optional[_t.Iterable[int]] = None,
+    columns: _t.Optional[_t.Iterable[str]] = None,
+    documents: _t.Optional[ResponseDocuments] = None,
+) -> _t.Iterator[str]:
+    """Stream the responses to a form as CSV text with one row per responder
+    and one column per question.
+
+    The arguments are the same as for `export_wide_responses`.
+    """
+    form_responses, documents = _wide_sources(form, form_responses, documents)
+    headers, question_ids = _wide_response_layout(form, question_ids, columns)
+    return stream_csv(
+        headers,
+        wide_response_rows(
+            form_responses,
+            question_ids,
+            columns=columns,
+            documents=documents,
+        ),
+    )
+
+
+# The async versions read rows as named tuples. Django 4.2 runs the query for
+# plain `values_list` tuples as soon as they are iterated over, which
+# `aiterator` does on the event loop. The named rows are fetched lazily.
+
+
+async def aquestion_rows(
+    form_questions: QuerySet[fc_models.FormQuestion],
+    chunk_size: _t.Optional[int] = None,
+) -> _t.AsyncIterator[tuple]:
+    """The async version of `question_rows`."""
+    chunk_size = chunk_size or get_setting("EXPORT_CHUNK_SIZE")
+    async for values in form_questions.values_list(
+        *QUESTION_COLUMNS, named=True
+    ).aiterator(chunk_size=chunk_size):
+        yield _question_row(values)
+
+
+async def adocument_rows(
+    documents: ResponseDocuments,
+    fields: _t.Sequence[str],
+    chunk_size: _t.Optional[int] = None,
+) -> _t.AsyncIterator[tuple]:
+    """The async version of `document_rows`."""
+    chunk_size = chunk_size or get_setting("EXPORT_CHUNK_SIZE")
+    expand = _document_expander(
+        fields,
+        {
+            question_id: question
+            async for question_id, question in _document_questions(documents)
+        },
+    )
+    async for values in _document_values(
+        documents, fields, named=True
+    ).aiterator(chunk_size=chunk_size):
+        for row in expand(values):
+            yield row
+
+
+async def _achain(*iterables: _t.AsyncIterable) -> _t.AsyncIterator:
+    """The async version of `itertools.chain`."""
+    for iterable in iterables:
+        async for item in iterable:
+            yield item
+
+
+def aresponse_rows(
+    form_responses: QuerySet[fc_models.FormResponse],
+    chunk_size: _t.Optional[int] = None,
+    columns: _t.Optional[_t.Iterable[str]] = None,
+    documents: _t.Optional[ResponseDocuments] = None,
+) -> _t.AsyncIterator[tuple]:
+    """The async version of `response_rows`."""
+    chunk_size = chunk_size or get_setting("EXPORT_CHUNK_SIZE")
+    fields = _response_fields(columns)
+    rows = (
+        _export_order(form_responses)
+        .values_list(*fields, named=True)
+        .aiterator(chunk_size=chunk_size)
+    )
+    if documents is None:
+        return rows
+    return _achain(rows, adocument_rows(documents, fields, chunk_size))
+
+
+async def awide_response_rows(
+    form_responses: QuerySet[fc_models.FormResponse],
+    question_ids: _t.Sequence[int],
+    chunk_size: _t.Optional[int] = None,
+    columns: _t.Optional[_t.Iterable[str]] = None,
+    documents: _t.Optional[ResponseDocuments] = None,
+) -> _t.AsyncIterator[list]:
+    """The async version of `wide_response_rows`."""
+    chunk_size = chunk_size or get_setting("EXPORT_CHUNK_SIZE")
+    positions = {question_id: i for i, question_id in enumerate(question_ids)}
+    responses = _wide_response_values(
+        form_responses, columns, named=True
+    ).aiterator(chunk_size=chunk_size)
+    if documents is not None:
+        responses = _achain(
+            responses,
+            adocument_rows(
+                documents, _wide_response_fields(columns), chunk_size
+            ),
         )
+
+    row = responder_id = None
+    async for values in responses:
+        if values[0] != responder_id:
+            if row is not None:
+                yield row
+            responder_id, row = values[0], None
+        row = _add_wide_answer(row, values, positions)
+    if row is not None:
+        yield row
+
+
+async def astream_csv(
+    headers: list,
+    rows: _t.AsyncIterable[tuple],
+) -> _t.AsyncIterator[str]:
+    """The async version of `stream_csv`."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(headers)
+
+    batch = []
+    async for row in rows:
+        batch.append(writer.writerow(row))
+        if len(batch) >= STREAM_BATCH_SIZE:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def astream_questions(
+    form_questions: QuerySet[fc_models.FormQuestion],
+) -> _t.AsyncIterator[str]:
+    """The async version of `stream_questions`."""
+    return astream_csv(QUESTION_HEADERS, aquestion_rows(form_questions))
+
+
+def astream_responses(
+    form_responses: QuerySet[fc_models.FormResponse],
+    columns: _t.Optional[_t.Iterable[str]] = None,
+    documents: _t.Optional[ResponseDocuments] = None,
+) -> _t.AsyncIterator[str]:
+    """The async version of `stream_responses`."""
+    return astream_csv(
+        response_headers(columns),
+        aresponse_rows(form_responses, columns=columns, documents=documents),
+    )
+
+
+async def astream_wide_responses(
+    form: fc_models.Form,
+    form_responses: _t.Optional[QuerySet[fc_models.FormResponse]] = None,
+    question_ids: _t.Optional[_t.Iterable[int]] = None,
+    columns: _t.Optional[_t.Iterable[str]] = None,
+    documents: _t.Optional[ResponseDocuments] = None,
+) -> _t.AsyncIterator[str]:
+    """The async version of `stream_wide_responses`."""
+    form_responses, documents = _wide_sources(form, form_responses, documents)
+    headers, question_ids = await _awide_response_layout(
+        form, question_ids, columns
+    )
+    async for chunk in astream_csv(
+        headers,
+        awide_response_rows(
+            form_responses,
+            question_ids,
+            columns=columns,
+            documents=documents,
+        ),
+    ):
+        yield chunk
+
+
+class _ZipStream:
+    """A write-only file which holds on to what is written until it is
+    popped. As it cannot seek, `zipfile` writes each member's sizes after its
+    data, allowing the archive to be streamed as it is built.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data: bytes) -> int:
+        """Hold on to the data until it is popped."""
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        """There is nothing to flush."""
+
+    def pop(self) -> bytes:
+        """Get and forget everything written since the last pop."""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(
+    members: _t.Iterable[_t.Tuple[str, _t.Iterable[str]]],
+) -> _t.Iterator[bytes]:
+    """Stream a ZIP archive, writing each member as its content is produced.
+
+    :param members: Pairs of the name of each file in the archive and its
+        text content.
+    :type members: Iterable[Tuple[str, Iterable[str]]]
+    :return: The archive.
+    :rtype: Iterator[bytes]
+    """
+    stream = _ZipStream()
+    with zipfile.ZipFile(
+        stream, mode="w", compression=zipfile.ZIP_DEFLATED
+    ) as archive:
+        for name, content in members:
+            # The size is unknown up front, so allow for large members.
+            with archive.open(name, mode="w", force_zip64=True) as member:
+                for chunk in content:
+                    member.write(chunk.encode("utf-8"))
+                    data = stream.pop()
+                    if data:
+                        yield data
+            yield stream.pop()
+    yield stream.pop()
+
+
+def stream_form_archive(
+    forms: QuerySet[fc_models.Form],
+) -> _t.Iterator[bytes]:
+    """Stream a ZIP archive containing a questions CSV and a responses CSV
+    for each form, each in a directory named after the form.
+    """
+
+    def members():
+        for form_id, slug in forms.order_by("id").values_list("id", "slug"):
+            directory = f"{form_id}-{slug}"
+            yield f"{directory}/questions.csv", stream_questions(
+                fc_models.FormQuestion.objects.filter(form_id=form_id)
+            )
+            yield f"{directory}/responses.csv", stream_responses(
+                fc_models.FormResponse.objects.filter(
+                    form_responder__form_id=form_id
+                ),
+                documents=form_documents([form_id]),
+            )
+
+    return stream_zip(members())
+
+
+def streaming_csv_response(
+    content: _t.Union[_t.Iterable[str], _t.AsyncIterable[str]],
+    filename: str,
+    compression: _t.Optional[str] = None,
+    content_encoding: bool = False,
+) -> StreamingHttpResponse:
+    """Create a response which streams `content` as a CSV attachment.
+
+    :param content: An iterable of CSV text, typically from one of the
+        `stream_*` functions, or an async iterable from one of the
+        `astream_*` functions.
+    :type content: Iterable[str] or AsyncIterable[str]
+    :param filename: The name of the file to download as.
+    :type filename: str
+    :param compression: A method from `compression.available_methods()` to
+        compress the content with as it is streamed.
+    :type compression: str
+    :param content_encoding: If True, the compression is declared in the
+        `Content-Encoding` header so that the client decompresses the CSV
+        transparently. Otherwise, a compressed file is downloaded.
+    :type content_encoding: bool
+    :return: The streaming response.
+    :rtype: StreamingHttpResponse
+    """
+    content_type = "text/csv"
+    if compression:
+        if hasattr(content, "__aiter__"):
+            content = fc_compression.acompress_stream(content, compression)
+        else:
+            content = fc_compression.compress_stream(content, compression)
+        if not content_encoding:
+            content_type = fc_compression.CONTENT_TYPES[compression]
+            filename += fc_compression.EXTENSIONS[compression]
+
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response["Content-Disposition"] = f"attachment; filename={filename}"
+    if compression and content_encoding:
+        response["Content-Encoding"] = compression
+        patch_vary_headers(response, ["Accept-Encoding"])
+    return response
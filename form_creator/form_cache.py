@@ -0,0 +1,317 @@
+"""This module contains a read-through cache of forms, used when a view looks
+up the form its URL is for. Enable it with the `FORM_CREATOR_FORM_CACHE`
+setting.
+
+Each form is kept along with the ids of its editors, so the permissions of
+its owner and editors are checked without any queries. Forms are kept in
+Django's cache, shared by every process, and for a few seconds in a
+process-local LRU in front of it. When a form is not cached, only one thread
+in each process and, as far as the cache backend allows, one process fetches
+it from the database while the others wait for the result.
+
+Signals discard the cached form when it, its questions or its editors
+change. Other processes may carry on using the form from their LRU for up to
+`FORM_CREATOR_FORM_CACHE_LOCAL_TIMEOUT` seconds.
+
+Each form is stored in Django's cache along with the generation of the form
+it was fetched at, which is replaced whenever the form is discarded. A form
+fetched before it was discarded but stored afterwards has the old
+generation, so it is never read.
+"""
+
+import asyncio
+import copy
+import threading
+import time
+import typing as _t
+import uuid
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from . import models as fc_models
+from .conf import get_setting
+from .lru import LRU
+
+User = get_user_model()
+
+# The number of seconds another process is given to fetch a form before it
+# is fetched regardless.
+_FILL_TIMEOUT = 5
+
+# The number of seconds between checks of whether another process has
+# fetched a form.
+_FILL_POLL_INTERVAL = 0.05
+
+
+class CachedForm(_t.NamedTuple):
+    """A cached form and the ids of its editors."""
+
+    form: fc_models.Form
+    editor_ids: _t.FrozenSet[int]
+
+    def for_user(self, user: _t.Optional[User]) -> fc_models.Form:
+        """Get a copy of the form annotated with the user's permissions, as
+        by `FormsQueryset.with_permissions_for`, apart from whether the user
+        has responded.
+
+        :param user: The user.
+        :type user: User
+        :return: The form.
+        :rtype: Form
+        """
+        user_id = user.pk if user and user.is_authenticated else None
+        form = copy.copy(self.form)
+        form.permissions_user_id = user_id
+        form.is_owner = form.owner_id == user_id
+        form.is_editor = user_id in self.editor_ids
+        return form
+
+
+# Forms kept by this process, along with the time at which they expire.
+_forms = LRU("FORM_CACHE_SIZE")
+
+# The locks held while a form is fetched. Forms share a lock when their ids
+# have the same remainder, so the number of locks is fixed.
+_fill_locks = tuple(threading.Lock() for _ in range(64))
+
+# Counts the forms discarded by this process. A form fetched while another
+# was discarded is not kept by the process, in case it was the same form.
+_invalidated = 0
+_invalidations_lock = threading.Lock()
+
+
+def _cache_key(form_id: int) -> str:
+    """Get the key the form is stored under in Django's cache."""
+    return f"form_creator:form:{form_id}"
+
+
+def _generation_key(form_id: int) -> str:
+    """Get the key the generation of the form is stored under."""
+    return f"{_cache_key(form_id)}:generation"
+
+
+def _lock_key(form_id: int) -> str:
+    """Get the key held while a process fetches the form."""
+    return f"{_cache_key(form_id)}:lock"
+
+
+def _local(form_id: int) -> _t.Optional[CachedForm]:
+    """Get the form kept by this process, if it has not expired."""
+    entry = _forms.get(form_id)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+
+def _keep(form_id: int, cached: CachedForm, invalidated: int) -> None:
+    """Keep a form in this process, unless a form has been discarded since
+    the `invalidated` count was read.
+    """
+    expires = time.monotonic() + get_setting("FORM_CACHE_LOCAL_TIMEOUT")
+    with _invalidations_lock:
+        if invalidated == _invalidated:
+            _forms.set(form_id, (expires, cached))
+
+
+def _fill_lock(form_id: int) -> threading.Lock:
+    """Get the lock held by the thread fetching a form."""
+    return _fill_locks[form_id % len(_fill_locks)]
+
+
+def _current(form_id: int, values: dict) -> _t.Optional[CachedForm]:
+    """Get the form from the values read from Django's cache, if it was
+    stored at the current generation.
+    """
+    entry = values.get(_cache_key(form_id))
+    generation = values.get(_generation_key(form_id))
+    if entry is None or generation is None or entry[0] != generation:
+        return None
+    return entry[1]
+
+
+def _shared(form_id: int) -> _t.Optional[CachedForm]:
+    """Get the form from Django's cache."""
+    return _current(
+        form_id,
+        cache.get_many([_cache_key(form_id), _generation_key(form_id)]),
+    )
+
+
+async def _ashared(form_id: int) -> _t.Optional[CachedForm]:
+    """The async version of `_shared`."""
+    return _current(
+        form_id,
+        await cache.aget_many([_cache_key(form_id), _generation_key(form_id)]),
+    )
+
+
+def _generation(form_id: int) -> str:
+    """Get the generation of the form, starting one if there is none."""
+    cache.add(_generation_key(form_id), uuid.uuid4().hex, None)
+    return cache.get(_generation_key(form_id))
+
+
+async def _ageneration(form_id: int) -> str:
+    """The async version of `_generation`."""
+    await cache.aadd(_generation_key(form_id), uuid.uuid4().hex, None)
+    return await cache.aget(_generation_key(form_id))
+
+
+def _fetch(form_id: int) -> _t.Optional[CachedForm]:
+    """Fetch a form and the ids of its editors from the database."""
+    form = fc_models.Form.objects.filter(pk=form_id).first()
+    if form is None:
+        return None
+    return CachedForm(
+        form, frozenset(form.editors.values_list("pk", flat=True))
+    )
+
+
+async def _afetch(form_id: int) -> _t.Optional[CachedForm]:
+    """The async version of `_fetch`."""
+    form = await fc_models.Form.objects.filter(pk=form_id).afirst()
+    if form is None:
+        return None
+    return CachedForm(
+        form,
+        frozenset(
+            [pk async for pk in form.editors.values_list("pk", flat=True)]
+        ),
+    )
+
+
+def _fill(form_id: int) -> _t.Optional[CachedForm]:
+    """Fetch a form which is not in Django's cache and store it there. The
+    caller holds the lock on fetching it, which is released once done,
+    whether the form was stored or not.
+    """
+    try:
+        # The generation is read first, so that the form is stored at the
+        # generation it was discarded from if it changes while fetched.
+        generation = _generation(form_id)
+        cached = _fetch(form_id)
+        if cached is not None:
+            cache.set(
+                _cache_key(form_id),
+                (generation, cached),
+                get_setting("FORM_CACHE_TIMEOUT"),
+            )
+        return cached
+    finally:
+        cache.delete(_lock_key(form_id))
+
+
+async def _afill(form_id: int) -> _t.Optional[CachedForm]:
+    """The async version of `_fill`."""
+    try:
+        generation = await _ageneration(form_id)
+        cached = await _afetch(form_id)
+        if cached is not None:
+            await cache.aset(
+                _cache_key(form_id),
+                (generation, cached),
+                get_setting("FORM_CACHE_TIMEOUT"),
+            )
+        return cached
+    finally:
+        await cache.adelete(_lock_key(form_id))
+
+
+def _wait(form_id: int) -> _t.Optional[CachedForm]:
+    """Wait for another process to fetch a form, and read it from Django's
+    cache. The form is fetched regardless once the other process releases
+    its lock without storing it, as when there is no such form or it was
+    discarded while fetched, or once the process has taken too long.
+    """
+    deadline = time.monotonic() + _FILL_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(_FILL_POLL_INTERVAL)
+        # The lock is checked first, so a form stored just before it was
+        # released is still read.
+        done = cache.get(_lock_key(form_id)) is None
+        cached = _shared(form_id)
+        if cached is not None or done:
+            break
+    else:
+        cached = None
+    return cached if cached is not None else _fetch(form_id)
+
+
+async def _await(form_id: int) -> _t.Optional[CachedForm]:
+    """The async version of `_wait`."""
+    deadline = time.monotonic() + _FILL_TIMEOUT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(_FILL_POLL_INTERVAL)
+        done = await cache.aget(_lock_key(form_id)) is None
+        cached = await _ashared(form_id)
+        if cached is not None or done:
+            break
+    else:
+        cached = None
+    return cached if cached is not None else await _afetch(form_id)
+
+
+def get_cached_form(form_id: int) -> _t.Optional[CachedForm]:
+    """Get a form and the ids of its editors, fetching them only if they
+    are not cached.
+
+    :param form_id: The id of the form.
+    :type form_id: int
+    :return: The cached form, or None if there is no such form.
+    :rtype: CachedForm
+    """
+    form_id = int(form_id)
+    cached = _local(form_id)
+    if cached is not None:
+        return cached
+
+    # The lock is only held while this process fetches the form, so that
+    # waiting for another process does not hold up the forms sharing it.
+    with _fill_lock(form_id):
+        # Another thread may have fetched the form while this one waited.
+        cached = _local(form_id)
+        if cached is not None:
+            return cached
+        invalidated = _invalidated
+        cached = _shared(form_id)
+        filling = cached is None and cache.add(
+            _lock_key(form_id), True, _FILL_TIMEOUT
+        )
+        if filling:
+            cached = _fill(form_id)
+    if cached is None and not filling:
+        cached = _wait(form_id)
+    if cached is not None:
+        _keep(form_id, cached, invalidated)
+    return cached
+
+
+async def aget_cached_form(form_id: int) -> _t.Optional[CachedForm]:
+    """The async version of `get_cached_form`. Forms requested at once by
+    several tasks may each be fetched, but waiting for another process does
+    not hold up the thread.
+    """
+    form_id = int(form_id)
+    cached = _local(form_id)
+    if cached is not None:
+        return cached
+
+    invalidated = _invalidated
+    cached = await _ashared(form_id)
+    if cached is None:
+        if await cache.aadd(_lock_key(form_id), True, _FILL_TIMEOUT):
+            cached = await _afill(form_id)
+        else:
+            cached = await _await(form_id)
+    if cached is not None:
+        _keep(form_id, cached, invalidated)
+    return cached
+
+
+def invalidate(form_id: int) -> None:
+    """Discard the cached form."""
+    global _invalidated
+    with _invalidations_lock:
+        _invalidated += 1
+        _forms.delete(form_id)
+    cache.set(_generation_key(form_id), uuid.uuid4().hex, None)
+    cache.delete(_cache_key(form_id))
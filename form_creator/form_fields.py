@@ -27,3 +27,34 @@ class TimeField(forms.TimeField):
     def __init__(self, *args, **kwargs):
         kwargs["widget"] = forms.TimeInput(attrs={"type": "time"})
         super().__init__(*args, **kwargs)
+
+
+class IntegerListField(forms.Field):
+    """A list of integers, given as repeated values and/or separated by
+    commas.
+    """
+
+    widget = forms.MultipleHiddenInput
+    default_error_messages = {
+        "invalid": "Enter a list of whole numbers.",
+    }
+
+    def to_python(self, value) -> list:
+        """Split the values into a list of integers."""
+        if not value:
+            return []
+        if isinstance(value, str):
+            value = [value]
+        numbers = []
+        for item in value:
+            for part in str(item).split(","):
+                part = part.strip()
+                if not part:
+                    continue
+                try:
+                    numbers.append(int(part))
+                except ValueError:
+                    raise forms.ValidationError(
+                        self.error_messages["invalid"], code="invalid"
+                    )
+        return numbers
@@ -1,11 +1,22 @@
+import contextlib
+import typing as _t
 from django import forms
+from django.http import HttpRequest, HttpResponse
 from django.utils import timezone
 from django.db import transaction
 from django.db.models import QuerySet
 from django.contrib.auth import get_user_model
 
-from . import models as fc_models
-from .question_form_fields import field_type_map, is_choice_field
+from . import (
+    models as fc_models,
+    exporters as fc_exporters,
+    stats as fc_stats,
+    typed_answers,
+)
+from .compression import accepted_method, available_methods
+from .conf import STORAGE_DOCUMENT, get_setting
+from .form_fields import IntegerListField
+from .schema import FormSchema, get_schema
 
 User = get_user_model()
 
@@ -110,45 +121,268 @@ class FormQuestionForm(forms.ModelForm):
 
 
 class CaptureResponseForm(forms.Form):
-    """Form for capturing a form response."""
+    """Form for capturing a form response. The fields are built from the
+    form's compiled schema, which is looked up unless `schema` is given.
+    """
 
-    def __init__(self, form: fc_models.Form, *args, **kwargs):
+    def __init__(
+        self,
+        form: fc_models.Form,
+        *args,
+        schema: _t.Optional[FormSchema] = None,
+        **kwargs,
+    ):
         self.form = form
+        self.schema = schema or get_schema(form)
+        self.question_ids = {}
         super().__init__(*args, **kwargs)
         self._setup_fields()
 
     def _setup_fields(self) -> None:
         """Set up the fields for the form response."""
-        for question in self.form.questions.all():
-            self._add_field(question)
-
-    def _add_field(self, question: fc_models.FormQuestion) -> None:
-        """Add a field for the question."""
-        field_type = field_type_map[question.field_type]
-        field_name = f"question_{question.id}"
-        field_kwargs = {
-            "label": question.question,
-            "required": question.required,
-            "help_text": question.description,
-        }
-        if is_choice_field(field_type):
-            choices = question.choices.split("|")
-            field_kwargs["choices"] = [(c, c) for c in choices]
-        self.fields[field_name] = field_type(**field_kwargs)
+        for spec in self.schema.fields:
+            self.fields[spec.name] = spec.build()
+            self.question_ids[spec.name] = spec.question_id
 
     def save(self, user: User, *args, **kwargs) -> fc_models.FormResponder:
-        """Save the form response."""
-        with transaction.atomic():
-            form_responder = fc_models.FormResponder.objects.create(
-                form=self.form,
-                user=user,
-            )
-            form_responder.save()
-            for question, answer in self.cleaned_data.items():
-                fc_models.FormResponse.objects.create(
-                    form_responder=form_responder,
-                    question_id=question.lstrip("question_"),
-                    answer=answer,
+        """Save the form response. The answers, and then any choices
+        selected, are inserted in a single statement each, so the number of
+        queries does not grow with the number of questions.
+
+        When `FORM_CREATOR_RESPONSE_STORAGE` is `"document"`, the answers are
+        saved on the responder in a single insert instead.
+
+        When `FORM_CREATOR_ANSWER_STATS` is enabled, the answers are added to
+        the statistics of each question in the same transaction.
+        """
+        answers = self.get_answers()
+        field_types = {
+            spec.question_id: spec.field_type for spec in self.schema.fields
+        }
+        document = get_setting("RESPONSE_STORAGE") == STORAGE_DOCUMENT
+        record_stats = get_setting("ANSWER_STATS")
+        # A document on its own is saved in a single statement.
+        with (
+            transaction.atomic()
+            if record_stats or not document
+            else contextlib.nullcontext()
+        ):
+            if document:
+                form_responder = fc_models.FormResponder.objects.create(
+                    form=self.form,
+                    user=user,
+                    answers={
+                        str(question_id): typed_answers.to_text(answer)
+                        for question_id, answer in answers.items()
+                    },
+                )
+            else:
+                form_responder = fc_models.FormResponder.objects.create(
+                    form=self.form,
+                    user=user,
+                )
+                typed_answers.create_responses(
+                    [
+                        typed_answers.build_response(
+                            form_responder,
+                            question_id,
+                            field_types[question_id],
+                            answer,
+                        )
+                        for question_id, answer in answers.items()
+                    ],
+                    field_types,
+                    self.schema.option_ids(),
+                )
+
+            if record_stats:
+                fc_stats.record(
+                    (question_id, field_types[question_id], answer)
+                    for question_id, answer in answers.items()
                 )
 
         return form_responder
+
+    def get_answers(self) -> _t.Dict[int, _t.Any]:
+        """Get the cleaned answers, keyed by question id."""
+        return {
+            self.question_ids[field_name]: answer
+            for field_name, answer in self.cleaned_data.items()
+        }
+
+
+class DownloadOptionsForm(forms.Form):
+    """Options for downloading an export, read from the query string."""
+
+    compression = forms.ChoiceField(
+        required=False,
+        help_text="Download a compressed file.",
+    )
+
+    def __init__(self, *args, **kwargs):
+        """Offer the compression methods which can be used now, rather than
+        those which could be used when the module was imported.
+        """
+        super().__init__(*args, **kwargs)
+        self.fields["compression"].choices = [
+            (method, method) for method in available_methods()
+        ]
+
+    def get_compression(
+        self,
+        request: _t.Optional[HttpRequest],
+    ) -> _t.Tuple[_t.Optional[str], bool]:
+        """Get the compression method to stream the export with.
+
+        A method requested in the query string is used to download a
+        compressed file. Otherwise, the content is compressed using the
+        client's preferred method from the `Accept-Encoding` header, if any.
+
+        :param request: The request for the export.
+        :type request: HttpRequest
+        :return: The compression method, and whether it should be declared
+            as the `Content-Encoding`.
+        :rtype: Tuple[str or None, bool]
+        """
+        requested = self.is_bound and self.cleaned_data.get("compression")
+        if requested:
+            return requested, False
+        if request is None:
+            return None, False
+        method = accepted_method(request.headers.get("Accept-Encoding", ""))
+        return method, method is not None
+
+
+class ExportOptionsForm(DownloadOptionsForm):
+    """Options for exporting the responses to a form, read from the query
+    string.
+    """
+
+    CURSOR_ID_HEADER = "X-Export-Cursor-Id"
+    CURSOR_DT_HEADER = "X-Export-Cursor-Dt"
+    CURSOR_DOCUMENT_ID_HEADER = "X-Export-Cursor-Document-Id"
+
+    LAYOUT_LONG = "long"
+    LAYOUT_WIDE = "wide"
+
+    layout = forms.ChoiceField(
+        choices=[
+            (LAYOUT_LONG, "One row per answer"),
+            (LAYOUT_WIDE, "One row per responder"),
+        ],
+        required=False,
+    )
+    after_id = forms.IntegerField(
+        required=False,
+        min_value=0,
+        help_text="Only export responses with a greater id.",
+    )
+    after_document_id = forms.IntegerField(
+        required=False,
+        min_value=0,
+        help_text="Only export answers stored as documents by responders "
+        "with a greater id.",
+    )
+    after = forms.DateTimeField(
+        required=False,
+        help_text="Only export responses submitted after this time.",
+    )
+    start = forms.DateTimeField(
+        required=False,
+        help_text="Only export responses submitted on or after this time.",
+    )
+    end = forms.DateTimeField(
+        required=False,
+        help_text="Only export responses submitted before this time.",
+    )
+    questions = IntegerListField(
+        required=False,
+        help_text="Only export answers to the questions with these ids.",
+    )
+    responders = IntegerListField(
+        required=False,
+        help_text="Only export answers from the responders with these ids.",
+    )
+    columns = forms.MultipleChoiceField(
+        choices=[
+            (name, header)
+            for name, (header, _) in fc_exporters.RESPONSE_FIELDS.items()
+        ],
+        required=False,
+        help_text="The columns to export. Defaults to all of them.",
+    )
+
+    def clean_layout(self) -> str:
+        """Default to the long layout."""
+        return self.cleaned_data["layout"] or self.LAYOUT_LONG
+
+    def clean_columns(self) -> _t.Optional[_t.List[str]]:
+        """Default to all columns."""
+        return self.cleaned_data["columns"] or None
+
+    def clean(self) -> dict:
+        """Ensure the date window is the right way round."""
+        cleaned_data = super().clean()
+        start, end = cleaned_data.get("start"), cleaned_data.get("end")
+        if start and end and start >= end:
+            raise forms.ValidationError("The start must be before the end.")
+        return cleaned_data
+
+    def filter_responses(
+        self,
+        form_responses: QuerySet[fc_models.FormResponse],
+    ) -> QuerySet[fc_models.FormResponse]:
+        """Apply the date window, question and responder filters."""
+        return fc_exporters.filter_responses(
+            form_responses,
+            start=self.cleaned_data["start"],
+            end=self.cleaned_data["end"],
+            question_ids=self.cleaned_data["questions"],
+            responder_ids=self.cleaned_data["responders"],
+        )
+
+    def filter_documents(
+        self,
+        documents: "fc_exporters.ResponseDocuments",
+    ) -> "fc_exporters.ResponseDocuments":
+        """Apply the date window, question and responder filters to answers
+        stored as documents.
+        """
+        return fc_exporters.filter_documents(
+            documents,
+            start=self.cleaned_data["start"],
+            end=self.cleaned_data["end"],
+            question_ids=self.cleaned_data["questions"],
+            responder_ids=self.cleaned_data["responders"],
+        )
+
+    @property
+    def is_narrowed(self) -> bool:
+        """Indicate if only some of the responses or columns are requested."""
+        return any(
+            self.cleaned_data[name]
+            for name in ("start", "end", "questions", "responders", "columns")
+        )
+
+    @property
+    def is_incremental(self) -> bool:
+        """Indicate if only responses newer than a cursor are requested."""
+        return any(
+            self.cleaned_data[name] is not None
+            for name in ("after_id", "after_document_id", "after")
+        )
+
+    def set_cursor_headers(
+        self,
+        response: HttpResponse,
+        cursor: "fc_exporters.ExportCursor",
+    ) -> None:
+        """Return the cursor of an incremental export in the headers of the
+        response, to be passed back in the next export.
+        """
+        if cursor.last_id is not None:
+            response[self.CURSOR_ID_HEADER] = cursor.last_id
+        if cursor.last_document_id is not None:
+            response[self.CURSOR_DOCUMENT_ID_HEADER] = cursor.last_document_id
+        if cursor.last_dt is not None:
+            response[self.CURSOR_DT_HEADER] = cursor.last_dt.isoformat()
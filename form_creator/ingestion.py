@@ -0,0 +1,189 @@
+"""This module contains methods to buffer submissions to forms. When
+`FORM_CREATOR_BUFFER_SUBMISSIONS` is enabled, a validated submission is
+written to a staging table in a single insert and the user is answered right
+away. The `flush_submissions` management command then moves the staged
+submissions to the responder and response tables in large batches.
+"""
+
+import typing as _t
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from . import models as fc_models, stats as fc_stats, typed_answers
+from .conf import STORAGE_DOCUMENT, get_setting
+
+User = get_user_model()
+
+
+def enqueue(
+    form: fc_models.Form,
+    user: User,
+    answers: _t.Dict[int, _t.Any],
+) -> bool:
+    """Stage a submission to be written by the next flush.
+
+    :param form: The form being responded to.
+    :type form: Form
+    :param user: The user responding.
+    :type user: User
+    :param answers: The cleaned answers, keyed by question id.
+    :type answers: Dict[int, Any]
+    :return: False if the user already has a submission waiting for the
+        form.
+    :rtype: bool
+    """
+    try:
+        with transaction.atomic():
+            fc_models.PendingSubmission.objects.create(
+                form=form,
+                user=user,
+                answers={
+                    str(question_id): typed_answers.to_text(answer)
+                    for question_id, answer in answers.items()
+                },
+            )
+    except IntegrityError:
+        return False
+    return True
+
+
+async def aenqueue(
+    form: fc_models.Form,
+    user: User,
+    answers: _t.Dict[int, _t.Any],
+) -> bool:
+    """The async version of `enqueue`."""
+    try:
+        await fc_models.PendingSubmission.objects.acreate(
+            form=form,
+            user=user,
+            answers={
+                str(question_id): typed_answers.to_text(answer)
+                for question_id, answer in answers.items()
+            },
+        )
+    except IntegrityError:
+        return False
+    return True
+
+
+def _write_rows(
+    submissions: _t.List[fc_models.PendingSubmission],
+    field_types: _t.Dict[int, str],
+) -> None:
+    """Write the responders of the submissions, followed by a response per
+    answer.
+    """
+    form_responders = fc_models.FormResponder.objects.bulk_create(
+        fc_models.FormResponder(form_id=s.form_id, user_id=s.user_id)
+        for s in submissions
+    )
+    if form_responders and form_responders[0].pk is None:
+        # The database cannot return the ids of the inserted rows.
+        ids = {
+            (form_id, user_id): id_
+            for id_, form_id, user_id in (
+                fc_models.FormResponder.objects.filter(
+                    form_id__in={s.form_id for s in submissions},
+                    user_id__in={s.user_id for s in submissions},
+                ).values_list("id", "form_id", "user_id")
+            )
+        }
+        for form_responder in form_responders:
+            form_responder.pk = ids[
+                (form_responder.form_id, form_responder.user_id)
+            ]
+
+    typed_answers.create_responses(
+        [
+            typed_answers.build_response(
+                form_responder,
+                int(question_id),
+                field_types[int(question_id)],
+                answer,
+            )
+            for submission, form_responder in zip(submissions, form_responders)
+            for question_id, answer in submission.answers.items()
+            # Questions deleted since the submission are skipped.
+            if int(question_id) in field_types
+        ],
+        field_types,
+    )
+
+
+def _flush_batch(batch_size: int) -> int:
+    """Write a batch of staged submissions in a single transaction.
+
+    Submissions from users who have already responded to the form are
+    discarded, so that each user still responds to a form at most once. The
+    responders are given the time they are written, which keeps incremental
+    exports from missing them.
+
+    :return: The number of submissions taken from the staging table.
+    :rtype: int
+    """
+    with transaction.atomic():
+        submissions = list(
+            fc_models.PendingSubmission.objects.select_for_update(
+                skip_locked=True
+            )[:batch_size]
+        )
+        if not submissions:
+            return 0
+
+        responded = set(
+            fc_models.FormResponder.objects.filter(
+                form_id__in={s.form_id for s in submissions},
+                user_id__in={s.user_id for s in submissions},
+            )
+            .order_by()
+            .values_list("form_id", "user_id")
+        )
+        submissions_to_write = [
+            s for s in submissions if (s.form_id, s.user_id) not in responded
+        ]
+
+        field_types = dict(
+            fc_models.FormQuestion.objects.filter(
+                form_id__in={s.form_id for s in submissions_to_write}
+            )
+            .order_by()
+            .values_list("id", "field_type")
+        )
+        if get_setting("RESPONSE_STORAGE") == STORAGE_DOCUMENT:
+            fc_models.FormResponder.objects.bulk_create(
+                fc_models.FormResponder(
+                    form_id=s.form_id, user_id=s.user_id, answers=s.answers
+                )
+                for s in submissions_to_write
+            )
+        else:
+            _write_rows(submissions_to_write, field_types)
+        if get_setting("ANSWER_STATS"):
+            fc_stats.record(
+                (int(question_id), field_types[int(question_id)], answer)
+                for s in submissions_to_write
+                for question_id, answer in s.answers.items()
+                if int(question_id) in field_types
+            )
+        fc_models.PendingSubmission.objects.filter(
+            id__in=[s.id for s in submissions]
+        ).delete()
+    return len(submissions)
+
+
+def flush(batch_size: _t.Optional[int] = None) -> int:
+    """Write all staged submissions to the responder and response tables.
+
+    :param batch_size: The number of submissions to write per transaction.
+        Defaults to the `FORM_CREATOR_SUBMISSION_BATCH_SIZE` setting.
+    :type batch_size: int
+    :return: The number of submissions taken from the staging table.
+    :rtype: int
+    """
+    batch_size = batch_size or get_setting("SUBMISSION_BATCH_SIZE")
+    total = 0
+    while True:
+        count = _flush_batch(batch_size)
+        total += count
+        if count < batch_size:
+            return total
@@ -0,0 +1,208 @@
+"""This module contains methods to run export jobs in the background, outside
+of the request/response cycle. Jobs are stored in the database and results
+are written to the default file storage, so no message broker is needed.
+"""
+
+import functools
+import logging
+import os
+import tempfile
+import typing as _t
+from datetime import timedelta
+from django.core.files import File
+from django.db.models import QuerySet
+from django.utils import timezone
+from . import (
+    models as fc_models,
+    exporters as fc_exporters,
+    parallel as fc_parallel,
+)
+from .conf import get_setting
+
+logger = logging.getLogger(__name__)
+
+
+def create_export_job(
+    user: fc_models.User,
+    kind: str,
+    forms: QuerySet[fc_models.Form],
+) -> fc_models.ExportJob:
+    """Queue a job to export the given forms.
+
+    :param user: The user requesting the export.
+    :type user: User
+    :param kind: What to export, one of `ExportJob.KindChoices`.
+    :type kind: str
+    :param forms: The forms to export.
+    :type forms: QuerySet[Form]
+    :return: The queued job.
+    :rtype: ExportJob
+    """
+    job = fc_models.ExportJob.objects.create(requested_by=user, kind=kind)
+    job.forms.set(forms)
+    return job
+
+
+def claim_next_job() -> _t.Optional[fc_models.ExportJob]:
+    """Claim the oldest pending job by marking it as running.
+
+    The status is only changed if the job is still pending, so several
+    workers can poll the same table without running a job twice.
+    """
+    pending = fc_models.ExportJob.StatusChoices.PENDING
+    running = fc_models.ExportJob.StatusChoices.RUNNING
+    while True:
+        job = (
+            fc_models.ExportJob.objects.filter(status=pending)
+            .order_by("created_dt", "id")
+            .first()
+        )
+        if job is None:
+            return None
+
+        now = timezone.now()
+        claimed = fc_models.ExportJob.objects.filter(
+            pk=job.pk,
+            status=pending,
+        ).update(status=running, started_dt=now)
+        if claimed:
+            job.status = running
+            job.started_dt = now
+            return job
+
+
+def requeue_stale_jobs() -> int:
+    """Mark jobs which have been running for longer than the
+    `FORM_CREATOR_EXPORT_JOB_TIMEOUT` setting as pending again, so that jobs
+    left running by a worker which died are picked up by another.
+
+    :return: The number of jobs requeued.
+    :rtype: int
+    """
+    cutoff = timezone.now() - timedelta(
+        seconds=get_setting("EXPORT_JOB_TIMEOUT")
+    )
+    return fc_models.ExportJob.objects.filter(
+        status=fc_models.ExportJob.StatusChoices.RUNNING,
+        started_dt__lt=cutoff,
+    ).update(
+        status=fc_models.ExportJob.StatusChoices.PENDING,
+        started_dt=None,
+        rows_written=0,
+    )
+
+
+def _export_source(
+    job: fc_models.ExportJob,
+) -> _t.Tuple[list, QuerySet, _t.Callable]:
+    """Get the headers, queryset and row generator for the job."""
+    form_ids = job.forms.values_list("id", flat=True)
+    if job.kind == job.KindChoices.QUESTIONS:
+        return (
+            fc_exporters.QUESTION_HEADERS,
+            fc_models.FormQuestion.objects.filter(form_id__in=form_ids),
+            fc_exporters.question_rows,
+        )
+    return (
+        fc_exporters.RESPONSE_HEADERS,
+        fc_models.FormResponse.objects.filter(
+            form_responder__form_id__in=form_ids
+        ),
+        functools.partial(
+            fc_exporters.response_rows,
+            documents=fc_exporters.form_documents(form_ids),
+        ),
+    )
+
+
+def _track_progress(
+    job: fc_models.ExportJob,
+    rows: _t.Iterable[tuple],
+) -> _t.Iterator[tuple]:
+    """Pass through the rows, periodically saving the number written so far
+    to the job.
+    """
+    interval = get_setting("EXPORT_PROGRESS_INTERVAL")
+    written = 0
+    for written, row in enumerate(rows, 1):
+        yield row
+        if written % interval == 0:
+            fc_models.ExportJob.objects.filter(pk=job.pk).update(
+                rows_written=written
+            )
+    job.rows_written = written
+
+
+def _write_export(job: fc_models.ExportJob, path: str) -> None:
+    """Write the export for the job to a file. Responses are exported in
+    parallel when more than one worker is configured.
+    """
+    headers, queryset, rows = _export_source(job)
+    job.rows_total = queryset.count()
+    fc_models.ExportJob.objects.filter(pk=job.pk).update(
+        rows_total=job.rows_total
+    )
+
+    workers = get_setting("EXPORT_WORKERS")
+    if job.kind == job.KindChoices.RESPONSES and workers > 1:
+
+        def progress(written: int) -> None:
+            fc_models.ExportJob.objects.filter(pk=job.pk).update(
+                rows_written=written
+            )
+
+        job.rows_written = fc_parallel.export_responses(
+            job.forms.values_list("id", flat=True),
+            path,
+            workers=workers,
+            progress=progress,
+        )
+        return
+
+    with open(path, "w", newline="", encoding="utf-8") as output:
+        fc_exporters.write_csv(
+            headers,
+            _track_progress(job, rows(queryset)),
+            output,
+        )
+
+
+def run_job(job: fc_models.ExportJob) -> fc_models.ExportJob:
+    """Run the export, writing the result to the job's file.
+
+    :param job: A job which has been claimed using `claim_next_job`.
+    :type job: ExportJob
+    :return: The job, marked as either completed or failed.
+    :rtype: ExportJob
+    """
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, job.filename)
+            _write_export(job, path)
+            with open(path, "rb") as output:
+                job.file.save(job.filename, File(output), save=False)
+    except Exception as e:
+        logger.exception("Export job %s failed.", job.pk)
+        job.status = job.StatusChoices.FAILED
+        job.error = str(e)
+    else:
+        job.status = job.StatusChoices.COMPLETED
+
+    job.finished_dt = timezone.now()
+    job.save()
+    return job
+
+
+def run_pending_jobs() -> int:
+    """Run jobs until there are none left pending.
+
+    :return: The number of jobs run.
+    :rtype: int
+    """
+    count = 0
+    job = claim_next_job()
+    while job is not None:
+        run_job(job)
+        count += 1
+        job = claim_next_job()
+    return count
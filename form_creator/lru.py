@@ -0,0 +1,50 @@
+"""A process-local, least recently used cache shared by the modules which
+keep compiled or fetched objects in memory.
+"""
+
+import threading
+import typing as _t
+from collections import OrderedDict
+from .conf import get_setting
+
+
+class LRU:
+    """A thread-safe, size-bounded mapping which discards the least recently
+    used entry when full.
+
+    :param size_setting: The name of the setting giving the number of entries
+        kept.
+    :type size_setting: str
+    """
+
+    def __init__(self, size_setting: str):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._size_setting = size_setting
+
+    def get(self, key: _t.Hashable) -> _t.Any:
+        """Get an entry, marking it as recently used."""
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                return None
+            return self._entries[key]
+
+    def set(self, key: _t.Hashable, value: _t.Any) -> None:
+        """Add an entry, discarding the oldest entries if full."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > get_setting(self._size_setting):
+                self._entries.popitem(last=False)
+
+    def delete(self, key: _t.Hashable) -> None:
+        """Remove an entry, if there is one."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from ... import typed_answers
+
+
+class Command(BaseCommand):
+    help = (
+        "Set the typed answer columns and choices of existing responses, a "
+        "chunk at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Responses to update per transaction.",
+        )
+        parser.add_argument(
+            "--form",
+            type=int,
+            action="append",
+            dest="form_ids",
+            help="Only update the responses to this form. Can be repeated.",
+        )
+        parser.add_argument(
+            "--after-id",
+            type=int,
+            default=0,
+            help="Only update the responses after this id, to resume an "
+            "earlier backfill.",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for count, last_id in typed_answers.backfill(
+            options["batch_size"],
+            form_ids=options["form_ids"],
+            after_id=options["after_id"],
+        ):
+            total += count
+            self.stdout.write(
+                f"Updated {total} response(s), up to id {last_id}."
+            )
+        self.stdout.write(f"Done. Updated {total} response(s).")
@@ -0,0 +1,62 @@
+import random
+import timeit
+from django.core.management.base import BaseCommand, CommandError
+from ... import analysis as fc_analysis, models as fc_models
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the time taken to analyse numeric answers with NumPy and in "
+        "pure Python."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--values",
+            type=int,
+            default=200000,
+            help="The number of random answers to analyse.",
+        )
+        parser.add_argument(
+            "--question",
+            type=int,
+            help="Analyse the stored answers to this numeric question instead "
+            "of random answers.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=5,
+            help="The number of times each analysis is run. The fastest run "
+            "is reported.",
+        )
+
+    def handle(self, *args, **options):
+        if options["question"] is not None:
+            try:
+                question = fc_models.FormQuestion.objects.get(
+                    id=options["question"]
+                )
+                values = list(fc_analysis.numeric_values(question))
+            except (fc_models.FormQuestion.DoesNotExist, ValueError) as e:
+                raise CommandError(e)
+        else:
+            rng = random.Random(0)
+            values = [rng.gauss(50, 15) for _ in range(options["values"])]
+
+        analysers = [("Python", fc_analysis.analyse_python)]
+        if fc_analysis.numpy is not None:
+            analysers.append(("NumPy", fc_analysis.analyse_numpy))
+        else:
+            self.stdout.write("NumPy is not installed.")
+
+        self.stdout.write(f"Analysing {len(values)} answer(s).")
+        for name, analyse in analysers:
+            seconds = min(
+                timeit.repeat(
+                    lambda: analyse(values),
+                    number=1,
+                    repeat=options["repeat"],
+                )
+            )
+            self.stdout.write(f"{name}: {seconds * 1000:.1f} ms")
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from ... import models as fc_models, parallel as fc_parallel
+
+
+class Command(BaseCommand):
+    help = (
+        "Export the responses to one or more forms to a CSV file, rendering "
+        "ranges of responses in parallel."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "output",
+            help="The path of the CSV file to write.",
+        )
+        parser.add_argument(
+            "--form",
+            action="append",
+            type=int,
+            dest="forms",
+            required=True,
+            help="The id of a form to export. Can be given more than once.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="The number of processes to use. Defaults to the "
+            "FORM_CREATOR_EXPORT_WORKERS setting.",
+        )
+        parser.add_argument(
+            "--partitions",
+            type=int,
+            help="The number of ranges to split the responses into. Defaults "
+            "to the number of workers.",
+        )
+
+    def handle(self, *args, **options):
+        form_ids = set(options["forms"])
+        found = set(
+            fc_models.Form.objects.filter(id__in=form_ids).values_list(
+                "id", flat=True
+            )
+        )
+        if form_ids - found:
+            raise CommandError(
+                "Forms not found: "
+                + ", ".join(str(i) for i in sorted(form_ids - found))
+            )
+
+        rows = fc_parallel.export_responses(
+            sorted(form_ids),
+            options["output"],
+            workers=options["workers"],
+            partitions=options["partitions"],
+        )
+        self.stdout.write(f"Exported {rows} response(s).")
@@ -0,0 +1,39 @@
+import time
+from django.core.management.base import BaseCommand
+from ... import ingestion as fc_ingestion
+
+
+class Command(BaseCommand):
+    help = (
+        "Write staged form submissions to the responder and response tables "
+        "in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Submissions to write per transaction. Defaults to the "
+            "FORM_CREATOR_SUBMISSION_BATCH_SIZE setting.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for new submissions instead of exiting once "
+            "there are none left.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1,
+            help="Seconds to wait between polls when using --loop.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            count = fc_ingestion.flush(options["batch_size"])
+            if count:
+                self.stdout.write(f"Wrote {count} submission(s).")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
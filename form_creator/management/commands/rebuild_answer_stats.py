@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from ... import stats as fc_stats
+
+
+class Command(BaseCommand):
+    help = "Recalculate the statistics of each question from the answers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--form",
+            type=int,
+            action="append",
+            dest="form_ids",
+            help="Only rebuild the statistics of this form. Can be repeated.",
+        )
+
+    def handle(self, *args, **options):
+        count = fc_stats.rebuild(form_ids=options["form_ids"])
+        self.stdout.write(f"Rebuilt the statistics of {count} question(s).")
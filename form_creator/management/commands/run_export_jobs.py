@@ -0,0 +1,36 @@
+import time
+from django.core.management.base import BaseCommand
+from ... import jobs as fc_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Run pending export jobs, writing each result to the default file "
+        "storage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling for new jobs instead of exiting once there are "
+            "none left.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait between polls when using --loop.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = fc_jobs.requeue_stale_jobs()
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stale export job(s).")
+            count = fc_jobs.run_pending_jobs()
+            if count:
+                self.stdout.write(f"Ran {count} export job(s).")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
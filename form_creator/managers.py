@@ -1,7 +1,15 @@
 from django.db import models
+from django.db.models import Case, Exists, OuterRef, Q, Value, When
 from django.utils import timezone
 
 
+def _live(now) -> Q:
+    """Get the condition for a form to be live at `now`."""
+    return Q(status="active", start_dt__lte=now) & (
+        Q(end_dt__isnull=True) | Q(end_dt__gte=now)
+    )
+
+
 class FormsQueryset(models.QuerySet):
     """QuerySet for the Form model."""
 
@@ -16,6 +24,51 @@ class FormsQueryset(models.QuerySet):
             .exclude(end_dt__lt=now)
         )
 
+    def _editor(self, user_id) -> Exists:
+        """Get the condition for the user to be one of a form's editors."""
+        return Exists(
+            self.model.editors.through.objects.filter(
+                form_id=OuterRef("pk"), user_id=user_id
+            )
+        )
+
+    def visible_to(self, user):
+        """Return the forms listed for the user. Staff see every form and
+        other users see live forms along with those they own or edit. Each
+        form is returned once.
+        """
+        if user and user.is_staff:
+            return self.all()
+        user_id = user.pk if user and user.is_authenticated else None
+        return self.filter(
+            Q(owner_id=user_id) | self._editor(user_id) | _live(timezone.now())
+        )
+
+    def with_permissions_for(self, user):
+        """Annotate each form with the user's relationship to it, so that its
+        permission methods need no further queries for that user:
+
+        - `is_owner`: The user owns the form.
+        - `is_editor`: The user is one of the form's editors.
+        - `has_completed`: The user has responded to the form.
+        """
+        user_id = user.pk if user and user.is_authenticated else None
+        responders = self.model._meta.get_field("responders").related_model
+        return self.annotate(
+            permissions_user_id=Value(user_id, models.IntegerField()),
+            is_owner=Case(
+                When(owner_id=user_id, then=Value(True)),
+                default=Value(False),
+                output_field=models.BooleanField(),
+            ),
+            is_editor=self._editor(user_id),
+            has_completed=Exists(
+                responders.objects.filter(
+                    form_id=OuterRef("pk"), user_id=user_id
+                )
+            ),
+        )
+
 
 class FormManager(models.Manager):
     """Manager for the Form model."""
@@ -24,6 +77,14 @@ class FormManager(models.Manager):
         """Return only live forms."""
         return self.get_queryset().live()
 
+    def visible_to(self, user):
+        """Return the forms listed for the user."""
+        return self.get_queryset().visible_to(user)
+
+    def with_permissions_for(self, user):
+        """Return forms annotated with the user's relationship to them."""
+        return self.get_queryset().with_permissions_for(user)
+
     def get_queryset(self):
         """Return a queryset for the Form model."""
         return FormsQueryset(self.model, using=self._db)
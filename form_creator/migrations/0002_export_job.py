@@ -0,0 +1,132 @@
+# Generated by Django 4.2.16 on 2026-10-17 23:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("form_creator", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="form",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("draft", "Draft"),
+                    ("active", "Active"),
+                    ("inactive", "Inactive"),
+                ],
+                default="draft",
+                help_text="This form will be available to users only when status is active and the current date is between the start and end dates.",
+                max_length=10,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="formquestion",
+            name="seq_no",
+            field=models.IntegerField(
+                default=0,
+                help_text="Order of the questions.",
+                verbose_name="Order No.",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="formresponse",
+            name="form_responder",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="responses",
+                to="form_creator.formresponder",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="formquestion",
+            unique_together={("form", "question")},
+        ),
+        migrations.AlterUniqueTogether(
+            name="formresponder",
+            unique_together={("form", "user")},
+        ),
+        migrations.CreateModel(
+            name="ExportJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("questions", "Questions"),
+                            ("responses", "Responses"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("completed", "Completed"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "rows_total",
+                    models.PositiveIntegerField(blank=True, null=True),
+                ),
+                ("rows_written", models.PositiveIntegerField(default=0)),
+                (
+                    "file",
+                    models.FileField(
+                        blank=True, upload_to="form_creator/exports/"
+                    ),
+                ),
+                ("error", models.TextField(blank=True)),
+                ("created_dt", models.DateTimeField(auto_now_add=True)),
+                ("started_dt", models.DateTimeField(blank=True, null=True)),
+                ("finished_dt", models.DateTimeField(blank=True, null=True)),
+                (
+                    "forms",
+                    models.ManyToManyField(
+                        related_name="export_jobs", to="form_creator.form"
+                    ),
+                ),
+                (
+                    "requested_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="form_export_jobs",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "fc_export_job",
+                "ordering": ["-created_dt"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "created_dt"],
+                        name="fc_export_j_status_6beda2_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.16 on 2026-10-17 23:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("form_creator", "0002_export_job"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="formresponder",
+            index=models.Index(
+                fields=["form", "created_dt"],
+                name="fc_form_res_form_id_eeaeb0_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-17 23:40
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("form_creator", "0003_form_responder_created_dt_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="form",
+            name="version",
+            field=models.UUIDField(
+                default=uuid.uuid4,
+                editable=False,
+                help_text="Changes whenever the form or its questions change.",
+            ),
+        ),
+    ]
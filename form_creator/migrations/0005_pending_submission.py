@@ -0,0 +1,57 @@
+# Generated by Django 4.2.16 on 2026-10-17 23:43
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("form_creator", "0004_form_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PendingSubmission",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "answers",
+                    models.JSONField(
+                        help_text="The answers, keyed by question id."
+                    ),
+                ),
+                ("created_dt", models.DateTimeField(auto_now_add=True)),
+                (
+                    "form",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="pending_submissions",
+                        to="form_creator.form",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "fc_pending_submission",
+                "ordering": ["id"],
+                "unique_together": {("form", "user")},
+            },
+        ),
+    ]
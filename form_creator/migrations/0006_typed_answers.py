@@ -0,0 +1,104 @@
+# Generated by Django 4.2.16 on 2026-10-17 23:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("form_creator", "0005_pending_submission"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FormResponseChoice",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("choice", models.CharField(max_length=255)),
+            ],
+            options={
+                "db_table": "fc_form_response_choice",
+                "ordering": ["response", "id"],
+            },
+        ),
+        migrations.AddField(
+            model_name="formresponse",
+            name="boolean_answer",
+            field=models.BooleanField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="formresponse",
+            name="date_answer",
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="formresponse",
+            name="datetime_answer",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="formresponse",
+            name="number_answer",
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="formresponse",
+            name="time_answer",
+            field=models.TimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="formresponse",
+            index=models.Index(
+                fields=["question", "number_answer"],
+                name="fc_form_res_questio_e620e8_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="formresponse",
+            index=models.Index(
+                fields=["question", "date_answer"],
+                name="fc_form_res_questio_2d5a3f_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="formresponse",
+            index=models.Index(
+                fields=["question", "datetime_answer"],
+                name="fc_form_res_questio_d1f33f_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="formresponsechoice",
+            name="question",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="response_choices",
+                to="form_creator.formquestion",
+            ),
+        ),
+        migrations.AddField(
+            model_name="formresponsechoice",
+            name="response",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="choices",
+                to="form_creator.formresponse",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="formresponsechoice",
+            index=models.Index(
+                fields=["question", "choice"],
+                name="fc_form_res_questio_50d455_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.16 on 2026-10-17 23:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("form_creator", "0006_typed_answers"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="formresponder",
+            name="answers",
+            field=models.JSONField(
+                blank=True,
+                help_text="The text of each answer, keyed by question id, when the answers are stored as a document rather than as responses.",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("form_creator", "0007_form_responder_answers"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QuestionStats",
+            fields=[
+                (
+                    "question",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="form_creator.formquestion",
+                    ),
+                ),
+                (
+                    "responses",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="The number of responses including the question.",
+                    ),
+                ),
+                (
+                    "answered",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="The number of responses with a non-empty answer.",
+                    ),
+                ),
+                ("number_sum", models.FloatField(blank=True, null=True)),
+                ("number_min", models.FloatField(blank=True, null=True)),
+                ("number_max", models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name_plural": "question stats",
+                "db_table": "fc_question_stats",
+            },
+        ),
+        migrations.CreateModel(
+            name="ChoiceStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("choice", models.CharField(max_length=255)),
+                ("count", models.PositiveIntegerField(default=0)),
+                (
+                    "question",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="choice_stats",
+                        to="form_creator.formquestion",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "choice stats",
+                "db_table": "fc_choice_stats",
+                "ordering": ["question", "choice"],
+                "unique_together": {("question", "choice")},
+            },
+        ),
+    ]
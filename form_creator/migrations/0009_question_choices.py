@@ -0,0 +1,79 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_choice_options(apps, schema_editor):
+    """Create the options of existing choice questions and link the choices
+    already selected to them.
+    """
+    FormQuestion = apps.get_model("form_creator", "FormQuestion")
+    FormQuestionChoice = apps.get_model("form_creator", "FormQuestionChoice")
+    FormResponseChoice = apps.get_model("form_creator", "FormResponseChoice")
+
+    questions = FormQuestion.objects.exclude(choices__isnull=True).exclude(
+        choices=""
+    )
+    for question in questions.iterator():
+        values = dict.fromkeys(v for v in question.choices.split("|") if v)
+        FormQuestionChoice.objects.bulk_create(
+            FormQuestionChoice(question=question, value=value, seq_no=seq_no)
+            for seq_no, value in enumerate(values)
+        )
+        for option in FormQuestionChoice.objects.filter(question=question):
+            FormResponseChoice.objects.filter(
+                question=question, choice=option.value
+            ).update(option=option)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("form_creator", "0008_answer_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FormQuestionChoice",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("value", models.CharField(max_length=255)),
+                ("seq_no", models.PositiveIntegerField(default=0)),
+                (
+                    "question",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="choice_options",
+                        to="form_creator.formquestion",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "fc_form_question_choice",
+                "ordering": ["question", "seq_no"],
+                "unique_together": {("question", "value")},
+            },
+        ),
+        migrations.AddField(
+            model_name="formresponsechoice",
+            name="option",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="The option selected, unless it has since been removed.",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="response_choices",
+                to="form_creator.formquestionchoice",
+            ),
+        ),
+        migrations.RunPython(create_choice_options, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("form_creator", "0009_question_choices"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="form",
+            index=models.Index(
+                fields=["status", "-created_dt", "id"],
+                name="fc_form_listing_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:21
+
+from django.db import migrations, models
+import form_creator.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("form_creator", "0010_form_listing_index"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="exportjob",
+            name="file",
+            field=models.FileField(
+                blank=True, upload_to=form_creator.models.export_job_upload_to
+            ),
+        ),
+    ]
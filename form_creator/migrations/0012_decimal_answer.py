@@ -0,0 +1,24 @@
+# Generated by Django 4.2.16 on 2026-10-18 00:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("form_creator", "0011_export_job_file_path"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="formresponse",
+            name="decimal_answer",
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=15,
+                editable=False,
+                max_digits=40,
+                null=True,
+            ),
+        ),
+    ]
@@ -1,5 +1,6 @@
 import typing as _t
 import sys
+import uuid
 from django.db import models
 from django.db.models import Q, QuerySet
 from django.contrib.auth import get_user_model
@@ -51,29 +52,55 @@ class Form(models.Model):
         help_text="This form will be available to users only when status is "
         "active and the current date is between the start and end dates.",
     )
+    version = models.UUIDField(
+        default=uuid.uuid4,
+        editable=False,
+        help_text="Changes whenever the form or its questions change.",
+    )
 
     objects = FormManager()
 
     class Meta:
         db_table = "fc_form"
         ordering = ["status", "-created_dt"]
+        indexes = [
+            models.Index(
+                fields=["status", "-created_dt", "id"],
+                name="fc_form_listing_idx",
+            )
+        ]
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        """Override the save method to set the slug."""
+        """Override the save method to set the slug and a new version."""
         if not self.slug:
             self.slug = slugify(self.title)
+        self.version = uuid.uuid4()
         super().save(*args, **kwargs)
 
+    def _annotated_for(self, user: User, flag: str = "is_owner") -> bool:
+        """Indicate if the form was fetched with the permissions of the user
+        by `FormsQueryset.with_permissions_for`, including the `flag`
+        annotation.
+        """
+        return (
+            "permissions_user_id" in self.__dict__
+            and self.permissions_user_id == user.pk
+            and flag in self.__dict__
+        )
+
     def can_edit(self, user: User, staff_can_edit: bool = True) -> bool:
         """Check if the user can edit the form."""
         if not user or not user.is_authenticated:
             return False
+        if staff_can_edit and user.is_staff:
+            return True
+        if self._annotated_for(user):
+            return self.is_owner or self.is_editor
         return any(
             [
-                staff_can_edit and user.is_staff,
                 user.username == self.owner.username,
                 user in self.editors.all(),
             ]
@@ -83,13 +110,33 @@ class Form(models.Model):
         """Check if the user can delete the form."""
         if not user or not user.is_authenticated:
             return False
+        if self._annotated_for(user):
+            return user.is_staff or self.is_owner
         return any([user.is_staff, user.username == self.owner.username])
 
+    def remember_responders(self) -> None:
+        """Keep the responders found by `completed_by` on this instance, so
+        that each user's response is only looked up once. Used for forms
+        which only live for a request.
+        """
+        self.__dict__.setdefault("_responders_by_user", {})
+
     def completed_by(self, user: User) -> _t.Optional["FormResponder"]:
         """Get the form responder for the user."""
         if not user or not user.is_authenticated:
             return None
-        return self.responders.filter(user=user).first()
+        if (
+            self._annotated_for(user, "has_completed")
+            and not self.has_completed
+        ):
+            return None
+        remembered = self.__dict__.get("_responders_by_user")
+        if remembered is not None and user.pk in remembered:
+            return remembered[user.pk]
+        responder = self.responders.filter(user=user).first()
+        if remembered is not None:
+            remembered[user.pk] = responder
+        return responder
 
     def can_complete_form(self, user: User) -> bool:
         """Check if the user can complete the form."""
@@ -104,8 +151,55 @@ class Form(models.Model):
         if self.can_edit(user, False):
             return False
 
+        if self._annotated_for(user, "has_completed"):
+            return not self.has_completed
         return not bool(self.completed_by(user))
 
+    async def acan_edit(self, user: User, staff_can_edit: bool = True) -> bool:
+        """The async version of `can_edit`."""
+        if not user or not user.is_authenticated:
+            return False
+        if (staff_can_edit and user.is_staff) or user.pk == self.owner_id:
+            return True
+        if self._annotated_for(user):
+            return self.is_editor
+        if "editors" in getattr(self, "_prefetched_objects_cache", {}):
+            return user in self.editors.all()
+        return await self.editors.filter(pk=user.pk).aexists()
+
+    async def acan_delete(self, user: User) -> bool:
+        """The async version of `can_delete`."""
+        if not user or not user.is_authenticated:
+            return False
+        return user.is_staff or user.pk == self.owner_id
+
+    async def acompleted_by(self, user: User) -> _t.Optional["FormResponder"]:
+        """The async version of `completed_by`."""
+        if not user or not user.is_authenticated:
+            return None
+        if (
+            self._annotated_for(user, "has_completed")
+            and not self.has_completed
+        ):
+            return None
+        remembered = self.__dict__.get("_responders_by_user")
+        if remembered is not None and user.pk in remembered:
+            return remembered[user.pk]
+        responder = await self.responders.filter(user=user).afirst()
+        if remembered is not None:
+            remembered[user.pk] = responder
+        return responder
+
+    async def acan_complete_form(self, user: User) -> bool:
+        """The async version of `can_complete_form`."""
+        if not user or not user.is_authenticated or not self.is_live():
+            return False
+        if await self.acan_edit(user, False):
+            return False
+        if self._annotated_for(user, "has_completed"):
+            return not self.has_completed
+        return not bool(await self.acompleted_by(user))
+
     def get_absolute_url(self) -> str:
         """Get the absolute URL for the form."""
         return reverse(f"{url_prefix}form_detail", args=[self.id, self.slug])
@@ -199,12 +293,53 @@ class FormQuestion(models.Model):
 
     @property
     def choice_list(self) -> _t.List[str]:
-        """Get the list of choices for the question."""
+        """Get the list of choices for the question. The choice options are
+        used when they have been loaded with the question, so that the
+        choices are not split again.
+        """
+        prefetched = getattr(self, "_prefetched_objects_cache", {})
+        if "choice_options" in prefetched:
+            return [option.value for option in prefetched["choice_options"]]
         return (self.choices or "").split("|")
 
+    def sync_choice_options(self) -> None:
+        """Update the choice options to match the choices. Options which are
+        kept keep their ids, so answers referring to them stay valid.
+        """
+        values = list(
+            dict.fromkeys(
+                value for value in (self.choices or "").split("|") if value
+            )
+        )
+        options = {
+            option.value: option for option in self.choice_options.all()
+        }
+        removed = [
+            option.id
+            for value, option in options.items()
+            if value not in values
+        ]
+        if removed:
+            self.choice_options.filter(id__in=removed).delete()
+
+        new, moved = [], []
+        for seq_no, value in enumerate(values):
+            option = options.get(value)
+            if option is None:
+                new.append(
+                    FormQuestionChoice(
+                        question=self, value=value, seq_no=seq_no
+                    )
+                )
+            elif option.seq_no != seq_no:
+                option.seq_no = seq_no
+                moved.append(option)
+        FormQuestionChoice.objects.bulk_create(new)
+        FormQuestionChoice.objects.bulk_update(moved, ["seq_no"])
+
     def clean(self, *args, **kwargs) -> None:
         """Ensure that fields that require choices are not blank and
-        vice-versa.
+        vice-versa, and that each choice fits its option.
         """
         super().clean(*args, **kwargs)
         _is_choice_field = is_choice_field(self.field_type)
@@ -215,6 +350,37 @@ class FormQuestion(models.Model):
             raise ValidationError(
                 "This question field type does not support choices."
             )
+        max_length = FormQuestionChoice._meta.get_field("value").max_length
+        if any(len(value) > max_length for value in choices.split("|")):
+            raise ValidationError(
+                {
+                    "choices": f"Each choice can have at most {max_length} "
+                    "characters."
+                }
+            )
+
+
+class FormQuestionChoice(models.Model):
+    """A choice for a choice question. The options are kept in step with the
+    pipe separated `FormQuestion.choices`, and keep their id while the choice
+    exists.
+    """
+
+    question = models.ForeignKey(
+        FormQuestion,
+        on_delete=models.CASCADE,
+        related_name="choice_options",
+    )
+    value = models.CharField(max_length=255)
+    seq_no = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "fc_form_question_choice"
+        ordering = ["question", "seq_no"]
+        unique_together = ["question", "value"]
+
+    def __str__(self):
+        return self.value
 
 
 class FormResponder(models.Model):
@@ -227,15 +393,44 @@ class FormResponder(models.Model):
     )
     created_dt = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    answers = models.JSONField(
+        blank=True,
+        null=True,
+        help_text="The text of each answer, keyed by question id, when the "
+        "answers are stored as a document rather than as responses.",
+    )
 
     class Meta:
         db_table = "fc_form_responder"
         ordering = ["-created_dt"]
         unique_together = ["form", "user"]
+        indexes = [models.Index(fields=["form", "created_dt"])]
 
     def __str__(self):
         return f"{self.form.title} - {self.created_dt}"
 
+    @property
+    def stores_document(self) -> bool:
+        """Indicate if the answers are stored as a document."""
+        return self.answers is not None
+
+    def get_answers(self) -> _t.Dict[int, _t.Optional[str]]:
+        """Get the text of each answer, keyed by question id, however the
+        answers are stored.
+        """
+        if self.stores_document:
+            return {
+                int(question_id): answer
+                for question_id, answer in self.answers.items()
+            }
+        return dict(self.responses.values_list("question_id", "answer"))
+
+
+# The number of digits, and of those the number after the decimal point, an
+# exact decimal answer can have.
+DECIMAL_ANSWER_MAX_DIGITS = 40
+DECIMAL_ANSWER_PLACES = 15
+
 
 class FormResponse(models.Model):
     """A response to a form."""
@@ -250,10 +445,239 @@ class FormResponse(models.Model):
         on_delete=models.CASCADE,
     )
     answer = models.TextField(blank=True, null=True)
+    # The answer in the column for its type, set from `answer` by the
+    # `typed_answers` module so that it can be aggregated by the database.
+    number_answer = models.FloatField(blank=True, null=True, editable=False)
+    # The answer to a decimal question, kept exactly as well as in
+    # `number_answer`. Left empty if it does not fit the column.
+    decimal_answer = models.DecimalField(
+        max_digits=DECIMAL_ANSWER_MAX_DIGITS,
+        decimal_places=DECIMAL_ANSWER_PLACES,
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    boolean_answer = models.BooleanField(blank=True, null=True, editable=False)
+    date_answer = models.DateField(blank=True, null=True, editable=False)
+    datetime_answer = models.DateTimeField(
+        blank=True, null=True, editable=False
+    )
+    time_answer = models.TimeField(blank=True, null=True, editable=False)
 
     class Meta:
         db_table = "fc_form_response"
         ordering = ["form_responder", "question"]
+        indexes = [
+            models.Index(fields=["question", "number_answer"]),
+            models.Index(fields=["question", "date_answer"]),
+            models.Index(fields=["question", "datetime_answer"]),
+        ]
 
     def __str__(self):
         return f"{self.form_responder.form.title} - {self.question.question}"
+
+
+class FormResponseChoice(models.Model):
+    """A choice selected in the answer to a choice question. A multiple choice
+    answer has a row per choice selected.
+    """
+
+    response = models.ForeignKey(
+        FormResponse,
+        on_delete=models.CASCADE,
+        related_name="choices",
+    )
+    question = models.ForeignKey(
+        FormQuestion,
+        on_delete=models.CASCADE,
+        related_name="response_choices",
+    )
+    choice = models.CharField(max_length=255)
+    option = models.ForeignKey(
+        FormQuestionChoice,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="response_choices",
+        help_text="The option selected, unless it has since been removed.",
+    )
+
+    class Meta:
+        db_table = "fc_form_response_choice"
+        ordering = ["response", "id"]
+        indexes = [models.Index(fields=["question", "choice"])]
+
+    def __str__(self):
+        return f"{self.question.question} - {self.choice}"
+
+
+class QuestionStats(models.Model):
+    """Running totals of the answers to a question, kept up to date as
+    responses are saved by the `stats` module so that they can be read
+    without scanning the responses.
+    """
+
+    question = models.OneToOneField(
+        FormQuestion,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+    )
+    responses = models.PositiveIntegerField(
+        default=0,
+        help_text="The number of responses including the question.",
+    )
+    answered = models.PositiveIntegerField(
+        default=0,
+        help_text="The number of responses with a non-empty answer.",
+    )
+    number_sum = models.FloatField(blank=True, null=True)
+    number_min = models.FloatField(blank=True, null=True)
+    number_max = models.FloatField(blank=True, null=True)
+
+    class Meta:
+        db_table = "fc_question_stats"
+        verbose_name_plural = "question stats"
+
+    def __str__(self):
+        return str(self.question)
+
+    @property
+    def response_rate(self) -> _t.Optional[float]:
+        """The share of responses with a non-empty answer."""
+        if not self.responses:
+            return None
+        return self.answered / self.responses
+
+
+class ChoiceStats(models.Model):
+    """The number of times a choice has been selected in the answers to a
+    choice question.
+    """
+
+    question = models.ForeignKey(
+        FormQuestion,
+        on_delete=models.CASCADE,
+        related_name="choice_stats",
+    )
+    choice = models.CharField(max_length=255)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "fc_choice_stats"
+        ordering = ["question", "choice"]
+        unique_together = ["question", "choice"]
+        verbose_name_plural = "choice stats"
+
+    def __str__(self):
+        return f"{self.question.question} - {self.choice}"
+
+
+class PendingSubmission(models.Model):
+    """A validated response to a form which is waiting to be written to the
+    responder and response tables by the `flush_submissions` management
+    command. Only used when `FORM_CREATOR_BUFFER_SUBMISSIONS` is enabled.
+    """
+
+    form = models.ForeignKey(
+        Form,
+        on_delete=models.CASCADE,
+        related_name="pending_submissions",
+    )
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    answers = models.JSONField(
+        help_text="The answers, keyed by question id.",
+    )
+    created_dt = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "fc_pending_submission"
+        ordering = ["id"]
+        unique_together = ["form", "user"]
+
+    def __str__(self):
+        return f"{self.form.title} - {self.created_dt}"
+
+
+def export_job_upload_to(instance: "ExportJob", filename: str) -> str:
+    """Get the path of the file an export job writes. The directory is
+    random, so that the file cannot be found without the job. Files are
+    served by the `export_job_download` view, which checks who can see them.
+    """
+    return f"form_creator/exports/{uuid.uuid4().hex}/{filename}"
+
+
+class ExportJob(models.Model):
+    """A request to export forms to a file in the background. Jobs are picked
+    up and run by the `run_export_jobs` management command.
+    """
+
+    class KindChoices(models.TextChoices):
+        """What is being exported."""
+
+        QUESTIONS = "questions", "Questions"
+        RESPONSES = "responses", "Responses"
+
+    class StatusChoices(models.TextChoices):
+        """The status of an export job."""
+
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        COMPLETED = "completed", "Completed"
+        FAILED = "failed", "Failed"
+
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="form_export_jobs",
+    )
+    forms = models.ManyToManyField(Form, related_name="export_jobs")
+    kind = models.CharField(max_length=16, choices=KindChoices.choices)
+    status = models.CharField(
+        max_length=16,
+        choices=StatusChoices.choices,
+        default=StatusChoices.PENDING,
+    )
+    rows_total = models.PositiveIntegerField(blank=True, null=True)
+    rows_written = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to=export_job_upload_to, blank=True)
+    error = models.TextField(blank=True)
+    created_dt = models.DateTimeField(auto_now_add=True)
+    started_dt = models.DateTimeField(blank=True, null=True)
+    finished_dt = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = "fc_export_job"
+        ordering = ["-created_dt"]
+        indexes = [models.Index(fields=["status", "created_dt"])]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} export - {self.created_dt}"
+
+    @property
+    def progress(self) -> _t.Optional[int]:
+        """The percentage of rows written, if the total is known."""
+        if self.status == self.StatusChoices.COMPLETED:
+            return 100
+        if not self.rows_total:
+            return None
+        return min(100, self.rows_written * 100 // self.rows_total)
+
+    @property
+    def filename(self) -> str:
+        """The name to give the file when it is downloaded."""
+        return f"{self.kind}.csv"
+
+    def can_view(self, user: User) -> bool:
+        """Check if the user can view the job and download its result."""
+        if not user or not user.is_authenticated:
+            return False
+        return user.is_staff or user.pk == self.requested_by_id
+
+    def get_status_url(self) -> str:
+        """Get the URL to poll the status of the job."""
+        return reverse(f"{url_prefix}export_job_status", args=[self.id])
+
+    def get_download_url(self) -> str:
+        """Get the URL to download the result of the job."""
+        return reverse(f"{url_prefix}export_job_download", args=[self.id])
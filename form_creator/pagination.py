@@ -0,0 +1,180 @@
+"""This module contains methods to page through the list of forms with a
+cursor rather than an offset.
+
+The forms are ordered by status, newest first and then by id, and each page
+is fetched by filtering on the position of the form at the edge of the page
+before it. Unlike an offset, the cost of fetching a page does not grow with
+the number of forms before it, and forms created while paging do not shift
+the pages along.
+
+The position is passed between pages as an opaque token. A token always
+refers to the same position, whichever page it was taken from.
+"""
+
+import base64
+import binascii
+import json
+import typing as _t
+from datetime import datetime
+from django.db.models import Q, QuerySet
+from . import models as fc_models
+
+# The order of the forms. The id breaks ties between forms created at the
+# same time, so that every form has a distinct position.
+ORDERING = ("status", "-created_dt", "id")
+
+# The order of the forms when paging backwards.
+_REVERSED = ("-status", "created_dt", "-id")
+
+
+class Cursor(_t.NamedTuple):
+    """The position of a form in the list."""
+
+    status: str
+    created_dt: datetime
+    id: int
+    # If True, the page is made of the forms before this position rather
+    # than after it.
+    before: bool = False
+
+
+class Page(_t.NamedTuple):
+    """A page of forms, with the tokens of the pages either side of it."""
+
+    object_list: _t.List[fc_models.Form]
+    next_token: _t.Optional[str]
+    prev_token: _t.Optional[str]
+
+    @property
+    def has_other_pages(self) -> bool:
+        """Indicate if there are pages either side of this one."""
+        return bool(self.next_token or self.prev_token)
+
+
+def encode_token(form: fc_models.Form, before: bool = False) -> str:
+    """Get the token of the position of a form.
+
+    :param form: The form.
+    :type form: Form
+    :param before: If True, the token is for the page before the form.
+    :type before: bool
+    :return: The token.
+    :rtype: str
+    """
+    position = [form.status, form.created_dt.isoformat(), form.id, before]
+    return base64.urlsafe_b64encode(
+        json.dumps(position, separators=(",", ":")).encode()
+    ).decode()
+
+
+def decode_token(token: str) -> Cursor:
+    """Get the position from a token.
+
+    :param token: A token returned by `encode_token`.
+    :type token: str
+    :return: The position.
+    :rtype: Cursor
+    :raises ValueError: If the token is not valid.
+    """
+    try:
+        status, created_dt, form_id, before = json.loads(
+            base64.urlsafe_b64decode(token.encode())
+        )
+        return Cursor(
+            str(status),
+            datetime.fromisoformat(created_dt),
+            int(form_id),
+            bool(before),
+        )
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid page token: {token}") from e
+
+
+def _ordered(
+    forms: QuerySet[fc_models.Form],
+    cursor: _t.Optional[Cursor],
+) -> QuerySet[fc_models.Form]:
+    """Order the forms and limit them to those on the side of the cursor
+    being paged to.
+    """
+    if cursor is None:
+        return forms.order_by(*ORDERING)
+    if cursor.before:
+        return forms.filter(
+            Q(status__lt=cursor.status)
+            | Q(status=cursor.status, created_dt__gt=cursor.created_dt)
+            | Q(
+                status=cursor.status,
+                created_dt=cursor.created_dt,
+                id__lt=cursor.id,
+            )
+        ).order_by(*_REVERSED)
+    return forms.filter(
+        Q(status__gt=cursor.status)
+        | Q(status=cursor.status, created_dt__lt=cursor.created_dt)
+        | Q(
+            status=cursor.status,
+            created_dt=cursor.created_dt,
+            id__gt=cursor.id,
+        )
+    ).order_by(*ORDERING)
+
+
+def _page(
+    forms: _t.List[fc_models.Form],
+    page_size: int,
+    cursor: _t.Optional[Cursor],
+) -> Page:
+    """Build a page from the forms fetched, which include one more than the
+    page size if there are more to come.
+    """
+    has_more = len(forms) > page_size
+    forms = forms[:page_size]
+    if cursor is not None and cursor.before:
+        forms.reverse()
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, cursor is not None
+
+    if not forms:
+        return Page(forms, None, None)
+    return Page(
+        forms,
+        encode_token(forms[-1]) if has_next else None,
+        encode_token(forms[0], before=True) if has_prev else None,
+    )
+
+
+def paginate(
+    forms: QuerySet[fc_models.Form],
+    page_size: int,
+    cursor: _t.Optional[Cursor] = None,
+) -> Page:
+    """Get a page of forms.
+
+    :param forms: The forms to page through.
+    :type forms: QuerySet[Form]
+    :param page_size: The number of forms on a page.
+    :type page_size: int
+    :param cursor: The position to page from. The first page is returned if
+        not given.
+    :type cursor: Cursor
+    :return: The page.
+    :rtype: Page
+    """
+    return _page(
+        list(_ordered(forms, cursor)[: page_size + 1]), page_size, cursor
+    )
+
+
+async def apaginate(
+    forms: QuerySet[fc_models.Form],
+    page_size: int,
+    cursor: _t.Optional[Cursor] = None,
+) -> Page:
+    """The async version of `paginate`."""
+    return _page(
+        [form async for form in _ordered(forms, cursor)[: page_size + 1]],
+        page_size,
+        cursor,
+    )
@@ -0,0 +1,215 @@
+"""This module contains methods to export responses in parallel. The
+responses are split into ranges of primary keys, each range is rendered to
+its own file in a separate process and the files are then joined in order.
+"""
+
+import csv
+import os
+import shutil
+import tempfile
+import typing as _t
+from concurrent.futures import ProcessPoolExecutor
+import django
+from django.apps import apps
+from django.db import connections
+from django.db.models import QuerySet
+from . import models as fc_models, exporters as fc_exporters
+from .conf import get_setting
+
+# A range of primary keys. The lower bound is inclusive and the upper bound is
+# exclusive, with `None` meaning there is no upper bound.
+PkRange = _t.Tuple[int, _t.Optional[int]]
+
+
+def _form_responses(
+    form_ids: _t.Iterable[int],
+) -> QuerySet[fc_models.FormResponse]:
+    """Get the responses to the forms."""
+    return fc_models.FormResponse.objects.filter(
+        form_responder__form_id__in=list(form_ids)
+    )
+
+
+def partition(
+    form_responses: QuerySet[fc_models.FormResponse],
+    partitions: int,
+) -> _t.List[PkRange]:
+    """Split the responses into contiguous ranges of primary keys, each
+    holding roughly the same number of responses.
+
+    :param form_responses: The responses to split.
+    :type form_responses: QuerySet[FormResponse]
+    :param partitions: The number of ranges to split the responses into.
+    :type partitions: int
+    :return: The ranges in ascending order.
+    :rtype: List[Tuple[int, int or None]]
+    """
+    total = form_responses.count()
+    if not total:
+        return []
+
+    size = -(-total // max(partitions, 1))
+    ids = form_responses.order_by("id").values_list("id", flat=True)
+    bounds = [ids[offset] for offset in range(0, total, size)]
+    return list(zip(bounds, bounds[1:] + [None]))
+
+
+def render_range(
+    form_ids: _t.List[int],
+    pk_range: PkRange,
+    path: str,
+    chunk_size: _t.Optional[int] = None,
+) -> int:
+    """Write the responses to the forms within the range to a CSV file,
+    without headers.
+
+    :param form_ids: The ids of the forms to export.
+    :type form_ids: List[int]
+    :param pk_range: The range of response ids to export.
+    :type pk_range: Tuple[int, int or None]
+    :param path: The file to write to.
+    :type path: str
+    :param chunk_size: The number of rows to fetch at a time.
+    :type chunk_size: int
+    :return: The number of rows written.
+    :rtype: int
+    """
+    low, high = pk_range
+    form_responses = _form_responses(form_ids).filter(id__gte=low)
+    if high is not None:
+        form_responses = form_responses.filter(id__lt=high)
+
+    rows = 0
+    with open(path, "w", newline="", encoding="utf-8") as output:
+        writer = csv.writer(output)
+        for row in fc_exporters.response_rows(
+            form_responses.order_by("id"), chunk_size
+        ):
+            writer.writerow(row)
+            rows += 1
+    return rows
+
+
+def _init_worker() -> None:
+    """Set up Django in a worker process which was not forked from a process
+    where it was already set up.
+    """
+    if not apps.ready:
+        django.setup()
+
+
+class _InlineExecutor:
+    """Runs each task as it is submitted. Used when there is a single worker
+    to avoid the cost of starting a process.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def submit(self, fn, *args, **kwargs):
+        """Run the task straight away."""
+        return _Done(fn(*args, **kwargs))
+
+
+class _Done(_t.NamedTuple):
+    """The result of a task run by `_InlineExecutor`."""
+
+    value: _t.Any
+
+    def result(self) -> _t.Any:
+        """Get the result of the task."""
+        return self.value
+
+
+def export_responses(
+    form_ids: _t.Iterable[int],
+    path: str,
+    workers: _t.Optional[int] = None,
+    partitions: _t.Optional[int] = None,
+    progress: _t.Optional[_t.Callable[[int], None]] = None,
+) -> int:
+    """Export the responses to the forms to a CSV file, rendering ranges of
+    responses in parallel. The rows are ordered by response id, followed by
+    the answers stored as documents.
+
+    :param form_ids: The ids of the forms to export.
+    :type form_ids: Iterable[int]
+    :param path: The file to write to.
+    :type path: str
+    :param workers: The number of processes to use. Defaults to the
+        `FORM_CREATOR_EXPORT_WORKERS` setting.
+    :type workers: int
+    :param partitions: The number of ranges to split the responses into.
+        Defaults to the number of workers.
+    :type partitions: int
+    :param progress: Called with the number of rows written so far each time
+        a range has been joined to the output.
+    :type progress: Callable[[int], None]
+    :return: The number of rows written.
+    :rtype: int
+    """
+    form_ids = list(form_ids)
+    workers = workers or get_setting("EXPORT_WORKERS")
+    pk_ranges = partition(_form_responses(form_ids), partitions or workers)
+    chunk_size = get_setting("EXPORT_CHUNK_SIZE")
+
+    if workers > 1:
+        # Connections must not be shared with the worker processes. Each
+        # worker opens its own.
+        connections.close_all()
+        executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker
+        )
+    else:
+        executor = _InlineExecutor()
+
+    directory = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(path)))
+    rows = 0
+    try:
+        with executor, open(path, "w", newline="", encoding="utf-8") as out:
+            csv.writer(out).writerow(fc_exporters.RESPONSE_HEADERS)
+            chunks = []
+            for i, pk_range in enumerate(pk_ranges):
+                chunk_path = os.path.join(directory, f"{i}.csv")
+                chunks.append(
+                    (
+                        chunk_path,
+                        executor.submit(
+                            render_range,
+                            form_ids,
+                            pk_range,
+                            chunk_path,
+                            chunk_size,
+                        ),
+                    )
+                )
+
+            for chunk_path, future in chunks:
+                rows += future.result()
+                with open(chunk_path, newline="", encoding="utf-8") as chunk:
+                    shutil.copyfileobj(chunk, out)
+                os.remove(chunk_path)
+                if progress:
+                    progress(rows)
+
+            # Answers stored as documents follow the responses.
+            writer = csv.writer(out)
+            documented = 0
+            for documented, row in enumerate(
+                fc_exporters.document_rows(
+                    fc_exporters.form_documents(form_ids),
+                    fc_exporters.RESPONSE_COLUMNS,
+                    chunk_size,
+                ),
+                1,
+            ):
+                writer.writerow(row)
+            rows += documented
+            if documented and progress:
+                progress(rows)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return rows
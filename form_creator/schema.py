@@ -0,0 +1,177 @@
+"""This module contains the compiled schema of a form: the specification of
+each field used to capture a response, worked out once from the questions.
+
+Schemas are kept in a process-local LRU and in Django's cache, keyed by the
+form and its version. The version changes whenever a question is edited, so
+an out of date schema is never used and building a `CaptureResponseForm` for
+a form whose schema is cached needs no queries.
+"""
+
+import typing as _t
+from django import forms
+from django.core.cache import cache
+from django.db.models import QuerySet
+from . import models as fc_models
+from .conf import get_setting
+from .lru import LRU
+from .question_form_fields import field_type_map, is_choice_field
+
+FIELD_PREFIX = "question_"
+
+
+class FieldSpec(_t.NamedTuple):
+    """The specification of the field for a question."""
+
+    name: str
+    question_id: int
+    field_type: str
+    label: str
+    required: bool
+    help_text: str
+    choices: _t.Optional[_t.Tuple[_t.Tuple[str, str], ...]]
+    # The id of the option for each of the choices. Defaulted so that
+    # schemas cached before the options existed can still be read.
+    option_ids: _t.Optional[_t.Tuple[int, ...]] = None
+
+    @classmethod
+    def from_question(cls, question: fc_models.FormQuestion) -> "FieldSpec":
+        """Compile the specification of the field for a question.
+
+        :param question: The question.
+        :type question: FormQuestion
+        :return: The field specification.
+        :rtype: FieldSpec
+        """
+        choices = option_ids = None
+        if is_choice_field(question.field_type):
+            options = question.choice_options.all()
+            if options:
+                choices = tuple((o.value, o.value) for o in options)
+                option_ids = tuple(o.id for o in options)
+            else:
+                choices = tuple((c, c) for c in question.choices.split("|"))
+        return cls(
+            name=f"{FIELD_PREFIX}{question.id}",
+            question_id=question.id,
+            field_type=str(question.field_type),
+            label=question.question,
+            required=question.required,
+            help_text=question.description,
+            choices=choices,
+            option_ids=option_ids,
+        )
+
+    def build(self) -> forms.Field:
+        """Build a new field from the specification."""
+        kwargs = {
+            "label": self.label,
+            "required": self.required,
+            "help_text": self.help_text,
+        }
+        if self.choices is not None:
+            kwargs["choices"] = list(self.choices)
+        return field_type_map[self.field_type](**kwargs)
+
+
+class FormSchema(_t.NamedTuple):
+    """The compiled schema of a form."""
+
+    form_id: int
+    version: str
+    fields: _t.Tuple[FieldSpec, ...]
+
+    def option_ids(self) -> _t.Dict[_t.Tuple[int, str], int]:
+        """Get the id of each choice option, keyed by question id and
+        choice, as `typed_answers.option_ids` does.
+        """
+        return {
+            (spec.question_id, value): option_id
+            for spec in self.fields
+            if spec.option_ids
+            for (value, _), option_id in zip(spec.choices, spec.option_ids)
+        }
+
+
+def compile_schema(form: fc_models.Form) -> FormSchema:
+    """Compile the schema of a form from its questions.
+
+    :param form: The form.
+    :type form: Form
+    :return: The schema.
+    :rtype: FormSchema
+    """
+    return _build_schema(form, _questions(form))
+
+
+async def acompile_schema(form: fc_models.Form) -> FormSchema:
+    """The async version of `compile_schema`."""
+    return _build_schema(form, [q async for q in _questions(form)])
+
+
+def _questions(form: fc_models.Form) -> QuerySet[fc_models.FormQuestion]:
+    """Get the questions of a form with their choice options."""
+    return form.questions.prefetch_related("choice_options")
+
+
+def _build_schema(
+    form: fc_models.Form,
+    questions: _t.Iterable[fc_models.FormQuestion],
+) -> FormSchema:
+    """Build the schema of a form from its questions."""
+    return FormSchema(
+        form_id=form.id,
+        version=form.version.hex,
+        fields=tuple(FieldSpec.from_question(q) for q in questions),
+    )
+
+
+_schemas = LRU("SCHEMA_CACHE_SIZE")
+
+
+def _cache_key(form_id: int, version: str) -> str:
+    """Get the key the schema is stored under in Django's cache."""
+    return f"form_creator:schema:{form_id}:{version}"
+
+
+def get_schema(form: fc_models.Form) -> FormSchema:
+    """Get the schema of a form, compiling it only if it is not cached.
+
+    :param form: The form.
+    :type form: Form
+    :return: The schema.
+    :rtype: FormSchema
+    """
+    key = (form.id, form.version.hex)
+    schema = _schemas.get(key)
+    if schema is not None:
+        return schema
+
+    schema = cache.get(_cache_key(*key))
+    if schema is None:
+        schema = compile_schema(form)
+        cache.set(
+            _cache_key(*key),
+            schema,
+            get_setting("SCHEMA_CACHE_TIMEOUT"),
+        )
+    _schemas.set(key, schema)
+    return schema
+
+
+async def aget_schema(form: fc_models.Form) -> FormSchema:
+    """The async version of `get_schema`."""
+    key = (form.id, form.version.hex)
+    schema = _schemas.get(key)
+    if schema is not None:
+        return schema
+
+    schema = await cache.aget(_cache_key(*key))
+    if schema is None:
+        schema = await acompile_schema(form)
+        await cache.aset(
+            _cache_key(*key),
+            schema,
+            get_setting("SCHEMA_CACHE_TIMEOUT"),
+        )
+    _schemas.set(key, schema)
+    return schema
@@ -0,0 +1,181 @@
+"""Signal receivers which keep the form versions, choice options, typed
+answers, cached forms, exports and summaries up to date. Connected when the
+app is ready.
+"""
+
+import typing as _t
+import uuid
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_save,
+)
+from django.dispatch import receiver
+from . import (
+    models as fc_models,
+    export_cache as fc_export_cache,
+    form_cache as fc_form_cache,
+    summary as fc_summary,
+    typed_answers,
+)
+from .conf import get_setting
+
+
+def _invalidate_exports(form_id: int) -> None:
+    """Delete the cached exports of a form, if exports are cached."""
+    if get_setting("EXPORT_CACHE"):
+        fc_export_cache.invalidate(form_id)
+
+
+def responses_changed(form_id: int) -> None:
+    """Discard the cached exports and summary of a form whose existing
+    responses have been edited or deleted. Deleting responses on their own
+    sends no signal, so call this afterwards.
+
+    :param form_id: The id of the form.
+    :type form_id: int
+    """
+    _invalidate_exports(form_id)
+    fc_summary.invalidate(form_id)
+
+
+def _invalidate_form(form_id: int) -> None:
+    """Discard the cached form, and again once the transaction changing it
+    commits, in case the old form was cached again in the meantime.
+    """
+    fc_form_cache.invalidate(form_id)
+    transaction.on_commit(lambda: fc_form_cache.invalidate(form_id))
+
+
+@receiver(post_save, sender=fc_models.Form)
+@receiver(post_delete, sender=fc_models.Form)
+def form_changed(sender, instance: fc_models.Form, **kwargs) -> None:
+    """Discard the cached form and exports of a form which has changed."""
+    _invalidate_form(instance.id)
+    _invalidate_exports(instance.id)
+    if kwargs["signal"] is post_delete:
+        fc_summary.invalidate(instance.id)
+
+
+@receiver(m2m_changed, sender=fc_models.Form.editors.through)
+def editors_changed(
+    sender,
+    instance,
+    action: str,
+    reverse: bool,
+    pk_set: _t.Optional[_t.Set[int]],
+    **kwargs,
+) -> None:
+    """Discard the cached forms whose editors have changed. The forms are
+    the instance, or those in `pk_set` when changed from the user's side.
+    """
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            _invalidate_form(instance.id)
+    elif action in ("post_add", "post_remove"):
+        for form_id in pk_set:
+            _invalidate_form(form_id)
+    elif action == "pre_clear":
+        # The forms are not given when a user's forms are cleared.
+        for form_id in sender.objects.filter(user_id=instance.pk).values_list(
+            "form_id", flat=True
+        ):
+            _invalidate_form(form_id)
+
+
+def _question_changed(question: fc_models.FormQuestion) -> None:
+    """Give the form a new version when one of its questions changes, and
+    discard its cached form and exports.
+    """
+    fc_models.Form.objects.filter(id=question.form_id).update(
+        version=uuid.uuid4()
+    )
+    _invalidate_form(question.form_id)
+    _invalidate_exports(question.form_id)
+
+
+@receiver(post_save, sender=fc_models.FormQuestion)
+def question_saved(
+    sender,
+    instance: fc_models.FormQuestion,
+    created: bool,
+    raw: bool,
+    **kwargs,
+) -> None:
+    """Keep the choice options of a question in step with its choices, and
+    give the form a new version. The options are updated first, so that a
+    schema built for the new version never has the old options.
+    """
+    if not raw and (instance.choices or not created):
+        instance.sync_choice_options()
+    _question_changed(instance)
+
+
+@receiver(post_delete, sender=fc_models.FormQuestion)
+def question_deleted(
+    sender, instance: fc_models.FormQuestion, origin, **kwargs
+) -> None:
+    """Give the form a new version when one of its questions is deleted,
+    unless the form itself is being deleted.
+    """
+    if not isinstance(origin, fc_models.Form):
+        _question_changed(instance)
+
+
+@receiver(pre_save, sender=fc_models.FormResponse)
+def response_saving(
+    sender, instance: fc_models.FormResponse, raw: bool, **kwargs
+) -> None:
+    """Set the typed columns of a response saved on its own, such as from
+    the admin. Responses inserted in bulk have them set when built.
+    """
+    if not raw:
+        typed_answers.sync_response(instance)
+
+
+@receiver(post_save, sender=fc_models.FormResponse)
+def response_saved(
+    sender,
+    instance: fc_models.FormResponse,
+    created: bool,
+    raw: bool,
+    **kwargs,
+) -> None:
+    """Store the choices selected in a response saved on its own, and discard
+    the exports and summary of a form when a response is edited. New
+    responses change the content version, so need no action.
+    """
+    if not raw and typed_answers.has_choices(instance.question.field_type):
+        typed_answers.sync_choices(instance, created)
+    if not created:
+        responses_changed(instance.form_responder.form_id)
+
+
+@receiver(post_delete, sender=fc_models.FormResponder)
+def responder_deleted(
+    sender, instance: fc_models.FormResponder, origin, **kwargs
+) -> None:
+    """Discard the exports and summary of a form when a responder is
+    deleted, unless the form is being deleted, which discards them once.
+
+    Responses have no delete receiver, so that they are deleted in bulk
+    along with their responder or form.
+    """
+    if not isinstance(origin, fc_models.Form):
+        responses_changed(instance.form_id)
+
+
+@receiver(post_save, sender=fc_models.FormResponder)
+def responder_saved(
+    sender,
+    instance: fc_models.FormResponder,
+    created: bool,
+    **kwargs,
+) -> None:
+    """Discard the exports and summary of a form when the answers stored as
+    a document may have been edited. New documents change the content version.
+    """
+    if not created and instance.stores_document:
+        responses_changed(instance.form_id)
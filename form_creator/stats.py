@@ -0,0 +1,368 @@
+"""This module contains methods to keep running statistics of the answers to
+each question. When responses are saved, the number of responses, the number
+of non-empty answers, the sum, minimum and maximum of numeric answers and the
+number of times each choice was selected are added to the `QuestionStats` and
+`ChoiceStats` tables in a handful of statements. Reading the statistics of a
+form then only reads a row per question and choice.
+
+Edited and deleted responses are not taken off the totals. The
+`rebuild_answer_stats` management command recalculates them from the stored
+answers.
+"""
+
+import functools
+import operator
+import typing as _t
+from collections import Counter
+from django.db import transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    FloatField,
+    Max,
+    Min,
+    PositiveIntegerField,
+    Q,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Greatest, Least
+from . import models as fc_models, typed_answers
+
+# An answer of (question id, field type, cleaned answer or its text).
+Answer = _t.Tuple[int, str, _t.Any]
+
+# The running totals of a question, keyed by `QuestionStats` field.
+Totals = _t.Dict[str, _t.Any]
+
+# The text of answers which are empty. An empty multiple choice answer is
+# stored as the text of an empty list.
+_EMPTY_TEXT = ("", "[]")
+
+_NUMBER_FIELDS = ("number_sum", "number_min", "number_max")
+
+
+def _new_totals() -> Totals:
+    return {
+        "responses": 0,
+        "answered": 0,
+        "number_sum": None,
+        "number_min": None,
+        "number_max": None,
+    }
+
+
+def _add_numbers(
+    totals: Totals,
+    number_sum: float,
+    number_min: float,
+    number_max: float,
+) -> None:
+    """Add the sum, minimum and maximum of some numeric answers to the
+    totals.
+    """
+    if totals["number_sum"] is None:
+        totals.update(
+            number_sum=number_sum, number_min=number_min, number_max=number_max
+        )
+    else:
+        totals["number_sum"] += number_sum
+        totals["number_min"] = min(totals["number_min"], number_min)
+        totals["number_max"] = max(totals["number_max"], number_max)
+
+
+def tally(
+    answers: _t.Iterable[Answer],
+) -> _t.Tuple[_t.Dict[int, Totals], _t.Counter[_t.Tuple[int, str]]]:
+    """Add up the answers.
+
+    :param answers: The question id, field type and answer of each answer.
+    :type answers: Iterable[Tuple[int, str, Any]]
+    :return: The totals of each question, keyed by question id, and the
+        number of times each choice was selected, keyed by question id and
+        choice.
+    :rtype: Tuple[Dict[int, Dict[str, Any]], Counter[Tuple[int, str]]]
+    """
+    questions = {}
+    choices = Counter()
+    for question_id, field_type, answer in answers:
+        totals = questions.setdefault(question_id, _new_totals())
+        totals["responses"] += 1
+        if answer is None or answer == [] or answer in _EMPTY_TEXT:
+            continue
+
+        totals["answered"] += 1
+        number = typed_answers.typed_values(field_type, answer)[
+            "number_answer"
+        ]
+        if number is not None:
+            _add_numbers(totals, number, number, number)
+        for choice in typed_answers.answer_choices(field_type, answer):
+            choices[question_id, choice] += 1
+    return questions, choices
+
+
+def _per_question(
+    questions: _t.Dict[int, Totals],
+    name: str,
+    then: _t.Callable[[_t.Any], _t.Any],
+    default: _t.Any,
+    output_field,
+) -> Case:
+    """Build an expression giving the new value of a field for each question
+    with a value for it in `questions`.
+    """
+    return Case(
+        *(
+            When(question_id=question_id, then=then(totals[name]))
+            for question_id, totals in questions.items()
+            if totals[name] is not None
+        ),
+        default=default,
+        output_field=output_field,
+    )
+
+
+def _number(value: float) -> Value:
+    return Value(value, output_field=FloatField())
+
+
+def record(answers: _t.Iterable[Answer]) -> None:
+    """Add answers which have just been saved to the statistics. Call within
+    the transaction saving them.
+
+    The rows are created if they do not exist yet, and then each table is
+    updated in a single statement, so the number of queries does not depend
+    on the number of answers.
+
+    :param answers: The question id, field type and answer of each answer.
+    :type answers: Iterable[Tuple[int, str, Any]]
+    """
+    questions, choices = tally(answers)
+    if not questions:
+        return
+
+    fc_models.QuestionStats.objects.bulk_create(
+        (
+            fc_models.QuestionStats(question_id=question_id)
+            for question_id in questions
+        ),
+        ignore_conflicts=True,
+    )
+    updates = {
+        name: F(name)
+        + _per_question(
+            questions,
+            name,
+            Value,
+            Value(0),
+            PositiveIntegerField(),
+        )
+        for name in ("responses", "answered")
+    }
+    if any(totals["number_sum"] is not None for totals in questions.values()):
+        updates.update(
+            number_sum=_per_question(
+                questions,
+                "number_sum",
+                lambda value: Coalesce(F("number_sum"), _number(0))
+                + _number(value),
+                F("number_sum"),
+                FloatField(),
+            ),
+            number_min=_per_question(
+                questions,
+                "number_min",
+                lambda value: Least(
+                    Coalesce(F("number_min"), _number(value)), _number(value)
+                ),
+                F("number_min"),
+                FloatField(),
+            ),
+            number_max=_per_question(
+                questions,
+                "number_max",
+                lambda value: Greatest(
+                    Coalesce(F("number_max"), _number(value)), _number(value)
+                ),
+                F("number_max"),
+                FloatField(),
+            ),
+        )
+    fc_models.QuestionStats.objects.filter(question_id__in=questions).update(
+        **updates
+    )
+
+    if not choices:
+        return
+    fc_models.ChoiceStats.objects.bulk_create(
+        (
+            fc_models.ChoiceStats(question_id=question_id, choice=choice)
+            for question_id, choice in choices
+        ),
+        ignore_conflicts=True,
+    )
+    selected = [
+        Q(question_id=question_id, choice=choice)
+        for question_id, choice in choices
+    ]
+    fc_models.ChoiceStats.objects.filter(
+        functools.reduce(operator.or_, selected)
+    ).update(
+        count=F("count")
+        + Case(
+            *(
+                When(condition, then=Value(count))
+                for condition, count in zip(selected, choices.values())
+            ),
+            default=Value(0),
+            output_field=PositiveIntegerField(),
+        )
+    )
+
+
+def document_answers(
+    questions: _t.Dict[int, str],
+    form_ids: _t.Optional[_t.Iterable[int]] = None,
+) -> _t.Iterator[Answer]:
+    """Yield the answers stored as documents to some questions.
+
+    :param questions: The field type of each question, keyed by id.
+    :type questions: Dict[int, str]
+    :param form_ids: Only read the documents of these forms' responders.
+    :type form_ids: Iterable[int]
+    :return: The question id, field type and text of each answer.
+    :rtype: Iterator[Tuple[int, str, Any]]
+    """
+    form_responders = fc_models.FormResponder.objects.filter(
+        answers__isnull=False
+    )
+    if form_ids:
+        form_responders = form_responders.filter(form_id__in=form_ids)
+    for answers in (
+        form_responders.order_by().values_list("answers", flat=True).iterator()
+    ):
+        for question_id, answer in answers.items():
+            if int(question_id) in questions:
+                yield int(question_id), questions[int(question_id)], answer
+
+
+def rebuild(form_ids: _t.Optional[_t.Iterable[int]] = None) -> int:
+    """Recalculate the statistics from the stored answers. Answers stored as
+    rows are added up by the database from their typed columns and choices,
+    which must have been backfilled. Answers stored as documents are added
+    up as they are read.
+
+    The statistics of the questions are locked while they are recalculated,
+    so responses saved in the meantime wait and are then added to the new
+    totals, rather than being added to the old ones and lost.
+
+    :param form_ids: Only rebuild the statistics of these forms' questions.
+    :type form_ids: Iterable[int]
+    :return: The number of questions with statistics.
+    :rtype: int
+    """
+    form_questions = fc_models.FormQuestion.objects.all()
+    if form_ids:
+        form_ids = list(form_ids)
+        form_questions = form_questions.filter(form_id__in=form_ids)
+
+    with transaction.atomic():
+        field_types = dict(form_questions.values_list("id", "field_type"))
+        # `record` updates the row of each question answered before any
+        # choices, so locking a row per question holds back responses to
+        # any of them until the new totals are stored.
+        fc_models.QuestionStats.objects.bulk_create(
+            (
+                fc_models.QuestionStats(question_id=question_id)
+                for question_id in field_types
+            ),
+            ignore_conflicts=True,
+        )
+        list(
+            fc_models.QuestionStats.objects.filter(question_id__in=field_types)
+            .select_for_update()
+            .order_by("question_id")
+            .values_list("question_id", flat=True)
+        )
+
+        questions, choices = tally(document_answers(field_types, form_ids))
+        for values in (
+            fc_models.FormResponse.objects.filter(question_id__in=field_types)
+            .values("question_id")
+            .annotate(
+                responses=Count("id"),
+                answered=Count(
+                    "id",
+                    filter=~Q(answer__in=_EMPTY_TEXT)
+                    & Q(answer__isnull=False),
+                ),
+                number_sum=Sum("number_answer"),
+                number_min=Min("number_answer"),
+                number_max=Max("number_answer"),
+            )
+            .order_by()
+        ):
+            totals = questions.setdefault(values["question_id"], _new_totals())
+            totals["responses"] += values["responses"]
+            totals["answered"] += values["answered"]
+            if values["number_sum"] is not None:
+                _add_numbers(
+                    totals,
+                    values["number_sum"],
+                    values["number_min"],
+                    values["number_max"],
+                )
+        for question_id, choice, count in (
+            fc_models.FormResponseChoice.objects.filter(
+                question_id__in=field_types
+            )
+            .values("question_id", "choice")
+            .annotate(count=Count("id"))
+            .order_by()
+            .values_list("question_id", "choice", "count")
+        ):
+            choices[question_id, choice] += count
+
+        fc_models.QuestionStats.objects.filter(
+            question_id__in=field_types
+        ).delete()
+        fc_models.ChoiceStats.objects.filter(
+            question_id__in=field_types
+        ).delete()
+        fc_models.QuestionStats.objects.bulk_create(
+            fc_models.QuestionStats(question_id=question_id, **totals)
+            for question_id, totals in questions.items()
+        )
+        fc_models.ChoiceStats.objects.bulk_create(
+            fc_models.ChoiceStats(
+                question_id=question_id, choice=choice, count=count
+            )
+            for (question_id, choice), count in choices.items()
+        )
+    return len(questions)
+
+
+def form_stats(form: fc_models.Form) -> _t.Dict[int, dict]:
+    """Get the statistics of each question in a form in two queries.
+
+    :param form: The form.
+    :type form: Form
+    :return: The totals of each question with answers, and the number of
+        times each of its choices was selected, keyed by question id.
+    :rtype: Dict[int, dict]
+    """
+    questions = {
+        values.pop("question_id"): dict(values, choices={})
+        for values in fc_models.QuestionStats.objects.filter(
+            question__form=form
+        ).values("question_id", "responses", "answered", *_NUMBER_FIELDS)
+    }
+    for question_id, choice, count in fc_models.ChoiceStats.objects.filter(
+        question__form=form
+    ).values_list("question_id", "choice", "count"):
+        if question_id in questions:
+            questions[question_id]["choices"][choice] = count
+    return questions
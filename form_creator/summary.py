@@ -0,0 +1,308 @@
+"""This module contains methods to summarise the answers to each question in
+a form: the number of responses and answers, how often each choice was
+selected and the mean and percentiles of numeric answers.
+
+The summary is worked out by the database from the typed columns and choices
+stored by the `typed_answers` module, with one grouped query per kind of
+question rather than one per question. Answers stored as documents are read
+in one more query and added up as they are read, and the mean and
+percentiles of questions with such answers are then worked out in Python.
+
+Summaries are cached in Django's cache along with the content version of the
+form's responses, so a new response or a change to the questions is picked
+up on the next read. Edited and deleted responses discard the summary.
+"""
+
+import math
+import statistics
+import typing as _t
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, Prefetch, Q, Window
+from django.db.models.functions import RowNumber
+from . import (
+    models as fc_models,
+    export_cache as fc_export_cache,
+    stats as fc_stats,
+    typed_answers,
+)
+from .conf import get_setting
+
+# The percentiles of numeric answers included in the summary.
+PERCENTILES = (25, 50, 75, 90)
+
+
+def _cache_key(form_id: int) -> str:
+    """Get the key the summary is stored under in Django's cache."""
+    return f"form_creator:summary:{form_id}"
+
+
+def _positions(count: int) -> _t.Dict[int, _t.Tuple[int, int, float]]:
+    """Get the rows either side of each percentile of `count` sorted values,
+    numbered from 1, and how far the percentile lies between them.
+    """
+    positions = {}
+    for percentile in PERCENTILES:
+        position = percentile / 100 * (count - 1)
+        low = math.floor(position)
+        positions[percentile] = (low + 1, low + 2, position - low)
+    return positions
+
+
+def _interpolate(
+    count: int,
+    value: _t.Callable[[int], _t.Optional[float]],
+) -> _t.Dict[str, float]:
+    """Get the percentiles of `count` sorted values, given the value of each
+    row numbered from 1. Values between rows are interpolated linearly.
+    """
+    percentiles = {}
+    for percentile, (low, high, fraction) in _positions(count).items():
+        low_value = value(low)
+        high_value = value(high)
+        if high_value is None:
+            high_value = low_value
+        percentiles[str(percentile)] = (
+            low_value + (high_value - low_value) * fraction
+        )
+    return percentiles
+
+
+def _percentiles(
+    counts: _t.Dict[int, int],
+) -> _t.Dict[int, _t.Dict[str, float]]:
+    """Get the percentiles of the numeric answers to the questions, given as
+    the number of numeric answers keyed by question id, in a single query.
+
+    The answers to each question are numbered in order by the database and
+    only the rows either side of each percentile are read.
+    """
+    positions = {
+        question_id: _positions(count) for question_id, count in counts.items()
+    }
+    rows = {
+        row
+        for question_positions in positions.values()
+        for low, high, _ in question_positions.values()
+        for row in (low, high)
+    }
+    values = {}
+    # Filters against window functions must not be mixed with other
+    # conditions, so every row wanted for any question is read.
+    for question_id, row, number in (
+        fc_models.FormResponse.objects.filter(
+            question_id__in=counts, number_answer__isnull=False
+        )
+        .annotate(
+            row=Window(
+                RowNumber(),
+                partition_by=F("question_id"),
+                order_by=[F("number_answer").asc(), F("id").asc()],
+            )
+        )
+        .filter(row__in=rows)
+        .order_by()
+        .values_list("question_id", "row", "number_answer")
+    ):
+        values[question_id, row] = number
+
+    return {
+        question_id: _interpolate(
+            count,
+            lambda row, question_id=question_id: values.get(
+                (question_id, row)
+            ),
+        )
+        for question_id, count in counts.items()
+    }
+
+
+def _document_totals(
+    form: fc_models.Form,
+    field_types: _t.Dict[int, str],
+) -> _t.Tuple[
+    _t.Dict[int, fc_stats.Totals],
+    _t.Counter[_t.Tuple[int, str]],
+    _t.Dict[int, _t.List[float]],
+]:
+    """Add up the answers to the form stored as documents.
+
+    :return: The totals of each question, the number of times each choice
+        was selected and the numeric answers to each question.
+    """
+    answers = list(fc_stats.document_answers(field_types, [form.id]))
+    totals, choices = fc_stats.tally(answers)
+    numbers = {}
+    for question_id, field_type, answer in answers:
+        number = typed_answers.typed_values(field_type, answer)[
+            "number_answer"
+        ]
+        if number is not None:
+            numbers.setdefault(question_id, []).append(number)
+    return totals, choices, numbers
+
+
+def _mixed_numbers(
+    document_numbers: _t.Dict[int, _t.List[float]],
+    totals: _t.Dict[int, dict],
+) -> _t.Dict[int, _t.Tuple[float, _t.Dict[str, float]]]:
+    """Get the mean and percentiles of the numeric answers to questions
+    with answers stored as documents, along with any stored as rows.
+    """
+    numbers = {
+        question_id: list(values)
+        for question_id, values in document_numbers.items()
+    }
+    row_questions = [
+        question_id
+        for question_id in numbers
+        if totals.get(question_id, {}).get("numbers")
+    ]
+    if row_questions:
+        for question_id, number in (
+            fc_models.FormResponse.objects.filter(
+                question_id__in=row_questions, number_answer__isnull=False
+            )
+            .order_by()
+            .values_list("question_id", "number_answer")
+        ):
+            numbers[question_id].append(number)
+
+    results = {}
+    for question_id, values in numbers.items():
+        values.sort()
+        results[question_id] = (
+            statistics.fmean(values),
+            _interpolate(
+                len(values),
+                lambda row, values=values: (
+                    values[row - 1] if row <= len(values) else None
+                ),
+            ),
+        )
+    return results
+
+
+def build_summary(form: fc_models.Form) -> dict:
+    """Summarise the answers to each question in a form.
+
+    :param form: The form.
+    :type form: Form
+    :return: The summary of each question, in the order they are asked.
+    :rtype: dict
+    """
+    questions = list(
+        form.questions.order_by("seq_no", "id")
+        .only("id", "form_id", "question", "field_type")
+        .prefetch_related(
+            Prefetch(
+                "choice_options",
+                fc_models.FormQuestionChoice.objects.order_by("seq_no"),
+            )
+        )
+    )
+    document_totals, document_choices, document_numbers = _document_totals(
+        form, {question.id: question.field_type for question in questions}
+    )
+    totals = {
+        values.pop("question_id"): values
+        for values in fc_models.FormResponse.objects.filter(
+            question__form=form
+        )
+        .values("question_id")
+        .annotate(
+            responses=Count("id"),
+            answered=Count(
+                "id",
+                filter=~Q(answer__in=("", "[]")) & Q(answer__isnull=False),
+            ),
+            numbers=Count("number_answer"),
+            mean=Avg("number_answer"),
+        )
+        .order_by()
+    }
+
+    choices = {}
+    if any(
+        typed_answers.has_choices(question.field_type)
+        for question in questions
+    ):
+        for question_id, choice, count in (
+            fc_models.FormResponseChoice.objects.filter(question__form=form)
+            .values("question_id", "choice")
+            .annotate(count=Count("id"))
+            .order_by()
+            .values_list("question_id", "choice", "count")
+        ):
+            choices.setdefault(question_id, {})[choice] = count
+    for (question_id, choice), count in document_choices.items():
+        selected = choices.setdefault(question_id, {})
+        selected[choice] = selected.get(choice, 0) + count
+
+    number_counts = {
+        question_id: values["numbers"]
+        for question_id, values in totals.items()
+        if values["numbers"] and question_id not in document_numbers
+    }
+    numbers = {
+        question_id: (totals[question_id]["mean"], question_percentiles)
+        for question_id, question_percentiles in (
+            _percentiles(number_counts) if number_counts else {}
+        ).items()
+    }
+    if document_numbers:
+        numbers.update(_mixed_numbers(document_numbers, totals))
+
+    summaries = []
+    for question in questions:
+        question_totals = totals.get(question.id, {})
+        question_documents = document_totals.get(question.id, {})
+        summary = {
+            "id": question.id,
+            "question": question.question,
+            "field_type": question.field_type,
+            "responses": question_totals.get("responses", 0)
+            + question_documents.get("responses", 0),
+            "answered": question_totals.get("answered", 0)
+            + question_documents.get("answered", 0),
+        }
+        if typed_answers.has_choices(question.field_type):
+            selected = choices.get(question.id, {})
+            # The options are in order, and choices which have since been
+            # removed are listed last.
+            summary["choices"] = {
+                choice: selected.pop(choice, 0)
+                for choice in question.choice_list
+            }
+            summary["choices"].update(selected)
+        if question.id in numbers:
+            summary["mean"], summary["percentiles"] = numbers[question.id]
+        summaries.append(summary)
+    return {"form": form.id, "questions": summaries}
+
+
+def get_summary(form: fc_models.Form) -> dict:
+    """Get the summary of a form, building it only if the cached summary is
+    out of date.
+
+    :param form: The form.
+    :type form: Form
+    :return: The summary, as returned by `build_summary`.
+    :rtype: dict
+    """
+    version = fc_export_cache.content_version(form, fc_export_cache.RESPONSES)
+    cached = cache.get(_cache_key(form.id))
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    summary = build_summary(form)
+    cache.set(
+        _cache_key(form.id),
+        (version, summary),
+        get_setting("SUMMARY_CACHE_TIMEOUT"),
+    )
+    return summary
+
+
+def invalidate(form_id: int) -> None:
+    """Discard the cached summary of a form."""
+    cache.delete(_cache_key(form_id))
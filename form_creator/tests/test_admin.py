@@ -1,9 +1,11 @@
 """Tests for the `admin` module."""
 
+from django.contrib import admin
 from django.test import TestCase, Client
 from django.urls import reverse
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from model_bakery import baker
+import mock
 from .. import admin as fc_admin, models as fc_models
 
 
@@ -89,7 +91,7 @@ class TestAdminForm(TestCase):
         questions = fc_admin.FormAdmin.export_questions(
             None, None, fc_models.Form.objects.filter(id=self.form.id)
         )
-        self.assertIsInstance(questions, HttpResponse)
+        self.assertIsInstance(questions, StreamingHttpResponse)
         self.assertEqual(questions["Content-Type"], "text/csv")
 
     def test_export_responses(self):
@@ -97,5 +99,136 @@ class TestAdminForm(TestCase):
         responses = fc_admin.FormAdmin.export_responses(
             None, None, fc_models.Form.objects.filter(id=self.form.id)
         )
-        self.assertIsInstance(responses, HttpResponse)
+        self.assertIsInstance(responses, StreamingHttpResponse)
         self.assertEqual(responses["Content-Type"], "text/csv")
+        content = b"".join(responses.streaming_content).decode("utf-8")
+        for response in self.responses:
+            self.assertIn(response.question.question, content)
+
+    def test_export_archive(self):
+        """Test that the export archive action returns a ZIP file."""
+        archive = fc_admin.FormAdmin.export_archive(
+            None, None, fc_models.Form.objects.filter(id=self.form.id)
+        )
+        self.assertIsInstance(archive, StreamingHttpResponse)
+        self.assertEqual(archive["Content-Type"], "application/zip")
+        self.assertEqual(
+            archive["Content-Disposition"], "attachment; filename=forms.zip"
+        )
+
+    def test_export_in_background(self):
+        """Test that the background export actions queue a job."""
+        user = baker.make(fc_models.User, is_superuser=True, is_staff=True)
+        client = Client()
+        client.force_login(user)
+        for action, kind in (
+            ("export_questions_in_background", "questions"),
+            ("export_responses_in_background", "responses"),
+        ):
+            response = client.post(
+                reverse("admin:form_creator_form_changelist"),
+                {"action": action, "_selected_action": [self.form.id]},
+            )
+            self.assertEqual(response.status_code, 302)
+            job = fc_models.ExportJob.objects.latest("id")
+            self.assertEqual(job.kind, kind)
+            self.assertEqual(job.requested_by, user)
+            self.assertEqual(list(job.forms.all()), [self.form])
+
+
+class TestExportJobAdmin(TestCase):
+    """Tests for the `ExportJobAdmin` class."""
+
+    def test_download(self):
+        """Test that the download link goes through the view which checks
+        who can see the file, rather than straight to the file.
+        """
+        job = baker.make(
+            fc_models.ExportJob,
+            kind=fc_models.ExportJob.KindChoices.RESPONSES,
+            status=fc_models.ExportJob.StatusChoices.COMPLETED,
+            file="form_creator/exports/abc/responses.csv",
+        )
+        link = fc_admin.ExportJobAdmin.download(None, job)
+        self.assertIn(f'href="{job.get_download_url()}"', link)
+        self.assertNotIn(job.file.name, link)
+
+    def test_download_not_completed(self):
+        """Test that there is no link until the export has completed."""
+        job = baker.make(fc_models.ExportJob)
+        self.assertEqual(fc_admin.ExportJobAdmin.download(None, job), "-")
+
+
+class TestFormResponderAdmin(TestCase):
+    """Tests for the `FormResponderAdmin` class."""
+
+    def test_document_answers(self):
+        """Test that the answers stored as a document are listed with the
+        text of their questions.
+        """
+        question = baker.make(
+            fc_models.FormQuestion, question="What is your name?"
+        )
+        responder = baker.make(
+            fc_models.FormResponder,
+            form=question.form,
+            answers={str(question.id): "<Ann>"},
+        )
+        answers = fc_admin.FormResponderAdmin.document_answers(None, responder)
+        self.assertIn("<th>What is your name?</th>", answers)
+        self.assertIn("<td>&lt;Ann&gt;</td>", answers)
+
+    def test_document_answers_responses(self):
+        """Test that nothing is listed for responders whose answers are
+        stored as responses, which have an inline instead.
+        """
+        responder = baker.make(fc_models.FormResponder)
+        self.assertEqual(
+            fc_admin.FormResponderAdmin.document_answers(None, responder),
+            "-",
+        )
+
+    def test_save_formset_deleted(self):
+        """Test that deleting responses from the inline discards the exports
+        and summary of the form.
+        """
+        responder = baker.make(fc_models.FormResponder)
+        formset = mock.Mock(instance=responder, deleted_objects=[mock.Mock()])
+        model_admin = fc_admin.FormResponderAdmin(
+            fc_models.FormResponder, admin.site
+        )
+        with mock.patch.object(
+            fc_admin.fc_signals, "responses_changed"
+        ) as mock_changed:
+            model_admin.save_formset(None, None, formset, True)
+        formset.save.assert_called_once_with()
+        mock_changed.assert_called_once_with(responder.form_id)
+
+        formset.deleted_objects = []
+        with mock.patch.object(
+            fc_admin.fc_signals, "responses_changed"
+        ) as mock_changed:
+            model_admin.save_formset(None, None, formset, True)
+        mock_changed.assert_not_called()
+
+    def test_change_page(self):
+        """Test that the change page of a document responder lists the
+        answers.
+        """
+        user = baker.make(fc_models.User, is_staff=True, is_superuser=True)
+        question = baker.make(fc_models.FormQuestion, question="Colour?")
+        responder = baker.make(
+            fc_models.FormResponder,
+            form=question.form,
+            answers={str(question.id): "Blue"},
+        )
+        client = Client()
+        client.force_login(user)
+        response = client.get(
+            reverse(
+                "admin:form_creator_formresponder_change",
+                args=[responder.id],
+            )
+        )
+        self.assertContains(response, "<th>Colour?</th>", html=False)
+        self.assertContains(response, "<td>Blue</td>", html=False)
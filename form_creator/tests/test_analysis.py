@@ -0,0 +1,110 @@
+"""Tests for the `analysis` module."""
+
+import unittest
+from django.test import SimpleTestCase, TestCase
+from model_bakery import baker
+from .. import analysis as fc_analysis, models as fc_models
+from ..question_form_fields import FieldTypeChoices
+
+VALUES = [4.0, 1.0, 10.0, 2.0, 3.0, 2.5]
+
+
+class TestAnalysePython(SimpleTestCase):
+    """Tests for the `analyse_python` function."""
+
+    def test_analyse(self):
+        analysis = fc_analysis.analyse_python(VALUES, bins=3)
+        self.assertEqual(analysis.count, 6)
+        self.assertAlmostEqual(analysis.mean, 22.5 / 6)
+        self.assertAlmostEqual(analysis.std, (51.875 / 6) ** 0.5)
+        self.assertEqual((analysis.min, analysis.max), (1, 10))
+        self.assertEqual(
+            analysis.percentiles, {25: 2.125, 50: 2.75, 75: 3.75, 90: 7.0}
+        )
+        self.assertEqual(analysis.histogram, [4, 1, 1])
+        self.assertEqual(analysis.bin_edges, [1, 4, 7, 10])
+
+    def test_single_value(self):
+        """Test that a single value falls in the middle bin."""
+        analysis = fc_analysis.analyse_python([5], bins=2)
+        self.assertEqual(analysis.histogram, [0, 1])
+        self.assertEqual(analysis.bin_edges, [4.5, 5, 5.5])
+        self.assertEqual(analysis.std, 0)
+
+    def test_empty(self):
+        analysis = fc_analysis.analyse_python([], bins=2)
+        self.assertEqual(analysis.count, 0)
+        self.assertIsNone(analysis.mean)
+        self.assertEqual(analysis.histogram, [0, 0])
+
+
+@unittest.skipUnless(fc_analysis.numpy, "NumPy not installed")
+class TestAnalyseNumpy(SimpleTestCase):
+    """Tests for the `analyse_numpy` function."""
+
+    def test_matches_python(self):
+        """Test that the results match those worked out in pure Python."""
+        for values in (VALUES, [5.0], []):
+            with self.subTest(values=values):
+                expected = fc_analysis.analyse_python(values, bins=3)
+                analysis = fc_analysis.analyse_numpy(values, bins=3)
+                self.assertEqual(analysis.count, expected.count)
+                self.assertEqual(analysis.histogram, expected.histogram)
+                for name in ("mean", "std", "min", "max"):
+                    self.assertAlmostEqual(
+                        getattr(analysis, name), getattr(expected, name)
+                    )
+                for percentile, value in expected.percentiles.items():
+                    self.assertAlmostEqual(
+                        analysis.percentiles[percentile], value
+                    )
+
+
+class TestAnalyseQuestion(TestCase):
+    """Tests for the `analyse_question` function."""
+
+    def test_analyse(self):
+        """Test that only the numeric answers to the question are read."""
+        question = baker.make(
+            fc_models.FormQuestion, field_type=FieldTypeChoices.DECIMAL
+        )
+        for answer in ("1.5", "2.5", "", "not a number"):
+            baker.make(
+                fc_models.FormResponse, question=question, answer=answer
+            )
+        baker.make(
+            fc_models.FormResponse,
+            question__field_type=FieldTypeChoices.INTEGER,
+            answer="100",
+        )
+        with self.assertNumQueries(2):
+            analysis = fc_analysis.analyse_question(question)
+        self.assertEqual(analysis.count, 2)
+        self.assertEqual(analysis.mean, 2)
+
+    def test_documents(self):
+        """Test that numeric answers stored as documents are analysed along
+        with those stored as responses.
+        """
+        question = baker.make(
+            fc_models.FormQuestion, field_type=FieldTypeChoices.INTEGER
+        )
+        baker.make(fc_models.FormResponse, question=question, answer="1")
+        for answers in (
+            {str(question.id): "5"},
+            {str(question.id): ""},
+            {str(question.id + 1): "100"},
+        ):
+            baker.make(
+                fc_models.FormResponder, form=question.form, answers=answers
+            )
+        baker.make(fc_models.FormResponder, answers={str(question.id): "50"})
+
+        analysis = fc_analysis.analyse_question(question)
+        self.assertEqual(analysis.count, 2)
+        self.assertEqual((analysis.min, analysis.max), (1, 5))
+
+    def test_not_numeric(self):
+        question = baker.make(fc_models.FormQuestion)
+        with self.assertRaises(ValueError):
+            fc_analysis.analyse_question(question)
@@ -0,0 +1,254 @@
+"""Tests for the `async_views` module."""
+
+import gzip
+import shutil
+import tempfile
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.http import FileResponse
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import include, path, reverse
+from django.utils import timezone
+from model_bakery import baker
+from .. import models as fc_models
+from ..question_form_fields import FieldTypeChoices
+
+User = get_user_model()
+
+urlpatterns = [path("", include("form_creator.async_urls"))]
+
+
+async def _content(response) -> bytes:
+    """Read the content of an async streaming response."""
+    return b"".join([chunk async for chunk in response.streaming_content])
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = baker.make(User)
+        cls.user = baker.make(User)
+        cls.form = baker.make(
+            fc_models.Form,
+            owner=cls.owner,
+            status=fc_models.Form.StatusChoices.ACTIVE,
+            start_dt=timezone.now() - timezone.timedelta(days=1),
+        )
+        cls.text_q = baker.make(
+            fc_models.FormQuestion,
+            form=cls.form,
+            question="What is your name?",
+            required=True,
+        )
+        cls.choice_q = baker.make(
+            fc_models.FormQuestion,
+            form=cls.form,
+            field_type=FieldTypeChoices.CHOICE,
+            choices="a|b|c",
+        )
+        cls.form.refresh_from_db()
+
+    def setUp(self):
+        self.client = AsyncClient()
+
+    async def login(self, user: User) -> None:
+        """Log the user in. The session is saved synchronously."""
+        await sync_to_async(self.client.force_login)(user)
+
+    def url(self, name: str) -> str:
+        """Get the URL of a view for the form."""
+        return reverse(
+            f"form_creator:{name}",
+            kwargs={"pk": self.form.id, "slug": self.form.slug},
+        )
+
+
+class TestFormListView(AsyncViewsTestCase):
+    async def test_lists_live_forms(self):
+        """Test that live forms are listed."""
+        await self.login(self.user)
+        response = await self.client.get(reverse("form_creator:form_list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, self.form.title)
+
+
+class TestFormDetailView(AsyncViewsTestCase):
+    async def test_owner(self):
+        """Test that the owner sees the questions."""
+        await self.login(self.owner)
+        response = await self.client.get(self.url("form_detail"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["can_edit"])
+        self.assertContains(response, self.text_q.question)
+
+    async def test_responder(self):
+        """Test that a user who can respond is told so."""
+        await self.login(self.user)
+        response = await self.client.get(self.url("form_detail"))
+        self.assertFalse(response.context["can_edit"])
+        self.assertTrue(response.context["can_complete_form"])
+        self.assertNotContains(response, self.text_q.question)
+
+    async def test_not_found(self):
+        """Test that a 404 is returned for a form which does not exist."""
+        response = await self.client.get(
+            reverse(
+                "form_creator:form_detail",
+                kwargs={"pk": self.form.id, "slug": "other"},
+            )
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class TestFormResponseView(AsyncViewsTestCase):
+    def data(self) -> dict:
+        """Get a valid submission."""
+        return {
+            f"question_{self.text_q.id}": "text answer",
+            f"question_{self.choice_q.id}": "b",
+        }
+
+    async def test_login_required(self):
+        """Test that anonymous users are sent to log in."""
+        response = await self.client.get(self.url("form_response"))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("login", response.url)
+
+    async def test_get(self):
+        """Test that the form is shown."""
+        await self.login(self.user)
+        response = await self.client.get(self.url("form_response"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f"question_{self.text_q.id}")
+
+    async def test_post(self):
+        """Test that a submission is saved."""
+        await self.login(self.user)
+        response = await self.client.post(
+            self.url("form_response"), self.data()
+        )
+        self.assertEqual(response.status_code, 302)
+        form_responder = await fc_models.FormResponder.objects.aget(
+            form=self.form, user=self.user
+        )
+        self.assertEqual(await form_responder.responses.acount(), 2)
+
+    async def test_post_invalid(self):
+        """Test that an invalid submission is shown again."""
+        await self.login(self.user)
+        response = await self.client.post(self.url("form_response"), {})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(await fc_models.FormResponder.objects.aexists())
+
+    @override_settings(FORM_CREATOR_BUFFER_SUBMISSIONS=True)
+    async def test_post_buffered(self):
+        """Test that a submission is staged when submissions are
+        buffered.
+        """
+        await self.login(self.user)
+        response = await self.client.post(
+            self.url("form_response"), self.data()
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(await fc_models.FormResponder.objects.aexists())
+        self.assertTrue(await fc_models.PendingSubmission.objects.aexists())
+
+    async def test_completed(self):
+        """Test that a user who has responded is redirected."""
+        await fc_models.FormResponder.objects.acreate(
+            form=self.form, user=self.user
+        )
+        await self.login(self.user)
+        response = await self.client.get(self.url("form_response"))
+        self.assertEqual(response.status_code, 302)
+
+
+class TestDownloads(AsyncViewsTestCase):
+    async def asetUp(self):
+        await self.login(self.owner)
+        await fc_models.FormResponse.objects.acreate(
+            form_responder=await fc_models.FormResponder.objects.acreate(
+                form=self.form, user=self.user
+            ),
+            question=self.text_q,
+            answer="streamed answer",
+        )
+
+    async def test_responses(self):
+        """Test that the responses are streamed from an async iterator."""
+        await self.asetUp()
+        response = await self.client.get(self.url("download_responses"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        content = (await _content(response)).decode()
+        self.assertIn("streamed answer", content)
+
+    async def test_wide_responses(self):
+        """Test that the wide layout is streamed."""
+        await self.asetUp()
+        response = await self.client.get(
+            self.url("download_responses"), {"layout": "wide"}
+        )
+        lines = (await _content(response)).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn(self.text_q.question, lines[0])
+        self.assertIn("streamed answer", lines[1])
+
+    async def test_incremental(self):
+        """Test that the cursor headers are set."""
+        await self.asetUp()
+        response = await self.client.get(
+            self.url("download_responses"), {"after_id": 0}
+        )
+        self.assertIn("X-Export-Cursor-Id", response)
+        await _content(response)
+
+    async def test_questions_compressed(self):
+        """Test that the questions can be downloaded compressed."""
+        await self.asetUp()
+        response = await self.client.get(
+            self.url("download_questions"), {"compression": "gzip"}
+        )
+        content = gzip.decompress(await _content(response)).decode()
+        self.assertIn(self.text_q.question, content)
+
+    async def test_not_editor(self):
+        """Test that only editors can download the responses."""
+        await self.login(self.user)
+        response = await self.client.get(self.url("download_responses"))
+        self.assertEqual(response.status_code, 403)
+
+    async def test_cached(self):
+        """Test that exports are rendered and then read from the cache as
+        they are sent.
+        """
+        await self.asetUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with self.settings(
+            MEDIA_ROOT=media_root, FORM_CREATOR_EXPORT_CACHE=True
+        ):
+            response = await self.client.get(self.url("download_responses"))
+            self.assertNotIsInstance(response, FileResponse)
+            self.assertTrue(response.is_async)
+            self.assertIn(b"streamed answer", await _content(response))
+            response.close()
+
+            response = await self.client.get(self.url("download_responses"))
+            self.assertIsInstance(response, FileResponse)
+            self.assertTrue(response.is_async)
+            self.assertIn(b"streamed answer", await _content(response))
+            response.close()
+
+
+class TestFormSummary(AsyncViewsTestCase):
+    async def test_summary(self):
+        """Test that the summary is returned as JSON."""
+        await self.login(self.owner)
+        response = await self.client.get(self.url("form_summary"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [question["id"] for question in response.json()["questions"]],
+            [self.text_q.id, self.choice_q.id],
+        )
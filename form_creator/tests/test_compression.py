@@ -0,0 +1,118 @@
+"""Tests for the `compression` module."""
+
+import gzip
+import unittest
+from django.test import SimpleTestCase
+import mock
+from .. import compression as fc_compression
+
+
+class TestCompressStream(SimpleTestCase):
+    """Tests for the `compress_stream` function."""
+
+    chunks = ["a,b\r\n", b"c,d\r\n", "é,f\r\n"]
+    expected = "a,b\r\nc,d\r\né,f\r\n".encode("utf-8")
+
+    def test_gzip(self):
+        """Test that the gzip output decompresses to the input."""
+        compressed = b"".join(
+            fc_compression.compress_stream(self.chunks, fc_compression.GZIP)
+        )
+        self.assertEqual(gzip.decompress(compressed), self.expected)
+
+    def test_is_lazy(self):
+        """Test that the chunks are only consumed as output is requested."""
+        consumed = []
+
+        def chunks():
+            for chunk in self.chunks:
+                consumed.append(chunk)
+                yield chunk
+
+        stream = fc_compression.compress_stream(chunks(), fc_compression.GZIP)
+        self.assertEqual(consumed, [])
+        next(stream)
+        self.assertLess(len(consumed), len(self.chunks) + 1)
+
+    @unittest.skipUnless(fc_compression.zstandard, "zstandard not installed")
+    def test_zstd(self):
+        """Test that the zstd output decompresses to the input."""
+        compressed = b"".join(
+            fc_compression.compress_stream(self.chunks, fc_compression.ZSTD)
+        )
+        self.assertEqual(
+            fc_compression.zstandard.ZstdDecompressor()
+            .decompressobj()
+            .decompress(compressed),
+            self.expected,
+        )
+
+    def test_unsupported(self):
+        """Test that an unknown method is rejected."""
+        with self.assertRaises(ValueError):
+            fc_compression.compress_stream(self.chunks, "lzma")
+
+
+class TestACompressStream(SimpleTestCase):
+    """Tests for the `acompress_stream` function."""
+
+    async def test_gzip(self):
+        """Test that the gzip output decompresses to the input."""
+
+        async def chunks():
+            for chunk in TestCompressStream.chunks:
+                yield chunk
+
+        compressed = b"".join(
+            [
+                data
+                async for data in fc_compression.acompress_stream(
+                    chunks(), fc_compression.GZIP
+                )
+            ]
+        )
+        self.assertEqual(
+            gzip.decompress(compressed), TestCompressStream.expected
+        )
+
+    def test_unsupported(self):
+        """Test that an unknown method is rejected before streaming."""
+        with self.assertRaises(ValueError):
+            fc_compression.acompress_stream(None, "lzma")
+
+
+class TestAcceptedMethod(SimpleTestCase):
+    """Tests for the `accepted_method` function."""
+
+    def test_gzip(self):
+        """Test that gzip is picked when accepted."""
+        with mock.patch.object(fc_compression, "zstandard", None):
+            self.assertEqual(
+                fc_compression.accepted_method("gzip, deflate, br"),
+                fc_compression.GZIP,
+            )
+
+    def test_prefers_zstd(self):
+        """Test that zstd is preferred when available and accepted."""
+        with mock.patch.object(fc_compression, "zstandard", object()):
+            self.assertEqual(
+                fc_compression.accepted_method("gzip, zstd"),
+                fc_compression.ZSTD,
+            )
+
+    def test_zstd_unavailable(self):
+        """Test that zstd is not picked when the library is missing."""
+        with mock.patch.object(fc_compression, "zstandard", None):
+            self.assertIsNone(fc_compression.accepted_method("zstd"))
+
+    def test_refused(self):
+        """Test that a method with a quality of zero is not picked."""
+        self.assertIsNone(fc_compression.accepted_method("gzip;q=0, br"))
+        self.assertEqual(
+            fc_compression.accepted_method("gzip;q=0.5"),
+            fc_compression.GZIP,
+        )
+
+    def test_none(self):
+        """Test that nothing is picked without the header."""
+        self.assertIsNone(fc_compression.accepted_method(""))
@@ -1,7 +1,9 @@
+from django.contrib.auth.models import AnonymousUser
 from django.core.exceptions import PermissionDenied
 from django.http import HttpResponse, Http404
-from django.test import TestCase
-from django.test.client import RequestFactory
+from django.test import SimpleTestCase, TestCase
+from django.test.client import AsyncRequestFactory, RequestFactory
+import mock
 from model_bakery import baker
 from .. import decorators, models as fc_models
 
@@ -101,3 +103,167 @@ class TestWithFormDecorator(TestCase):
 
         with self.assertRaises(PermissionDenied):
             a_view(request, pk=self.form.pk, slug=self.form.slug)
+
+
+class TestGetForm(TestCase):
+    """Tests for the `get_form` function."""
+
+    def setUp(self):
+        self.user = baker.make(fc_models.User)
+        self.form = baker.make(
+            fc_models.Form, editors=baker.make(fc_models.User, _quantity=2)
+        )
+        self.request = RequestFactory().get("/")
+        self.request.user = self.user
+
+    def test_fetched_once(self):
+        """Test that the form and the user's relationship to it are fetched
+        in a single query, once per request.
+        """
+        with self.assertNumQueries(1):
+            form = decorators.get_form(
+                self.request, self.form.pk, self.form.slug
+            )
+            self.assertFalse(form.can_edit(self.user))
+            self.assertFalse(form.can_delete(self.user))
+            self.assertIsNone(form.completed_by(self.user))
+        with self.assertNumQueries(0):
+            self.assertIs(
+                decorators.get_form(
+                    self.request, str(self.form.pk), self.form.slug
+                ),
+                form,
+            )
+            self.assertFalse(form.can_complete_form(self.user))
+
+    def test_wrong_slug(self):
+        """Test that a 404 is raised when a form already fetched is asked for
+        with another slug.
+        """
+        decorators.get_form(self.request, self.form.pk, self.form.slug)
+        with self.assertRaises(Http404):
+            decorators.get_form(self.request, self.form.pk, "abc")
+
+    def test_other_requests(self):
+        """Test that the form is fetched again for another request."""
+        form = decorators.get_form(self.request, self.form.pk, self.form.slug)
+        request = RequestFactory().get("/")
+        request.user = self.user
+        self.assertIsNot(
+            decorators.get_form(request, self.form.pk, self.form.slug), form
+        )
+
+
+class TestRedirectIfFormCompletedDecorator(TestCase):
+    """Tests for the `redirect_if_form_completed` decorator."""
+
+    def setUp(self):
+        self.user = baker.make(fc_models.User)
+        self.form = baker.make(fc_models.Form, owner=self.user)
+
+        @decorators.with_form(can_edit=True)
+        @decorators.redirect_if_form_completed("/done/")
+        def a_view(request, form):
+            return HttpResponse()
+
+        self.view = a_view
+
+    def request(self):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        # Messages are added when the form has been completed.
+        request._messages = mock.MagicMock()
+        return request
+
+    def test_single_query(self):
+        """Test that the form, the user's permissions and their response are
+        checked in a single query.
+        """
+        request = self.request()
+        with self.assertNumQueries(1):
+            response = self.view(request, pk=self.form.pk, slug=self.form.slug)
+        self.assertEqual(response.status_code, 200)
+
+    def test_completed(self):
+        """Test that a user who has completed the form is redirected."""
+        baker.make(fc_models.FormResponder, form=self.form, user=self.user)
+        response = self.view(
+            self.request(), pk=self.form.pk, slug=self.form.slug
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, "/done/")
+
+
+class TestAsyncWithFormDecorator(TestCase):
+    """Tests for the `with_form` decorator on async views."""
+
+    def setUp(self):
+        self.user = baker.make(fc_models.User)
+        self.factory = AsyncRequestFactory()
+        self.form = baker.make(fc_models.Form)
+
+    async def test_object_does_not_exist(self):
+        """Test that a 404 is raised when the form does not exist."""
+
+        @decorators.with_form()
+        async def a_view(request, form):
+            return HttpResponse()
+
+        request = self.factory.get("/")
+        request.user = self.user
+        with self.assertRaises(Http404):
+            await a_view(request, pk=self.form.pk, slug="abc")
+
+    async def test_can_edit_passes(self):
+        """Test that the form is passed to the view for its owner."""
+
+        @decorators.with_form(can_edit=True)
+        async def a_view(request, form):
+            return HttpResponse(form.title)
+
+        request = self.factory.get("/")
+        request.user = await fc_models.User.objects.aget(pk=self.form.owner_id)
+        response = await a_view(request, pk=self.form.pk, slug=self.form.slug)
+        self.assertEqual(response.content.decode(), self.form.title)
+
+    async def test_can_edit_fails(self):
+        """Test that the view is not loaded for a user who cannot edit."""
+
+        @decorators.with_form(can_edit=True)
+        async def a_view(request, form):
+            return HttpResponse()
+
+        request = self.factory.get("/")
+        request.user = self.user
+        with self.assertRaises(PermissionDenied):
+            await a_view(request, pk=self.form.pk, slug=self.form.slug)
+
+    async def test_fetched_once(self):
+        """Test that the form is only fetched once per request."""
+        request = self.factory.get("/")
+        request.user = self.user
+        form = await decorators.aget_form(
+            request, self.form.pk, self.form.slug
+        )
+        self.assertIs(
+            await decorators.aget_form(request, self.form.pk, self.form.slug),
+            form,
+        )
+        self.assertFalse(await form.acan_edit(self.user))
+
+
+class TestAsyncLoginRequired(SimpleTestCase):
+    """Tests for the `login_required` decorator on async views."""
+
+    async def test_redirects_anonymous_users(self):
+        """Test that anonymous users are sent to log in."""
+
+        @decorators.login_required
+        async def a_view(request):
+            return HttpResponse()
+
+        request = AsyncRequestFactory().get("/private/")
+        request.user = AnonymousUser()
+        response = await a_view(request)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("next=/private/", response.url)
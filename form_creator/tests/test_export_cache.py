@@ -0,0 +1,307 @@
+"""Tests for the `export_cache` module."""
+
+import gzip
+import shutil
+import tempfile
+from django.db import connection
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import FileResponse
+from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+import mock
+from .. import (
+    models as fc_models,
+    export_cache as fc_export_cache,
+    compression as fc_compression,
+)
+
+
+class ExportCacheTestCase(TestCase):
+    """Caches exports in a temporary media root."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        cache_settings = override_settings(
+            MEDIA_ROOT=self.media_root,
+            FORM_CREATOR_EXPORT_CACHE=True,
+        )
+        cache_settings.enable()
+        self.addCleanup(cache_settings.disable)
+
+        self.form = baker.make(fc_models.Form)
+        self.question = baker.make(fc_models.FormQuestion, form=self.form)
+        self.render = mock.Mock(return_value=iter(["a,b\r\n", "1,2\r\n"]))
+
+    def get(self, **headers):
+        """Get the cached responses export of the form."""
+        request = RequestFactory().get("/", **headers)
+        return fc_export_cache.cached_csv_response(
+            request,
+            self.form,
+            fc_export_cache.RESPONSES,
+            self.render,
+            "responses.csv",
+        )
+
+    def download(self, **headers):
+        """Download the cached responses export of the form in full, and get
+        the response and its content.
+        """
+        response = self.get(**headers)
+        content = b"".join(getattr(response, "streaming_content", []))
+        response.close()
+        return response, content
+
+    def cached_files(self):
+        """Get the names of the cached exports of the form."""
+        return fc_export_cache._list(self.form.id)
+
+
+class TestContentVersion(ExportCacheTestCase):
+    """Tests for the `content_version` function."""
+
+    def test_changes_with_new_response(self):
+        """Test that the responses version changes with a new response."""
+        version = fc_export_cache.content_version(
+            self.form, fc_export_cache.RESPONSES
+        )
+        baker.make(fc_models.FormResponse, form_responder__form=self.form)
+        self.assertNotEqual(
+            fc_export_cache.content_version(
+                self.form, fc_export_cache.RESPONSES
+            ),
+            version,
+        )
+
+    def test_questions_ignore_responses(self):
+        """Test that the questions version does not change with a new
+        response.
+        """
+        version = fc_export_cache.content_version(
+            self.form, fc_export_cache.QUESTIONS
+        )
+        baker.make(fc_models.FormResponse, form_responder__form=self.form)
+        self.assertEqual(
+            fc_export_cache.content_version(
+                self.form, fc_export_cache.QUESTIONS
+            ),
+            version,
+        )
+
+    def test_changes_with_question_edit(self):
+        """Test that editing a question gives the form a new version."""
+        version = self.form.version
+        self.question.question = "Edited"
+        self.question.save()
+        self.form.refresh_from_db()
+        self.assertNotEqual(self.form.version, version)
+
+
+class TestCachedCsvResponse(ExportCacheTestCase):
+    """Tests for the `cached_csv_response` function."""
+
+    def test_streams_then_serves_file(self):
+        """Test that the export is streamed as it is rendered, cached once
+        it has all been sent, and then served as a file.
+        """
+        response = self.get()
+        self.assertNotIsInstance(response, FileResponse)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn("responses.csv", response["Content-Disposition"])
+        self.assertIn("ETag", response)
+        content = iter(response.streaming_content)
+        self.assertEqual(next(content), b"a,b\r\n")
+        self.assertEqual(self.cached_files(), [])
+        self.assertEqual(b"".join(content), b"1,2\r\n")
+        self.assertEqual(len(self.cached_files()), 1)
+
+        response, content = self.download()
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(content, b"a,b\r\n1,2\r\n")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn("Last-Modified", response)
+
+    def test_renders_once(self):
+        """Test that an unchanged export is only rendered once."""
+        self.download()
+        self.download()
+        self.render.assert_called_once()
+
+    def test_not_cached_if_not_sent(self):
+        """Test that an export which is not sent in full is not cached."""
+        response = self.get()
+        next(iter(response.streaming_content))
+        response.close()
+        self.assertEqual(self.cached_files(), [])
+
+    def test_not_modified(self):
+        """Test that a repeat download returns a 304 response."""
+        first, _ = self.download()
+        response = self.get(HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], first["ETag"])
+
+        cached, _ = self.download()
+        response = self.get(HTTP_IF_MODIFIED_SINCE=cached["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_not_modified_before_cached(self):
+        """Test that a client with the current version is sent a 304
+        response without rendering the export, even if it is not cached.
+        """
+        first, _ = self.download()
+        fc_export_cache.invalidate(self.form.id)
+        response = self.get(HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.render.assert_called_once()
+
+    def test_new_response_renders_again(self):
+        """Test that a new response replaces the cached export."""
+        first, _ = self.download()
+        baker.make(fc_models.FormResponse, form_responder__form=self.form)
+        self.render.return_value = iter(["a,b\r\n"])
+
+        response, content = self.download(HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+        self.assertEqual(content, b"a,b\r\n")
+        self.assertEqual(len(self.cached_files()), 1)
+
+    def test_unpublished_copies(self):
+        """Test that copies which were never published, such as those left
+        by a request which failed, are not served, do not stop the export
+        from being cached, and are deleted once it is.
+        """
+        version = fc_export_cache.content_version(
+            self.form, fc_export_cache.RESPONSES
+        )
+        name = fc_export_cache.cache_name(
+            self.form.id, fc_export_cache.RESPONSES, version
+        )
+        for stale in (name, f"{name}.{'0' * 32}"):
+            default_storage.save(stale, ContentFile(b"a,b\r\n1,"))
+
+        _, content = self.download()
+        self.assertEqual(content, b"a,b\r\n1,2\r\n")
+        (copy,) = self.cached_files()
+        self.assertEqual(fc_export_cache._published(name), copy)
+
+        response, content = self.download()
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(content, b"a,b\r\n1,2\r\n")
+        self.render.assert_called_once()
+
+    def test_published_once(self):
+        """Test that a copy is discarded if another request has published
+        the export first.
+        """
+        first = self.get()
+        self.render.return_value = iter(["a,b\r\n", "1,2\r\n"])
+        second = self.get()
+        b"".join(first.streaming_content)
+        b"".join(second.streaming_content)
+        self.assertEqual(len(self.cached_files()), 1)
+
+    def test_invalidate_deletes_markers(self):
+        """Test that the marker publishing an export is deleted along with
+        it.
+        """
+        self.download()
+        fc_export_cache.invalidate(self.form.id)
+        self.assertEqual(
+            default_storage.listdir(fc_export_cache._directory(self.form.id)),
+            ([], []),
+        )
+
+    def test_compressed(self):
+        """Test that compressed exports are cached separately."""
+        request = RequestFactory().get("/")
+        response = fc_export_cache.cached_csv_response(
+            request,
+            self.form,
+            fc_export_cache.RESPONSES,
+            self.render,
+            "responses.csv",
+            compression=fc_compression.GZIP,
+            content_encoding=True,
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(
+            gzip.decompress(b"".join(response.streaming_content)),
+            b"a,b\r\n1,2\r\n",
+        )
+        response.close()
+
+        self.render.return_value = iter(["a,b\r\n", "1,2\r\n"])
+        self.download()
+        self.assertEqual(len(self.cached_files()), 2)
+
+
+class TestInvalidation(ExportCacheTestCase):
+    """Tests that cached exports are discarded when their content changes."""
+
+    def setUp(self):
+        super().setUp()
+        self.form_response = baker.make(
+            fc_models.FormResponse,
+            form_responder__form=self.form,
+            question=self.question,
+        )
+        self.download()
+
+    def test_question_edit(self):
+        """Test that editing a question discards the cached exports."""
+        self.question.save()
+        self.assertEqual(self.cached_files(), [])
+
+    def test_response_edit(self):
+        """Test that editing a response discards the cached exports."""
+        self.form_response.answer = "Edited"
+        self.form_response.save()
+        self.assertEqual(self.cached_files(), [])
+
+    def test_responder_delete(self):
+        """Test that deleting a responder discards the cached exports."""
+        self.form_response.form_responder.delete()
+        self.assertEqual(self.cached_files(), [])
+
+    def test_form_delete(self):
+        """Test that deleting a form discards its cached exports in a number
+        of queries which does not grow with its responses.
+        """
+        self.form.delete()
+        self.assertEqual(self.cached_files(), [])
+
+        queries = []
+        for count in (1, 10):
+            form = baker.make(fc_models.Form)
+            question = baker.make(fc_models.FormQuestion, form=form)
+            baker.make(
+                fc_models.FormResponse,
+                form_responder__form=form,
+                question=question,
+                _quantity=count,
+            )
+            with CaptureQueriesContext(connection) as captured:
+                form.delete()
+            queries.append(len(captured))
+        self.assertEqual(queries[0], queries[1])
+
+    def test_other_forms_kept(self):
+        """Test that changes to other forms keep the cached exports."""
+        baker.make(fc_models.FormQuestion)
+        self.assertEqual(len(self.cached_files()), 1)
+
+    def test_disabled(self):
+        """Test that nothing is deleted when the cache is disabled."""
+        with override_settings(FORM_CREATOR_EXPORT_CACHE=False):
+            self.question.save()
+        self.assertEqual(len(self.cached_files()), 1)
+
+    def test_invalidate_missing(self):
+        """Test that invalidating a form without cached exports is fine."""
+        fc_export_cache.invalidate(0)
+        self.assertFalse(default_storage.exists(fc_export_cache._directory(0)))
@@ -1,7 +1,14 @@
 """This module contains tests for the `exporters` module."""
 
+import io
+import zipfile
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.db import connection
 from django.test import TestCase
-from django.http import HttpResponse
+from django.test.utils import CaptureQueriesContext
+from django.http import HttpResponse, StreamingHttpResponse
+import mock
 from model_bakery import baker
 from .. import models as fc_models, exporters as fc_exporters
 
@@ -52,3 +59,649 @@ class TestExportResponses(TestCase):
                 str(form_response.form_responder.created_dt), content
             )
             self.assertIn(form_response.question.question, content)
+
+
+class TestStreamResponses(TestCase):
+    """Tests for the `stream_responses` function."""
+
+    def setUp(self):
+        self.responses = baker.make(fc_models.FormResponse, _quantity=3)
+
+    def test_header_is_yielded_first(self):
+        """Test that the header is yielded on its own before any rows."""
+        lines = fc_exporters.stream_responses(
+            fc_models.FormResponse.objects.all()
+        )
+        self.assertEqual(
+            next(lines),
+            ",".join(fc_exporters.RESPONSE_HEADERS) + "\r\n",
+        )
+
+    def test_matches_export_responses(self):
+        """Test that the streamed content matches the written content."""
+        output = io.StringIO()
+        fc_exporters.export_responses(
+            fc_models.FormResponse.objects.all(), output
+        )
+        streamed = "".join(
+            fc_exporters.stream_responses(fc_models.FormResponse.objects.all())
+        )
+        self.assertEqual(streamed, output.getvalue())
+
+    def test_rows_are_batched(self):
+        """Test that rows are yielded in batches."""
+        with mock.patch.object(fc_exporters, "STREAM_BATCH_SIZE", 2):
+            chunks = list(
+                fc_exporters.stream_responses(
+                    fc_models.FormResponse.objects.all()
+                )
+            )
+        # Header, a batch of two rows and a batch of the remaining row.
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(chunks[1].count("\r\n"), 2)
+        self.assertEqual(chunks[2].count("\r\n"), 1)
+
+
+class TestStreamingCsvResponse(TestCase):
+    """Tests for the `streaming_csv_response` function."""
+
+    def test_headers(self):
+        """Test that the response is a CSV attachment."""
+        response = fc_exporters.streaming_csv_response(["a,b\r\n"], "x.csv")
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(
+            response["Content-Disposition"], "attachment; filename=x.csv"
+        )
+        self.assertEqual(b"".join(response.streaming_content), b"a,b\r\n")
+
+
+class TestQuestionRows(TestCase):
+    """Tests for the `question_rows` function."""
+
+    def test_related_question(self):
+        """Test that the related question is rendered like its `__str__`."""
+        related = baker.make(fc_models.FormQuestion)
+        baker.make(fc_models.FormQuestion, related_question=related)
+        rows = list(
+            fc_exporters.question_rows(
+                fc_models.FormQuestion.objects.filter(
+                    related_question__isnull=False
+                )
+            )
+        )
+        self.assertEqual(rows[0][6], str(related))
+
+    def test_no_related_question(self):
+        """Test that a missing related question is left blank."""
+        baker.make(fc_models.FormQuestion, required=True)
+        row = next(
+            fc_exporters.question_rows(fc_models.FormQuestion.objects.all())
+        )
+        self.assertIsNone(row[6])
+        self.assertEqual(row[3], "Yes")
+
+    def test_single_query(self):
+        """Test that the rows are fetched in a single query."""
+        baker.make(fc_models.FormQuestion, _quantity=5)
+        with self.assertNumQueries(1):
+            list(
+                fc_exporters.question_rows(
+                    fc_models.FormQuestion.objects.all()
+                )
+            )
+
+
+class TestResponseRows(TestCase):
+    """Tests for the `response_rows` function."""
+
+    def test_single_query(self):
+        """Test that the rows are fetched in a single query regardless of the
+        number of responses.
+        """
+        baker.make(fc_models.FormResponse, _quantity=5)
+        with self.assertNumQueries(1):
+            rows = list(
+                fc_exporters.response_rows(
+                    fc_models.FormResponse.objects.all()
+                )
+            )
+        self.assertEqual(len(rows), 5)
+
+    def test_columns(self):
+        """Test that the row contains the expected values."""
+        form_response = baker.make(fc_models.FormResponse, answer="yes")
+        responder = form_response.form_responder
+        self.assertEqual(
+            next(
+                fc_exporters.response_rows(
+                    fc_models.FormResponse.objects.all()
+                )
+            ),
+            (
+                responder.form.title,
+                responder.user.username,
+                responder.user.email,
+                responder.created_dt,
+                form_response.question.question,
+                "yes",
+            ),
+        )
+
+
+class TestWideResponses(TestCase):
+    """Tests for the wide response export."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.form = baker.make(fc_models.Form)
+        cls.q2 = baker.make(fc_models.FormQuestion, form=cls.form, seq_no=2)
+        cls.q1 = baker.make(fc_models.FormQuestion, form=cls.form, seq_no=1)
+        cls.responder_1 = baker.make(fc_models.FormResponder, form=cls.form)
+        cls.responder_2 = baker.make(fc_models.FormResponder, form=cls.form)
+        baker.make(
+            fc_models.FormResponse,
+            form_responder=cls.responder_1,
+            question=cls.q1,
+            answer="r1q1",
+        )
+        baker.make(
+            fc_models.FormResponse,
+            form_responder=cls.responder_1,
+            question=cls.q2,
+            answer="r1q2",
+        )
+        baker.make(
+            fc_models.FormResponse,
+            form_responder=cls.responder_2,
+            question=cls.q2,
+            answer="r2q2",
+        )
+        # A response to another form should not be included.
+        baker.make(fc_models.FormResponse)
+
+    def test_rows(self):
+        """Test that there is a row per responder with the answers in the
+        question order.
+        """
+        rows = list(
+            fc_exporters.wide_response_rows(
+                fc_models.FormResponse.objects.filter(
+                    form_responder__form=self.form
+                ),
+                [self.q1.id, self.q2.id],
+            )
+        )
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(
+            rows[0],
+            [
+                self.form.title,
+                self.responder_1.user.username,
+                self.responder_1.user.email,
+                self.responder_1.created_dt,
+                "r1q1",
+                "r1q2",
+            ],
+        )
+        self.assertEqual(rows[1][4:], [None, "r2q2"])
+
+    def test_stream_headers(self):
+        """Test that a column is added for each question in `seq_no`
+        order.
+        """
+        header = next(fc_exporters.stream_wide_responses(self.form))
+        self.assertEqual(
+            header,
+            ",".join(
+                fc_exporters.WIDE_RESPONSE_HEADERS
+                + [self.q1.question, self.q2.question]
+            )
+            + "\r\n",
+        )
+
+    def test_export_matches_stream(self):
+        """Test that the written content matches the streamed content."""
+        output = io.StringIO()
+        fc_exporters.export_wide_responses(self.form, output)
+        self.assertEqual(
+            output.getvalue(),
+            "".join(fc_exporters.stream_wide_responses(self.form)),
+        )
+
+
+class TestAsyncStreams(TestCase):
+    """Tests for the async versions of the streams."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.form = baker.make(fc_models.Form)
+        questions = baker.make(
+            fc_models.FormQuestion, form=cls.form, _quantity=2
+        )
+        for form_responder in baker.make(
+            fc_models.FormResponder, form=cls.form, _quantity=2
+        ):
+            for question in questions:
+                baker.make(
+                    fc_models.FormResponse,
+                    form_responder=form_responder,
+                    question=question,
+                )
+
+    async def collect(self, stream) -> str:
+        """Join the chunks of an async stream."""
+        return "".join([chunk async for chunk in stream])
+
+    async def test_questions(self):
+        """Test that the async stream matches the stream."""
+        form_questions = fc_models.FormQuestion.objects.filter(form=self.form)
+        self.assertEqual(
+            await self.collect(fc_exporters.astream_questions(form_questions)),
+            await sync_to_async(self.join)(
+                fc_exporters.stream_questions, form_questions
+            ),
+        )
+
+    async def test_responses(self):
+        """Test that the async stream matches the stream."""
+        form_responses = fc_models.FormResponse.objects.all()
+        self.assertEqual(
+            await self.collect(fc_exporters.astream_responses(form_responses)),
+            await sync_to_async(self.join)(
+                fc_exporters.stream_responses, form_responses
+            ),
+        )
+
+    async def test_wide_responses(self):
+        """Test that the async stream matches the stream."""
+        self.assertEqual(
+            await self.collect(fc_exporters.astream_wide_responses(self.form)),
+            await sync_to_async(self.join)(
+                fc_exporters.stream_wide_responses, self.form
+            ),
+        )
+
+    def join(self, stream, *args) -> str:
+        """Join the chunks of a stream."""
+        return "".join(stream(*args))
+
+
+class TestApplyCursor(TestCase):
+    """Tests for the `apply_cursor` function."""
+
+    def setUp(self):
+        self.responses = baker.make(fc_models.FormResponse, _quantity=3)
+
+    def test_after_id(self):
+        """Test that only responses after the id are included and the cursor
+        points at the latest one.
+        """
+        form_responses, cursor = fc_exporters.apply_cursor(
+            fc_models.FormResponse.objects.all(),
+            after_id=self.responses[0].id,
+        )
+        self.assertEqual(
+            list(form_responses), [self.responses[1], self.responses[2]]
+        )
+        self.assertEqual(cursor.last_id, self.responses[2].id)
+        self.assertEqual(
+            cursor.last_dt, self.responses[2].form_responder.created_dt
+        )
+
+    def test_after_dt(self):
+        """Test that only responses submitted after the time are included."""
+        form_responses, cursor = fc_exporters.apply_cursor(
+            fc_models.FormResponse.objects.all(),
+            after_dt=self.responses[1].form_responder.created_dt,
+        )
+        self.assertEqual(list(form_responses), [self.responses[2]])
+        self.assertEqual(cursor.last_id, self.responses[2].id)
+
+    def test_nothing_new(self):
+        """Test that the cursor is unchanged when there is nothing new."""
+        after_id = self.responses[2].id
+        form_responses, cursor = fc_exporters.apply_cursor(
+            fc_models.FormResponse.objects.all(), after_id=after_id
+        )
+        self.assertFalse(form_responses.exists())
+        self.assertEqual(cursor, fc_exporters.ExportCursor(after_id, None))
+
+    def test_capped_at_cursor(self):
+        """Test that responses arriving after the cursor was taken are left
+        for the next export.
+        """
+        form_responses, cursor = fc_exporters.apply_cursor(
+            fc_models.FormResponse.objects.all(), after_id=0
+        )
+        baker.make(fc_models.FormResponse)
+        self.assertEqual(form_responses.count(), 3)
+
+
+class TestDocuments(TestCase):
+    """Tests for exporting answers stored as documents."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.form = baker.make(fc_models.Form)
+        cls.q2 = baker.make(fc_models.FormQuestion, form=cls.form, seq_no=2)
+        cls.q1 = baker.make(fc_models.FormQuestion, form=cls.form, seq_no=1)
+        cls.row_responder = baker.make(fc_models.FormResponder, form=cls.form)
+        baker.make(
+            fc_models.FormResponse,
+            form_responder=cls.row_responder,
+            question=cls.q1,
+            answer="row",
+        )
+        cls.responder = baker.make(
+            fc_models.FormResponder,
+            form=cls.form,
+            # An answer to a deleted question is skipped.
+            answers={str(cls.q2.id): "d2", str(cls.q1.id): "d1", "0": "x"},
+        )
+
+    def form_responses(self):
+        return fc_models.FormResponse.objects.filter(
+            form_responder__form=self.form
+        )
+
+    def test_response_rows(self):
+        """Test that a row is added per answer in the question order."""
+        rows = list(
+            fc_exporters.response_rows(
+                self.form_responses(),
+                documents=fc_exporters.form_documents([self.form.id]),
+            )
+        )
+        self.assertEqual([row[-1] for row in rows], ["row", "d1", "d2"])
+        self.assertEqual(
+            rows[1],
+            (
+                self.form.title,
+                self.responder.user.username,
+                self.responder.user.email,
+                self.responder.created_dt,
+                self.q1.question,
+                "d1",
+            ),
+        )
+
+    def test_filtered(self):
+        """Test that the documents are narrowed like the responses."""
+        documents = fc_exporters.filter_documents(
+            fc_exporters.form_documents([self.form.id]),
+            question_ids=[self.q2.id],
+        )
+        rows = list(
+            fc_exporters.response_rows(
+                fc_models.FormResponse.objects.none(),
+                columns=["question", "answer"],
+                documents=documents,
+            )
+        )
+        self.assertEqual(rows, [(self.q2.question, "d2")])
+
+    def test_wide_rows(self):
+        """Test that the wide export includes a row per document."""
+        lines = "".join(
+            fc_exporters.stream_wide_responses(self.form)
+        ).splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[2].endswith(",d1,d2"))
+
+    async def test_async(self):
+        """Test that the async streams match the streams."""
+        documents = fc_exporters.form_documents([self.form.id])
+        self.assertEqual(
+            "".join(
+                [
+                    chunk
+                    async for chunk in fc_exporters.astream_responses(
+                        self.form_responses(), documents=documents
+                    )
+                ]
+            ),
+            await sync_to_async(
+                lambda: "".join(
+                    fc_exporters.stream_responses(
+                        self.form_responses(), documents=documents
+                    )
+                )
+            )(),
+        )
+        self.assertEqual(
+            "".join(
+                [
+                    chunk
+                    async for chunk in fc_exporters.astream_wide_responses(
+                        self.form
+                    )
+                ]
+            ),
+            await sync_to_async(
+                lambda: "".join(fc_exporters.stream_wide_responses(self.form))
+            )(),
+        )
+
+    def test_apply_document_cursor(self):
+        """Test that only documents submitted after the time are included
+        and the cursor is moved on to the latest.
+        """
+        documents = fc_exporters.form_documents([self.form.id])
+        cursor = fc_exporters.ExportCursor(None, None)
+        capped, cursor = fc_exporters.apply_document_cursor(documents, cursor)
+        self.assertEqual(list(capped.form_responders), [self.responder])
+        self.assertEqual(cursor.last_dt, self.responder.created_dt)
+
+        capped, cursor = fc_exporters.apply_document_cursor(
+            documents, cursor, after_dt=cursor.last_dt
+        )
+        self.assertFalse(capped.form_responders.exists())
+        self.assertEqual(cursor.last_dt, self.responder.created_dt)
+
+    def test_apply_document_cursor_id(self):
+        """Test that only documents of later responders are included, and
+        that the cursor keeps the later time of either kind of answer.
+        """
+        documents = fc_exporters.form_documents([self.form.id])
+        later = self.responder.created_dt + timedelta(days=1)
+        cursor = fc_exporters.ExportCursor(None, later)
+        capped, cursor = fc_exporters.apply_document_cursor(
+            documents, cursor, after_document_id=self.responder.id - 1
+        )
+        self.assertEqual(list(capped.form_responders), [self.responder])
+        self.assertEqual(
+            cursor,
+            fc_exporters.ExportCursor(None, later, self.responder.id),
+        )
+
+        capped, cursor = fc_exporters.apply_document_cursor(
+            documents, cursor, after_document_id=cursor.last_document_id
+        )
+        self.assertFalse(capped.form_responders.exists())
+        self.assertEqual(cursor.last_document_id, self.responder.id)
+
+
+class TestStreamZip(TestCase):
+    """Tests for the `stream_zip` function."""
+
+    def test_archive(self):
+        """Test that each member is written to the archive."""
+        content = b"".join(
+            fc_exporters.stream_zip(
+                [("a.csv", ["1,2\r\n", "3,4\r\n"]), ("b/c.csv", ["5\r\n"])]
+            )
+        )
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertEqual(archive.namelist(), ["a.csv", "b/c.csv"])
+            self.assertEqual(archive.read("a.csv"), b"1,2\r\n3,4\r\n")
+            self.assertEqual(archive.read("b/c.csv"), b"5\r\n")
+
+    def test_streamed(self):
+        """Test that the first member is yielded before the next member's
+        content is produced.
+        """
+        produced = []
+
+        def content(name):
+            produced.append(name)
+            yield name
+
+        chunks = fc_exporters.stream_zip(
+            (name, content(name)) for name in ("a", "b")
+        )
+        next(chunks)
+        self.assertEqual(produced, ["a"])
+
+
+class TestStreamFormArchive(TestCase):
+    """Tests for the `stream_form_archive` function."""
+
+    def test_archive(self):
+        """Test that each form has its own questions and responses files."""
+        responses = []
+        for form in baker.make(fc_models.Form, _quantity=2):
+            responses.append(
+                baker.make(
+                    fc_models.FormResponse,
+                    form_responder__form=form,
+                    question__form=form,
+                )
+            )
+        content = b"".join(
+            fc_exporters.stream_form_archive(fc_models.Form.objects.all())
+        )
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertEqual(len(archive.namelist()), 4)
+            for response in responses:
+                form = response.form_responder.form
+                directory = f"{form.id}-{form.slug}"
+                questions = archive.read(f"{directory}/questions.csv")
+                answers = archive.read(f"{directory}/responses.csv")
+                self.assertIn(
+                    response.question.question, questions.decode("utf-8")
+                )
+                self.assertEqual(len(answers.splitlines()), 2)
+                self.assertIn(
+                    response.form_responder.user.username,
+                    answers.decode("utf-8"),
+                )
+
+
+class TestFilterResponses(TestCase):
+    """Tests for the `filter_responses` function and column selection."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.form = baker.make(fc_models.Form)
+        cls.q1, cls.q2 = baker.make(
+            fc_models.FormQuestion, form=cls.form, _quantity=2
+        )
+        cls.responders = baker.make(
+            fc_models.FormResponder, form=cls.form, _quantity=2
+        )
+        for responder in cls.responders:
+            for question in (cls.q1, cls.q2):
+                baker.make(
+                    fc_models.FormResponse,
+                    form_responder=responder,
+                    question=question,
+                )
+
+    def responses(self):
+        """Get the responses to the form."""
+        return fc_models.FormResponse.objects.filter(
+            form_responder__form=self.form
+        )
+
+    def test_date_window(self):
+        """Test that only responses within the window are included."""
+        second = self.responders[1]
+        self.assertEqual(
+            set(
+                fc_exporters.filter_responses(
+                    self.responses(), start=second.created_dt
+                ).values_list("form_responder_id", flat=True)
+            ),
+            {second.id},
+        )
+        self.assertEqual(
+            set(
+                fc_exporters.filter_responses(
+                    self.responses(), end=second.created_dt
+                ).values_list("form_responder_id", flat=True)
+            ),
+            {self.responders[0].id},
+        )
+
+    def test_questions_and_responders(self):
+        """Test that only the given questions and responders are
+        included.
+        """
+        form_responses = fc_exporters.filter_responses(
+            self.responses(),
+            question_ids=[self.q2.id],
+            responder_ids=[self.responders[0].id],
+        )
+        self.assertEqual(
+            list(form_responses.values_list("form_responder_id", "question")),
+            [(self.responders[0].id, self.q2.id)],
+        )
+
+    def test_columns(self):
+        """Test that only the selected columns are read, without joining the
+        user table when it is not needed.
+        """
+        columns = ["question", "answer"]
+        self.assertEqual(
+            fc_exporters.response_headers(columns), ["Question", "Answer"]
+        )
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(
+                fc_exporters.response_rows(self.responses(), columns=columns)
+            )
+        self.assertEqual(len(rows[0]), 2)
+        self.assertNotIn(
+            fc_models.User._meta.db_table, queries.captured_queries[0]["sql"]
+        )
+
+    def test_columns_without_joins(self):
+        """Test that exporting only the answers reads the response table
+        alone, without joining or sorting on any other table.
+        """
+        form_responses = fc_models.FormResponse.objects.filter(
+            form_responder_id__in=[r.id for r in self.responders]
+        )
+        for queryset in (
+            form_responses,
+            fc_exporters.filter_responses(form_responses),
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                rows = list(
+                    fc_exporters.response_rows(queryset, columns=["answer"])
+                )
+            self.assertEqual(len(rows), 4)
+            sql = queries.captured_queries[0]["sql"]
+            self.assertNotIn("JOIN", sql)
+            for model in (
+                fc_models.User,
+                fc_models.Form,
+                fc_models.FormQuestion,
+                fc_models.FormResponder,
+            ):
+                self.assertNotIn(f'"{model._meta.db_table}"', sql)
+
+    def test_wide_columns(self):
+        """Test that the wide export can be limited to some questions and
+        leading columns.
+        """
+        content = "".join(
+            fc_exporters.stream_wide_responses(
+                self.form,
+                question_ids=[self.q2.id],
+                columns=["username"],
+            )
+        )
+        header, *rows = content.splitlines()
+        self.assertEqual(header, f"Username,{self.q2.question}")
+        self.assertEqual(len(rows), 2)
@@ -0,0 +1,294 @@
+"""Tests for the `form_cache` module."""
+
+import threading
+import time
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import Http404
+from django.test import TestCase, override_settings
+from django.test.client import RequestFactory
+import mock
+from model_bakery import baker
+from .. import decorators, form_cache as fc_form_cache, models as fc_models
+
+User = get_user_model()
+
+
+class FormCacheTestCase(TestCase):
+    """Starts each test with empty form caches."""
+
+    def setUp(self):
+        fc_form_cache._forms.clear()
+        cache.clear()
+        self.editor = baker.make(User)
+        self.form = baker.make(fc_models.Form, editors=[self.editor])
+
+
+class TestGetCachedForm(FormCacheTestCase):
+    """Tests for the `get_cached_form` function."""
+
+    def test_cached(self):
+        """Test that the form is only fetched once, and that the process can
+        then fall back on Django's cache.
+        """
+        with self.assertNumQueries(2):
+            cached = fc_form_cache.get_cached_form(self.form.id)
+        self.assertEqual(cached.form, self.form)
+        self.assertEqual(cached.editor_ids, {self.editor.id})
+
+        with self.assertNumQueries(0):
+            self.assertIs(fc_form_cache.get_cached_form(self.form.id), cached)
+        fc_form_cache._forms.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                fc_form_cache.get_cached_form(str(self.form.id)).form,
+                self.form,
+            )
+
+    @override_settings(FORM_CREATOR_FORM_CACHE_LOCAL_TIMEOUT=-1)
+    def test_local_timeout(self):
+        """Test that forms expire from the process-local cache."""
+        fc_form_cache.get_cached_form(self.form.id)
+        self.assertIsNone(fc_form_cache._local(self.form.id))
+
+    def test_missing(self):
+        """Test that None is returned for a form which does not exist."""
+        self.assertIsNone(fc_form_cache.get_cached_form(self.form.id + 1))
+
+    def test_single_flight(self):
+        """Test that a form requested by several threads at once is only
+        fetched once.
+        """
+        cached = fc_form_cache.CachedForm(self.form, frozenset())
+
+        def fetch(form_id):
+            time.sleep(0.05)
+            return cached
+
+        results = []
+        with mock.patch.object(
+            fc_form_cache, "_fetch", side_effect=fetch
+        ) as mock_fetch:
+            threads = [
+                threading.Thread(
+                    target=lambda: results.append(
+                        fc_form_cache.get_cached_form(self.form.id)
+                    )
+                )
+                for _ in range(5)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        mock_fetch.assert_called_once_with(self.form.id)
+        self.assertEqual(len(results), 5)
+
+    def test_waits_for_other_process(self):
+        """Test that a form being fetched by another process is read from
+        Django's cache once it is there.
+        """
+        cache.add(fc_form_cache._lock_key(self.form.id), True)
+        cached = fc_form_cache.CachedForm(self.form, frozenset())
+        with mock.patch.object(
+            fc_form_cache,
+            "_shared",
+            side_effect=[None, None, cached],
+        ), mock.patch.object(fc_form_cache, "_fetch") as mock_fetch:
+            self.assertIs(fc_form_cache.get_cached_form(self.form.id), cached)
+        mock_fetch.assert_not_called()
+
+    def test_other_process_stores_nothing(self):
+        """Test that waiting for another process stops once it releases its
+        lock without storing the form, as when there is no such form.
+        """
+        form_id = self.form.id + 1
+        cache.add(fc_form_cache._lock_key(form_id), True)
+        release = threading.Timer(
+            0.1, cache.delete, [fc_form_cache._lock_key(form_id)]
+        )
+        release.start()
+        self.addCleanup(release.cancel)
+
+        started = time.monotonic()
+        self.assertIsNone(fc_form_cache.get_cached_form(form_id))
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_wait_does_not_hold_lock(self):
+        """Test that waiting for another process does not stop this process
+        fetching other forms which share the same lock.
+        """
+        cache.add(fc_form_cache._lock_key(self.form.id), True)
+        with mock.patch.object(
+            fc_form_cache, "_shared", return_value=None
+        ), mock.patch.object(fc_form_cache, "_fetch", return_value=None):
+            waiting = threading.Thread(
+                target=fc_form_cache.get_cached_form, args=[self.form.id]
+            )
+            waiting.start()
+            time.sleep(0.1)
+            other_id = self.form.id + len(fc_form_cache._fill_locks)
+            self.assertTrue(
+                fc_form_cache._fill_lock(other_id).acquire(timeout=1)
+            )
+            fc_form_cache._fill_lock(other_id).release()
+            cache.delete(fc_form_cache._lock_key(self.form.id))
+            waiting.join()
+
+    def test_invalidated_while_fetched(self):
+        """Test that a form discarded while it was being fetched is not read
+        from either cache afterwards.
+        """
+        fetch = fc_form_cache._fetch
+
+        def fetch_and_invalidate(form_id):
+            cached = fetch(form_id)
+            fc_form_cache.invalidate(form_id)
+            return cached
+
+        with mock.patch.object(
+            fc_form_cache, "_fetch", side_effect=fetch_and_invalidate
+        ):
+            self.assertIsNotNone(fc_form_cache.get_cached_form(self.form.id))
+        self.assertIsNone(fc_form_cache._local(self.form.id))
+        self.assertIsNone(fc_form_cache._shared(self.form.id))
+        self.assertIsNotNone(cache.get(fc_form_cache._cache_key(self.form.id)))
+
+
+class TestAgetCachedForm(FormCacheTestCase):
+    """Tests for the `aget_cached_form` function."""
+
+    async def test_cached(self):
+        """Test that the form is fetched and then read from the caches."""
+        cached = await fc_form_cache.aget_cached_form(self.form.id)
+        self.assertEqual(cached.form, self.form)
+        self.assertEqual(cached.editor_ids, {self.editor.id})
+        self.assertIs(fc_form_cache._local(self.form.id), cached)
+        self.assertEqual(
+            (await fc_form_cache._ashared(self.form.id)).form, self.form
+        )
+
+    async def test_waits_for_other_process(self):
+        """Test that waiting for another process to fetch the form does not
+        block the thread.
+        """
+        await cache.aadd(fc_form_cache._lock_key(self.form.id), True)
+        cached = fc_form_cache.CachedForm(self.form, frozenset())
+        with mock.patch.object(
+            fc_form_cache,
+            "_ashared",
+            side_effect=[None, None, cached],
+        ), mock.patch.object(
+            fc_form_cache.time, "sleep"
+        ) as mock_sleep, mock.patch.object(
+            fc_form_cache, "_afetch"
+        ) as mock_fetch:
+            self.assertIs(
+                await fc_form_cache.aget_cached_form(self.form.id), cached
+            )
+        mock_sleep.assert_not_called()
+        mock_fetch.assert_not_called()
+
+    async def test_other_process_stores_nothing(self):
+        """Test that waiting for another process stops once it releases its
+        lock without storing the form.
+        """
+        await cache.aadd(fc_form_cache._lock_key(self.form.id), True)
+        with mock.patch.object(
+            fc_form_cache, "_ashared", return_value=None
+        ), mock.patch.object(
+            fc_form_cache.cache,
+            "aget",
+            side_effect=[True, None],
+        ):
+            cached = await fc_form_cache.aget_cached_form(self.form.id)
+        self.assertEqual(cached.form, self.form)
+
+
+class TestCachedForm(FormCacheTestCase):
+    """Tests for the `CachedForm` class."""
+
+    def test_for_user(self):
+        """Test that the copy of the form gives the user's permissions without
+        any queries and leaves the cached form as it is.
+        """
+        cached = fc_form_cache.get_cached_form(self.form.id)
+        with self.assertNumQueries(0):
+            form = cached.for_user(self.editor)
+            self.assertTrue(form.can_edit(self.editor))
+            self.assertFalse(form.can_delete(self.editor))
+            owner_form = cached.for_user(self.form.owner)
+            self.assertTrue(owner_form.can_delete(self.form.owner))
+            anon_form = cached.for_user(AnonymousUser())
+            self.assertFalse(anon_form.is_owner or anon_form.is_editor)
+        self.assertNotIn("is_editor", cached.form.__dict__)
+
+
+class TestInvalidation(FormCacheTestCase):
+    """Tests that the cached form is discarded when it changes."""
+
+    def assertDiscarded(self):
+        self.assertIsNone(fc_form_cache._local(self.form.id))
+        self.assertIsNone(cache.get(fc_form_cache._cache_key(self.form.id)))
+
+    def setUp(self):
+        super().setUp()
+        fc_form_cache.get_cached_form(self.form.id)
+
+    def test_form_saved(self):
+        self.form.save()
+        self.assertDiscarded()
+
+    def test_form_deleted(self):
+        self.form.delete()
+        self.assertDiscarded()
+
+    def test_question_saved(self):
+        baker.make(fc_models.FormQuestion, form=self.form)
+        self.assertDiscarded()
+
+    def test_editor_added(self):
+        self.form.editors.add(baker.make(User))
+        self.assertDiscarded()
+
+    def test_editor_removed_by_user(self):
+        """Test that changes to the editors from the user's side discard the
+        forms.
+        """
+        self.editor.editors.remove(self.form)
+        self.assertDiscarded()
+
+    def test_editor_cleared_by_user(self):
+        self.editor.editors.clear()
+        self.assertDiscarded()
+
+
+@override_settings(FORM_CREATOR_FORM_CACHE=True)
+class TestGetFormCached(FormCacheTestCase):
+    """Tests for `decorators.get_form` with the form cache enabled."""
+
+    def request(self):
+        request = RequestFactory().get("/")
+        request.user = self.editor
+        return request
+
+    def test_cached(self):
+        """Test that a cached form is used without any queries."""
+        decorators.get_form(self.request(), self.form.id, self.form.slug)
+        with self.assertNumQueries(0):
+            form = decorators.get_form(
+                self.request(), self.form.id, self.form.slug, can_edit=True
+            )
+        self.assertEqual(form, self.form)
+
+    def test_wrong_slug(self):
+        """Test that a 404 is raised for a cached form with another slug."""
+        with self.assertRaises(Http404):
+            decorators.get_form(self.request(), self.form.id, "abc")
+
+    def test_missing(self):
+        """Test that a 404 is raised when the form does not exist."""
+        with self.assertRaises(Http404):
+            decorators.get_form(self.request(), self.form.id + 1, "abc")
@@ -1,3 +1,4 @@
+from django.forms import ValidationError
 from django.test import SimpleTestCase
 from .. import form_fields
 
@@ -16,3 +17,24 @@ class TestFieldsLoad(SimpleTestCase):
     def test_time_field(self):
         """Test that the time field loads."""
         form_fields.TimeField()
+
+
+class TestIntegerListField(SimpleTestCase):
+    """Tests for the `IntegerListField` field."""
+
+    def test_values(self):
+        """Test that repeated and comma separated values are combined."""
+        field = form_fields.IntegerListField()
+        self.assertEqual(field.clean(["1,2", "3"]), [1, 2, 3])
+        self.assertEqual(field.clean("4, 5,"), [4, 5])
+
+    def test_empty(self):
+        """Test that no values gives an empty list."""
+        self.assertEqual(
+            form_fields.IntegerListField(required=False).clean([]), []
+        )
+
+    def test_invalid(self):
+        """Test that values which are not integers are rejected."""
+        with self.assertRaises(ValidationError):
+            form_fields.IntegerListField().clean(["1", "a"])
@@ -1,9 +1,14 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django import forms
 from django.forms import ValidationError
 from django.contrib.auth import get_user_model
+import mock
 from model_bakery import baker
-from .. import forms as fc_forms, models as fc_models
+from .. import (
+    compression as fc_compression,
+    forms as fc_forms,
+    models as fc_models,
+)
 from ..question_form_fields import FieldTypeChoices
 
 User = get_user_model()
@@ -140,6 +145,65 @@ class TestCaptureResponseForm(TestCase):
             [("a", "a"), ("b", "b"), ("c", "c")],
         )
 
+    @override_settings(FORM_CREATOR_ANSWER_STATS=True)
+    def test_save_queries(self):
+        """Test that the number of queries to save a response does not
+        depend on the number of questions.
+        """
+        baker.make(fc_models.FormQuestion, form=self.form, _quantity=10)
+        self.form.refresh_from_db()
+        form = fc_forms.CaptureResponseForm(self.form)
+        form = fc_forms.CaptureResponseForm(
+            self.form,
+            data={name: "a" for name in form.fields},
+        )
+        self.assertTrue(form.is_valid())
+        user = baker.make(User)
+
+        # Savepoint, responder, responses, choices, question and choice stats
+        # inserts and updates, and savepoint release.
+        with self.assertNumQueries(9):
+            form_responder = form.save(user)
+        self.assertEqual(form_responder.responses.count(), 12)
+
+    def test_save_without_stats(self):
+        """Test that the answer statistics are not kept by default."""
+        form = fc_forms.CaptureResponseForm(self.form)
+        form = fc_forms.CaptureResponseForm(
+            self.form,
+            data={name: "a" for name in form.fields},
+        )
+        self.assertTrue(form.is_valid())
+        form.save(baker.make(User))
+        self.assertFalse(fc_models.QuestionStats.objects.exists())
+        self.assertFalse(fc_models.ChoiceStats.objects.exists())
+
+    @override_settings(
+        FORM_CREATOR_RESPONSE_STORAGE="document",
+        FORM_CREATOR_ANSWER_STATS=False,
+    )
+    def test_save_document(self):
+        """Test that the answers are saved as a document in a single
+        insert.
+        """
+        form = fc_forms.CaptureResponseForm(
+            self.form,
+            data={
+                "question_%s" % self.text_q.id: "q1",
+                "question_%s" % self.choice_q.id: "a",
+            },
+        )
+        self.assertTrue(form.is_valid())
+        user = baker.make(User)
+
+        with self.assertNumQueries(1):
+            form_responder = form.save(user)
+        self.assertFalse(form_responder.responses.exists())
+        self.assertEqual(
+            form_responder.get_answers(),
+            {self.text_q.id: "q1", self.choice_q.id: "a"},
+        )
+
     def test_save(self):
         """Test that the form saves correctly."""
         form = fc_forms.CaptureResponseForm(
@@ -175,3 +239,22 @@ class TestCaptureResponseForm(TestCase):
             form_response.responses.get(question=self.choice_q).answer,
             "a",
         )
+
+
+class TestDownloadOptionsForm(TestCase):
+    """Tests for the `DownloadOptionsForm` class."""
+
+    def test_compression_choices(self):
+        """Test that only the compression methods available when the form is
+        built are offered.
+        """
+        with mock.patch.object(fc_compression, "zstandard", None):
+            form = fc_forms.DownloadOptionsForm({"compression": "zstd"})
+            self.assertEqual(
+                form.fields["compression"].choices, [("gzip", "gzip")]
+            )
+            self.assertFalse(form.is_valid())
+
+        with mock.patch.object(fc_compression, "zstandard", object()):
+            form = fc_forms.DownloadOptionsForm({"compression": "zstd"})
+            self.assertTrue(form.is_valid())
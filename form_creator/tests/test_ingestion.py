@@ -0,0 +1,133 @@
+"""Tests for the `ingestion` module."""
+
+import datetime
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from model_bakery import baker
+from .. import ingestion as fc_ingestion, models as fc_models
+
+User = get_user_model()
+
+
+class IngestionTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.form = baker.make(fc_models.Form)
+        cls.questions = baker.make(
+            fc_models.FormQuestion, form=cls.form, _quantity=2
+        )
+        cls.users = baker.make(User, _quantity=3)
+
+    def answers(self, answer="answer"):
+        """Get answers to each question."""
+        return {question.id: answer for question in self.questions}
+
+
+class TestEnqueue(IngestionTestCase):
+    """Tests for the `enqueue` function."""
+
+    def test_enqueue(self):
+        """Test that a submission is staged without writing responses."""
+        self.assertTrue(
+            fc_ingestion.enqueue(self.form, self.users[0], self.answers())
+        )
+        submission = fc_models.PendingSubmission.objects.get()
+        self.assertEqual(
+            submission.answers,
+            {str(question.id): "answer" for question in self.questions},
+        )
+        self.assertFalse(fc_models.FormResponder.objects.exists())
+
+    def test_answers_stored_as_text(self):
+        """Test that answers are converted to the text they are saved as."""
+        fc_ingestion.enqueue(
+            self.form,
+            self.users[0],
+            self.answers(datetime.date(2022, 1, 2)),
+        )
+        submission = fc_models.PendingSubmission.objects.get()
+        self.assertEqual(set(submission.answers.values()), {"2022-01-02"})
+
+    def test_enqueue_twice(self):
+        """Test that a user can only stage one submission per form."""
+        fc_ingestion.enqueue(self.form, self.users[0], self.answers())
+        self.assertFalse(
+            fc_ingestion.enqueue(self.form, self.users[0], self.answers())
+        )
+        self.assertEqual(fc_models.PendingSubmission.objects.count(), 1)
+
+
+class TestFlush(IngestionTestCase):
+    """Tests for the `flush` function."""
+
+    def test_flush(self):
+        """Test that staged submissions are written and removed."""
+        for user in self.users:
+            fc_ingestion.enqueue(self.form, user, self.answers(user.username))
+
+        self.assertEqual(fc_ingestion.flush(), 3)
+        self.assertFalse(fc_models.PendingSubmission.objects.exists())
+        for user in self.users:
+            form_responder = fc_models.FormResponder.objects.get(
+                form=self.form, user=user
+            )
+            self.assertEqual(
+                set(
+                    form_responder.responses.values_list("question", "answer")
+                ),
+                {(question.id, user.username) for question in self.questions},
+            )
+
+    @override_settings(FORM_CREATOR_ANSWER_STATS=True)
+    def test_batches(self):
+        """Test that submissions are written in batches of queries which do
+        not depend on the size of the batch.
+        """
+        for user in self.users:
+            fc_ingestion.enqueue(self.form, user, self.answers())
+
+        # Per batch: savepoint, select, responded, field types, responders,
+        # responses, question stats insert and update, delete and release.
+        with self.assertNumQueries(10 * 2):
+            self.assertEqual(fc_ingestion.flush(batch_size=2), 3)
+        self.assertEqual(
+            fc_models.FormResponse.objects.count(),
+            len(self.users) * len(self.questions),
+        )
+
+    @override_settings(FORM_CREATOR_RESPONSE_STORAGE="document")
+    def test_flush_documents(self):
+        """Test that staged submissions are written as documents."""
+        for user in self.users:
+            fc_ingestion.enqueue(self.form, user, self.answers(user.username))
+
+        self.assertEqual(fc_ingestion.flush(), 3)
+        self.assertFalse(fc_models.FormResponse.objects.exists())
+        form_responder = fc_models.FormResponder.objects.get(
+            form=self.form, user=self.users[0]
+        )
+        self.assertEqual(
+            form_responder.get_answers(),
+            {
+                question.id: self.users[0].username
+                for question in self.questions
+            },
+        )
+
+    def test_already_responded(self):
+        """Test that a submission from a user who has already responded is
+        discarded.
+        """
+        fc_ingestion.enqueue(self.form, self.users[0], self.answers("new"))
+        form_responder = baker.make(
+            fc_models.FormResponder, form=self.form, user=self.users[0]
+        )
+
+        self.assertEqual(fc_ingestion.flush(), 1)
+        self.assertFalse(fc_models.PendingSubmission.objects.exists())
+        self.assertEqual(fc_models.FormResponder.objects.get(), form_responder)
+        self.assertFalse(fc_models.FormResponse.objects.exists())
+
+    def test_empty(self):
+        """Test that flushing nothing writes nothing."""
+        self.assertEqual(fc_ingestion.flush(), 0)
@@ -0,0 +1,224 @@
+"""Tests for the `jobs` module."""
+
+import shutil
+import tempfile
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+import mock
+from model_bakery import baker
+from .. import jobs as fc_jobs, models as fc_models
+
+User = get_user_model()
+
+
+class JobsTestCase(TestCase):
+    """Writes job results to a temporary media root."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media_settings = override_settings(MEDIA_ROOT=self.media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+
+class TestCreateExportJob(TestCase):
+    """Tests for the `create_export_job` function."""
+
+    def test_create(self):
+        """Test that a pending job is created for the forms."""
+        user = baker.make(User)
+        forms = baker.make(fc_models.Form, _quantity=2)
+        job = fc_jobs.create_export_job(
+            user,
+            fc_models.ExportJob.KindChoices.RESPONSES,
+            fc_models.Form.objects.all(),
+        )
+        self.assertEqual(job.status, job.StatusChoices.PENDING)
+        self.assertEqual(job.requested_by, user)
+        self.assertEqual(set(job.forms.all()), set(forms))
+
+
+class TestClaimNextJob(TestCase):
+    """Tests for the `claim_next_job` function."""
+
+    def test_no_jobs(self):
+        """Test that `None` is returned when there are no pending jobs."""
+        baker.make(
+            fc_models.ExportJob,
+            status=fc_models.ExportJob.StatusChoices.COMPLETED,
+        )
+        self.assertIsNone(fc_jobs.claim_next_job())
+
+    def test_claims_oldest(self):
+        """Test that the oldest pending job is claimed and marked as
+        running.
+        """
+        first = baker.make(fc_models.ExportJob)
+        baker.make(fc_models.ExportJob)
+
+        job = fc_jobs.claim_next_job()
+        self.assertEqual(job, first)
+        first.refresh_from_db()
+        self.assertEqual(first.status, first.StatusChoices.RUNNING)
+        self.assertIsNotNone(first.started_dt)
+
+    def test_claimed_once(self):
+        """Test that a job which has been claimed is not claimed again."""
+        first = baker.make(fc_models.ExportJob)
+        second = baker.make(fc_models.ExportJob)
+
+        self.assertEqual(fc_jobs.claim_next_job(), first)
+        self.assertEqual(fc_jobs.claim_next_job(), second)
+        self.assertIsNone(fc_jobs.claim_next_job())
+
+
+class TestRequeueStaleJobs(TestCase):
+    """Tests for the `requeue_stale_jobs` function."""
+
+    @override_settings(FORM_CREATOR_EXPORT_JOB_TIMEOUT=60)
+    def test_requeue(self):
+        """Test that only jobs running for longer than the timeout are made
+        pending again.
+        """
+        running = fc_models.ExportJob.StatusChoices.RUNNING
+        stale = baker.make(
+            fc_models.ExportJob,
+            status=running,
+            started_dt=timezone.now() - timedelta(minutes=2),
+            rows_written=10,
+        )
+        recent = baker.make(
+            fc_models.ExportJob, status=running, started_dt=timezone.now()
+        )
+
+        self.assertEqual(fc_jobs.requeue_stale_jobs(), 1)
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, stale.StatusChoices.PENDING)
+        self.assertIsNone(stale.started_dt)
+        self.assertEqual(stale.rows_written, 0)
+        recent.refresh_from_db()
+        self.assertEqual(recent.status, running)
+        self.assertEqual(fc_jobs.claim_next_job(), stale)
+
+
+class TestRunJob(JobsTestCase):
+    """Tests for the `run_job` function."""
+
+    def test_responses(self):
+        """Test that the responses are written to the job's file."""
+        form = baker.make(fc_models.Form)
+        baker.make(
+            fc_models.FormResponse,
+            form_responder__form=form,
+            answer="an answer",
+            _quantity=3,
+        )
+        job = fc_jobs.create_export_job(
+            baker.make(User),
+            fc_models.ExportJob.KindChoices.RESPONSES,
+            fc_models.Form.objects.all(),
+        )
+
+        with self.settings(FORM_CREATOR_EXPORT_PROGRESS_INTERVAL=2):
+            fc_jobs.run_job(fc_jobs.claim_next_job())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, job.StatusChoices.COMPLETED)
+        self.assertEqual(job.rows_total, 3)
+        self.assertEqual(job.rows_written, 3)
+        self.assertEqual(job.progress, 100)
+        self.assertIsNotNone(job.finished_dt)
+        with job.file.open("r") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertIn("an answer", lines[1])
+
+    def test_file_name(self):
+        """Test that the file is saved under a random directory, so its name
+        cannot be guessed.
+        """
+        baker.make(fc_models.ExportJob, kind="questions", _quantity=2)
+        names = [
+            fc_jobs.run_job(fc_jobs.claim_next_job()).file.name
+            for _ in range(2)
+        ]
+        self.assertNotEqual(names[0], names[1])
+        for name in names:
+            self.assertRegex(
+                name, r"^form_creator/exports/[0-9a-f]{32}/questions\.csv$"
+            )
+
+    def test_responses_in_parallel(self):
+        """Test that responses are exported in parallel when more than one
+        worker is configured.
+        """
+
+        def export(form_ids, path, workers, progress):
+            with open(path, "w") as f:
+                f.write("parallel")
+            progress(5)
+            return 5
+
+        job = fc_jobs.create_export_job(
+            baker.make(User),
+            fc_models.ExportJob.KindChoices.RESPONSES,
+            fc_models.Form.objects.none(),
+        )
+        with self.settings(FORM_CREATOR_EXPORT_WORKERS=3), mock.patch.object(
+            fc_jobs.fc_parallel, "export_responses", side_effect=export
+        ) as export_responses:
+            fc_jobs.run_job(job)
+
+        self.assertEqual(export_responses.call_args.kwargs["workers"], 3)
+        job.refresh_from_db()
+        self.assertEqual(job.status, job.StatusChoices.COMPLETED)
+        self.assertEqual(job.rows_written, 5)
+        with job.file.open("r") as f:
+            self.assertEqual(f.read(), "parallel")
+
+    def test_questions(self):
+        """Test that the questions are written to the job's file."""
+        question = baker.make(fc_models.FormQuestion)
+        job = fc_jobs.create_export_job(
+            baker.make(User),
+            fc_models.ExportJob.KindChoices.QUESTIONS,
+            fc_models.Form.objects.all(),
+        )
+        fc_jobs.run_job(job)
+
+        with job.file.open("r") as f:
+            self.assertIn(question.question, f.read())
+
+    def test_failure(self):
+        """Test that an error is recorded against the job."""
+        job = fc_jobs.create_export_job(
+            baker.make(User),
+            fc_models.ExportJob.KindChoices.QUESTIONS,
+            fc_models.Form.objects.none(),
+        )
+        with mock.patch.object(
+            fc_jobs.fc_exporters, "write_csv", side_effect=OSError("Full")
+        ), self.assertLogs(fc_jobs.logger, "ERROR"):
+            fc_jobs.run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, job.StatusChoices.FAILED)
+        self.assertEqual(job.error, "Full")
+        self.assertFalse(job.file)
+
+
+class TestRunPendingJobs(JobsTestCase):
+    """Tests for the `run_pending_jobs` function."""
+
+    def test_runs_all(self):
+        """Test that every pending job is run."""
+        baker.make(fc_models.ExportJob, kind="questions", _quantity=2)
+        self.assertEqual(fc_jobs.run_pending_jobs(), 2)
+        self.assertFalse(
+            fc_models.ExportJob.objects.exclude(
+                status=fc_models.ExportJob.StatusChoices.COMPLETED
+            ).exists()
+        )
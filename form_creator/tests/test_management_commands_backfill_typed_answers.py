@@ -0,0 +1,30 @@
+"""Tests for the `backfill_typed_answers` management command."""
+
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+import mock
+from ..management.commands import backfill_typed_answers
+
+
+class TestBackfillTypedAnswers(TestCase):
+    """Tests for the `backfill_typed_answers` management command."""
+
+    def test_backfills(self):
+        """Test that the options are passed on and progress reported."""
+        out = StringIO()
+        with mock.patch.object(
+            backfill_typed_answers.typed_answers,
+            "backfill",
+            return_value=iter([(2, 10), (1, 12)]),
+        ) as backfill:
+            call_command(
+                "backfill_typed_answers",
+                batch_size=2,
+                form_ids=[1],
+                after_id=5,
+                stdout=out,
+            )
+        backfill.assert_called_once_with(2, form_ids=[1], after_id=5)
+        self.assertIn("Updated 2 response(s), up to id 10.", out.getvalue())
+        self.assertIn("Done. Updated 3 response(s).", out.getvalue())
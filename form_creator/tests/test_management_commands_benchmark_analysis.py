@@ -0,0 +1,46 @@
+"""Tests for the `benchmark_analysis` management command."""
+
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+import mock
+from model_bakery import baker
+from .. import models as fc_models
+from ..management.commands import benchmark_analysis
+from ..question_form_fields import FieldTypeChoices
+
+
+class TestBenchmarkAnalysis(TestCase):
+    """Tests for the `benchmark_analysis` management command."""
+
+    def test_random_values(self):
+        """Test that each available analysis is timed."""
+        out = StringIO()
+        with mock.patch.object(benchmark_analysis.fc_analysis, "numpy", None):
+            call_command(
+                "benchmark_analysis", values=100, repeat=1, stdout=out
+            )
+        self.assertIn("NumPy is not installed.", out.getvalue())
+        self.assertIn("Analysing 100 answer(s).", out.getvalue())
+        self.assertIn("Python: ", out.getvalue())
+
+    def test_question(self):
+        """Test that the stored answers to a question can be analysed."""
+        question = baker.make(
+            fc_models.FormQuestion, field_type=FieldTypeChoices.INTEGER
+        )
+        baker.make(
+            fc_models.FormResponse, question=question, answer="3", _quantity=2
+        )
+        out = StringIO()
+        call_command(
+            "benchmark_analysis", question=question.id, repeat=1, stdout=out
+        )
+        self.assertIn("Analysing 2 answer(s).", out.getvalue())
+
+    def test_not_numeric(self):
+        """Test that only numeric questions can be analysed."""
+        question = baker.make(fc_models.FormQuestion)
+        with self.assertRaises(CommandError):
+            call_command("benchmark_analysis", question=question.id)
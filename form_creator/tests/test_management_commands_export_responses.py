@@ -0,0 +1,38 @@
+"""Tests for the `export_responses` management command."""
+
+from io import StringIO
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+import mock
+from model_bakery import baker
+from .. import models as fc_models
+from ..management.commands import export_responses
+
+
+class TestExportResponses(TestCase):
+    """Tests for the `export_responses` management command."""
+
+    def test_export(self):
+        """Test that the forms are exported with the given parallelism."""
+        form = baker.make(fc_models.Form)
+        out = StringIO()
+        with mock.patch.object(
+            export_responses.fc_parallel, "export_responses", return_value=3
+        ) as export:
+            call_command(
+                "export_responses",
+                "out.csv",
+                f"--form={form.id}",
+                "--workers=4",
+                "--partitions=8",
+                stdout=out,
+            )
+        export.assert_called_once_with(
+            [form.id], "out.csv", workers=4, partitions=8
+        )
+        self.assertIn("Exported 3 response(s).", out.getvalue())
+
+    def test_missing_form(self):
+        """Test that an error is raised for forms which do not exist."""
+        with self.assertRaisesMessage(CommandError, "Forms not found: 1"):
+            call_command("export_responses", "out.csv", "--form=1")
@@ -0,0 +1,36 @@
+"""Tests for the `flush_submissions` management command."""
+
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+import mock
+from ..management.commands import flush_submissions
+
+
+class TestFlushSubmissions(TestCase):
+    """Tests for the `flush_submissions` management command."""
+
+    def test_flushes(self):
+        """Test that staged submissions are flushed once and the count
+        reported.
+        """
+        out = StringIO()
+        with mock.patch.object(
+            flush_submissions.fc_ingestion, "flush", return_value=3
+        ) as flush:
+            call_command("flush_submissions", batch_size=100, stdout=out)
+        flush.assert_called_once_with(100)
+        self.assertIn("Wrote 3 submission(s).", out.getvalue())
+
+    def test_loop(self):
+        """Test that the command keeps polling when looping."""
+        with mock.patch.object(
+            flush_submissions.fc_ingestion, "flush", return_value=0
+        ) as flush, mock.patch.object(
+            flush_submissions.time,
+            "sleep",
+            side_effect=[None, KeyboardInterrupt],
+        ):
+            with self.assertRaises(KeyboardInterrupt):
+                call_command("flush_submissions", loop=True, interval=1)
+        self.assertEqual(flush.call_count, 2)
@@ -0,0 +1,23 @@
+"""Tests for the `rebuild_answer_stats` management command."""
+
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+import mock
+from ..management.commands import rebuild_answer_stats
+
+
+class TestRebuildAnswerStats(TestCase):
+    """Tests for the `rebuild_answer_stats` management command."""
+
+    def test_rebuilds(self):
+        """Test that the forms are passed on and the count reported."""
+        out = StringIO()
+        with mock.patch.object(
+            rebuild_answer_stats.fc_stats, "rebuild", return_value=3
+        ) as rebuild:
+            call_command("rebuild_answer_stats", form_ids=[1], stdout=out)
+        rebuild.assert_called_once_with(form_ids=[1])
+        self.assertIn(
+            "Rebuilt the statistics of 3 question(s).", out.getvalue()
+        )
@@ -0,0 +1,46 @@
+"""Tests for the `run_export_jobs` management command."""
+
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+import mock
+from ..management.commands import run_export_jobs
+
+
+class TestRunExportJobs(TestCase):
+    """Tests for the `run_export_jobs` management command."""
+
+    def test_runs_pending_jobs(self):
+        """Test that pending jobs are run once and the count reported."""
+        out = StringIO()
+        with mock.patch.object(
+            run_export_jobs.fc_jobs, "run_pending_jobs", return_value=2
+        ) as run_pending_jobs:
+            call_command("run_export_jobs", stdout=out)
+        run_pending_jobs.assert_called_once()
+        self.assertIn("Ran 2 export job(s).", out.getvalue())
+
+    def test_requeues_stale_jobs(self):
+        """Test that stale jobs are requeued before pending jobs are run."""
+        out = StringIO()
+        with mock.patch.object(
+            run_export_jobs.fc_jobs, "requeue_stale_jobs", return_value=1
+        ) as requeue_stale_jobs, mock.patch.object(
+            run_export_jobs.fc_jobs, "run_pending_jobs", return_value=1
+        ):
+            call_command("run_export_jobs", stdout=out)
+        requeue_stale_jobs.assert_called_once()
+        self.assertIn("Requeued 1 stale export job(s).", out.getvalue())
+
+    def test_loop(self):
+        """Test that the command keeps polling when looping."""
+        with mock.patch.object(
+            run_export_jobs.fc_jobs, "run_pending_jobs", return_value=0
+        ) as run_pending_jobs, mock.patch.object(
+            run_export_jobs.time,
+            "sleep",
+            side_effect=[None, KeyboardInterrupt],
+        ):
+            with self.assertRaises(KeyboardInterrupt):
+                call_command("run_export_jobs", loop=True, interval=1)
+        self.assertEqual(run_pending_jobs.call_count, 2)
@@ -1,9 +1,13 @@
 from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
 from django.test import TestCase
 from django.utils import timezone
 from model_bakery import baker
 from .. import models as fc_models
 
+User = get_user_model()
+
 
 class TestForms(TestCase):
     """Tests custom managers and querysets associated with the Form model."""
@@ -74,3 +78,70 @@ class TestForms(TestCase):
             fc_models.Form.objects.filter().live().values_list("id", flat=True)
         )
         self.assertEqual(results, expected_results)
+
+    def test_with_permissions_for(self):
+        """Test that each form is annotated with the user's relationship to
+        it.
+        """
+        user = baker.make(User)
+        owned = baker.make(
+            fc_models.Form,
+            owner=user,
+            status=fc_models.Form.StatusChoices.ACTIVE,
+            start_dt=timezone.now() - timedelta(days=1),
+        )
+        edited = baker.make(fc_models.Form, editors=[user])
+        completed = baker.make(fc_models.Form)
+        baker.make(fc_models.FormResponder, form=completed, user=user)
+
+        results = {
+            form.id: (
+                form.is_owner,
+                form.is_editor,
+                form.has_completed,
+            )
+            for form in fc_models.Form.objects.with_permissions_for(user)
+        }
+        self.assertEqual(
+            results,
+            {
+                owned.id: (True, False, False),
+                edited.id: (False, True, False),
+                completed.id: (False, False, True),
+            },
+        )
+
+    def test_with_permissions_for_anon_user(self):
+        """Test that an anonymous user has no relationship to any form."""
+        baker.make(fc_models.Form, editors=baker.make(User, _quantity=2))
+        form = fc_models.Form.objects.with_permissions_for(
+            AnonymousUser()
+        ).get()
+        self.assertFalse(form.is_owner or form.is_editor or form.has_completed)
+
+    def test_visible_to(self):
+        """Test that a user sees live forms and those they own or edit, each
+        once.
+        """
+        user = baker.make(User)
+        live_form = baker.make(
+            fc_models.Form,
+            status=fc_models.Form.StatusChoices.ACTIVE,
+            start_dt=timezone.now() - timedelta(days=1),
+            editors=[user, baker.make(User)],
+        )
+        owned = baker.make(fc_models.Form, owner=user)
+        baker.make(fc_models.Form)
+
+        results = list(fc_models.Form.objects.visible_to(user))
+        self.assertCountEqual(results, [live_form, owned])
+
+    def test_visible_to_staff(self):
+        """Test that staff see every form."""
+        baker.make(fc_models.Form, _quantity=2)
+        self.assertEqual(
+            fc_models.Form.objects.visible_to(
+                baker.make(User, is_staff=True)
+            ).count(),
+            2,
+        )
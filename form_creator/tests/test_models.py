@@ -1,5 +1,7 @@
 from datetime import timedelta
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
@@ -127,6 +129,31 @@ class TestForm(TestCase):
         form = baker.make(fc_models.Form)
         self.assertFalse(form.can_complete_form(AnonymousUser()))
 
+    def test_permissions_annotated(self):
+        """Test that the permission methods use the annotations added by
+        `with_permissions_for` without running any queries.
+        """
+        user = baker.make(User)
+        baker.make(
+            fc_models.Form,
+            editors=[user],
+            status=fc_models.Form.StatusChoices.ACTIVE,
+        )
+        form = fc_models.Form.objects.with_permissions_for(user).get()
+        with self.assertNumQueries(0):
+            self.assertTrue(form.can_edit(user))
+            self.assertFalse(form.can_delete(user))
+            self.assertFalse(form.can_complete_form(user))
+
+    def test_permissions_annotated_other_user(self):
+        """Test that annotations for another user are not used."""
+        user = baker.make(User)
+        form = fc_models.Form.objects.with_permissions_for(
+            baker.make(User)
+        ).get(pk=baker.make(fc_models.Form, owner=user).pk)
+        self.assertTrue(form.can_edit(user))
+        self.assertTrue(form.can_delete(user))
+
     def test_get_absolute_url(self):
         """Test that the `get_absolute_url` method returns a string
         instance.
@@ -290,6 +317,54 @@ class TestFormQuestion(TestCase):
         form = baker.make(fc_models.FormQuestion, choices="a|b")
         self.assertEqual(form.choice_list, ["a", "b"])
 
+    def test_choice_list_prefetched(self):
+        """Test that loaded choice options are used without splitting the
+        choices.
+        """
+        baker.make(fc_models.FormQuestion, choices="a|b")
+        question = fc_models.FormQuestion.objects.prefetch_related(
+            "choice_options"
+        ).get()
+        question.choices = None
+        with self.assertNumQueries(0):
+            self.assertEqual(question.choice_list, ["a", "b"])
+
+    def test_sync_choice_options(self):
+        """Test that options keep their ids while the choice exists."""
+        question = baker.make(fc_models.FormQuestion, choices="a|b|c")
+        ids = dict(question.choice_options.values_list("value", "id"))
+
+        question.choices = "c|a|d|d"
+        question.save()
+        options = list(question.choice_options.values_list("value", "id"))
+        self.assertEqual([value for value, _ in options], ["c", "a", "d"])
+        self.assertEqual(options[0][1], ids["c"])
+        self.assertEqual(options[1][1], ids["a"])
+        self.assertFalse(
+            fc_models.FormQuestionChoice.objects.filter(id=ids["b"]).exists()
+        )
+
+    def test_choice_options_before_version(self):
+        """Test that the choice options are updated before the form is given
+        a new version, so that the new version never has the old options.
+        """
+        question = baker.make(fc_models.FormQuestion, choices="a|b")
+        question.choices = "a|b|c"
+        with CaptureQueriesContext(connection) as queries:
+            question.save()
+        sql = [query["sql"] for query in queries]
+        options = next(
+            i
+            for i, query in enumerate(sql)
+            if query.startswith('INSERT INTO "fc_form_question_choice"')
+        )
+        version = next(
+            i
+            for i, query in enumerate(sql)
+            if query.startswith('UPDATE "fc_form"')
+        )
+        self.assertLess(options, version)
+
     def test_clean_no_choice(self):
         """Test that the `clean` method raises an error when there are no
         choices but a field type requiring choices is selected.
@@ -314,6 +389,22 @@ class TestFormQuestion(TestCase):
         with self.assertRaises(ValidationError):
             form.clean()
 
+    def test_clean_long_choice(self):
+        """Test that the `clean` method raises an error when a choice is too
+        long to be stored as an option.
+        """
+        form = baker.prepare(
+            fc_models.FormQuestion,
+            field_type=FieldTypeChoices.CHOICE,
+            choices=f"a|{'b' * 256}",
+        )
+        with self.assertRaises(ValidationError) as raised:
+            form.clean()
+        self.assertIn("choices", raised.exception.message_dict)
+
+        form.choices = f"a|{'b' * 255}"
+        form.clean()
+
 
 class TestFormResponder(TestCase):
     """Test the FormResponder model."""
@@ -322,6 +413,19 @@ class TestFormResponder(TestCase):
         """Test that the `__str__` method returns a string instance."""
         self.assertIsInstance(str(baker.make(fc_models.FormResponder)), str)
 
+    def test_get_answers(self):
+        """Test that the answers are read however they are stored."""
+        form_response = baker.make(fc_models.FormResponse, answer="row")
+        self.assertEqual(
+            form_response.form_responder.get_answers(),
+            {form_response.question_id: "row"},
+        )
+        form_responder = baker.make(
+            fc_models.FormResponder, answers={"4": "document"}
+        )
+        self.assertTrue(form_responder.stores_document)
+        self.assertEqual(form_responder.get_answers(), {4: "document"})
+
 
 class TestFormResponse(TestCase):
     """Test the FormResponse model."""
@@ -329,3 +433,29 @@ class TestFormResponse(TestCase):
     def test_str(self):
         """Test that the `__str__` method returns a string instance."""
         self.assertIsInstance(str(baker.make(fc_models.FormResponse)), str)
+
+
+class TestExportJob(TestCase):
+    """Test the ExportJob model."""
+
+    def test_str(self):
+        """Test that the `__str__` method returns a string instance."""
+        self.assertIsInstance(str(baker.make(fc_models.ExportJob)), str)
+
+    def test_progress(self):
+        """Test the percentage of rows written."""
+        job = fc_models.ExportJob(rows_total=None, rows_written=0)
+        self.assertIsNone(job.progress)
+        job.rows_total = 200
+        job.rows_written = 50
+        self.assertEqual(job.progress, 25)
+        job.status = job.StatusChoices.COMPLETED
+        self.assertEqual(job.progress, 100)
+
+    def test_can_view(self):
+        """Test that only the requester and staff can view a job."""
+        job = baker.make(fc_models.ExportJob)
+        self.assertTrue(job.can_view(job.requested_by))
+        self.assertTrue(job.can_view(baker.make(User, is_staff=True)))
+        self.assertFalse(job.can_view(baker.make(User)))
+        self.assertFalse(job.can_view(AnonymousUser()))
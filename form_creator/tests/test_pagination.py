@@ -0,0 +1,102 @@
+"""Tests for the `pagination` module."""
+
+from asgiref.sync import async_to_sync
+from django.test import TestCase
+from django.utils import timezone
+from model_bakery import baker
+from .. import models as fc_models, pagination as fc_pagination
+
+
+class PaginationTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        created_dt = timezone.now()
+        for status in ("active", "draft"):
+            baker.make(fc_models.Form, status=status, _quantity=3)
+        # Forms created at the same time are ordered by id.
+        fc_models.Form.objects.filter(status="draft").update(
+            created_dt=created_dt
+        )
+        cls.ordered = list(
+            fc_models.Form.objects.order_by(*fc_pagination.ORDERING)
+        )
+
+
+class TestTokens(PaginationTestCase):
+    """Tests for the `encode_token` and `decode_token` functions."""
+
+    def test_round_trip(self):
+        """Test that a token gives back the position of the form."""
+        form = self.ordered[0]
+        self.assertEqual(
+            fc_pagination.decode_token(
+                fc_pagination.encode_token(form, before=True)
+            ),
+            (form.status, form.created_dt, form.id, True),
+        )
+
+    def test_stable(self):
+        """Test that the token of a position does not change."""
+        self.assertEqual(
+            fc_pagination.encode_token(self.ordered[0]),
+            fc_pagination.encode_token(
+                fc_models.Form.objects.get(pk=self.ordered[0].pk)
+            ),
+        )
+
+    def test_invalid(self):
+        """Test that an invalid token raises a `ValueError`."""
+        for token in ("", "abc", "WzFd"):
+            with self.assertRaises(ValueError):
+                fc_pagination.decode_token(token)
+
+
+class TestPaginate(PaginationTestCase):
+    """Tests for the `paginate` function."""
+
+    def test_forwards_and_backwards(self):
+        """Test that paging forwards and then backwards visits every form in
+        order.
+        """
+        forms = fc_models.Form.objects.all()
+        pages = [fc_pagination.paginate(forms, 4)]
+        self.assertIsNone(pages[0].prev_token)
+        pages.append(
+            fc_pagination.paginate(
+                forms, 4, fc_pagination.decode_token(pages[0].next_token)
+            )
+        )
+        self.assertEqual(
+            pages[0].object_list + pages[1].object_list, self.ordered
+        )
+        self.assertIsNone(pages[1].next_token)
+
+        first = fc_pagination.paginate(
+            forms, 4, fc_pagination.decode_token(pages[1].prev_token)
+        )
+        self.assertEqual(first, pages[0])
+
+    def test_one_page(self):
+        """Test that there are no tokens when all forms fit on a page."""
+        page = fc_pagination.paginate(fc_models.Form.objects.all(), 6)
+        self.assertEqual(page.object_list, self.ordered)
+        self.assertFalse(page.has_other_pages)
+
+    def test_queries(self):
+        """Test that a page is fetched in a single query."""
+        cursor = fc_pagination.decode_token(
+            fc_pagination.encode_token(self.ordered[2])
+        )
+        with self.assertNumQueries(1):
+            page = fc_pagination.paginate(
+                fc_models.Form.objects.all(), 2, cursor
+            )
+        self.assertEqual(page.object_list, self.ordered[3:5])
+
+    def test_apaginate(self):
+        """Test that the async version gives the same page."""
+        forms = fc_models.Form.objects.all()
+        self.assertEqual(
+            async_to_sync(fc_pagination.apaginate)(forms, 4),
+            fc_pagination.paginate(forms, 4),
+        )
@@ -0,0 +1,139 @@
+"""Tests for the `parallel` module."""
+
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
+from unittest import skipUnless
+from django.test import TestCase
+import mock
+from model_bakery import baker
+from .. import parallel as fc_parallel, models as fc_models, exporters
+
+
+class TestPartition(TestCase):
+    """Tests for the `partition` function."""
+
+    def test_no_responses(self):
+        """Test that there are no ranges when there are no responses."""
+        self.assertEqual(
+            fc_parallel.partition(fc_models.FormResponse.objects.all(), 4), []
+        )
+
+    def test_ranges(self):
+        """Test that the responses are split into contiguous ranges of
+        roughly equal size.
+        """
+        ids = [r.id for r in baker.make(fc_models.FormResponse, _quantity=5)]
+        self.assertEqual(
+            fc_parallel.partition(fc_models.FormResponse.objects.all(), 2),
+            [(ids[0], ids[3]), (ids[3], None)],
+        )
+
+    def test_more_partitions_than_responses(self):
+        """Test that each response gets its own range at most."""
+        baker.make(fc_models.FormResponse, _quantity=2)
+        self.assertEqual(
+            len(
+                fc_parallel.partition(fc_models.FormResponse.objects.all(), 8)
+            ),
+            2,
+        )
+
+
+class TestExportResponses(TestCase):
+    """Tests for the `export_responses` function."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.form = baker.make(fc_models.Form)
+        cls.responses = baker.make(
+            fc_models.FormResponse, form_responder__form=cls.form, _quantity=7
+        )
+        # A response to another form should not be included.
+        baker.make(fc_models.FormResponse)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "responses.csv")
+
+    def expected(self) -> str:
+        """The content of a single-threaded export ordered by id."""
+        output = io.StringIO()
+        exporters.export_responses(
+            fc_models.FormResponse.objects.filter(
+                form_responder__form=self.form
+            ).order_by("id"),
+            output,
+        )
+        return output.getvalue()
+
+    def read(self) -> str:
+        """Read the exported file."""
+        with open(self.path, newline="", encoding="utf-8") as f:
+            return f.read()
+
+    def test_single_worker(self):
+        """Test that the ranges are joined in order."""
+        progress = mock.Mock()
+        rows = fc_parallel.export_responses(
+            [self.form.id],
+            self.path,
+            workers=1,
+            partitions=3,
+            progress=progress,
+        )
+        self.assertEqual(rows, 7)
+        self.assertEqual(self.read(), self.expected())
+        self.assertEqual(
+            [c.args[0] for c in progress.call_args_list], [3, 6, 7]
+        )
+        self.assertEqual(os.listdir(self.directory), ["responses.csv"])
+
+    def test_multiple_workers(self):
+        """Test that a process pool is used for more than one worker."""
+        with mock.patch.object(
+            fc_parallel,
+            "ProcessPoolExecutor",
+            side_effect=lambda **kwargs: fc_parallel._InlineExecutor(),
+        ) as executor, mock.patch.object(
+            fc_parallel.connections, "close_all"
+        ) as close_all:
+            rows = fc_parallel.export_responses(
+                [self.form.id], self.path, workers=2
+            )
+        executor.assert_called_once_with(
+            max_workers=2, initializer=fc_parallel._init_worker
+        )
+        close_all.assert_called_once()
+        self.assertEqual(rows, 7)
+        self.assertEqual(self.read(), self.expected())
+
+    @skipUnless(
+        multiprocessing.get_start_method() == "fork",
+        "Spawned workers cannot read the in-memory test database.",
+    )
+    def test_process_pool(self):
+        """Test that the ranges are rendered by a real process pool. The
+        connections are closed before the workers are forked and the
+        arguments of each range are pickled to send to them.
+        """
+        with self.settings(FORM_CREATOR_EXPORT_WORKERS=2), mock.patch.object(
+            fc_parallel.connections,
+            "close_all",
+            wraps=fc_parallel.connections.close_all,
+        ) as close_all:
+            rows = fc_parallel.export_responses([self.form.id], self.path)
+        close_all.assert_called_once()
+        self.assertEqual(rows, 7)
+        self.assertEqual(self.read(), self.expected())
+
+    def test_workers_setting(self):
+        """Test that the number of workers defaults to the setting."""
+        with self.settings(FORM_CREATOR_EXPORT_WORKERS=1), mock.patch.object(
+            fc_parallel, "ProcessPoolExecutor"
+        ) as executor:
+            fc_parallel.export_responses([self.form.id], self.path)
+        executor.assert_not_called()
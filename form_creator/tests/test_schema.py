@@ -0,0 +1,126 @@
+"""Tests for the `schema` module."""
+
+from django import forms
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from model_bakery import baker
+from .. import models as fc_models, schema as fc_schema
+from ..question_form_fields import FieldTypeChoices
+
+
+class SchemaTestCase(TestCase):
+    """Starts each test with empty schema caches."""
+
+    def setUp(self):
+        fc_schema._schemas.clear()
+        cache.clear()
+        self.form = baker.make(fc_models.Form)
+        self.text_q = baker.make(
+            fc_models.FormQuestion,
+            form=self.form,
+            required=True,
+            seq_no=1,
+        )
+        self.choice_q = baker.make(
+            fc_models.FormQuestion,
+            form=self.form,
+            field_type=FieldTypeChoices.CHOICE,
+            choices="a|b|c",
+            seq_no=2,
+        )
+        self.form.refresh_from_db()
+
+
+class TestFieldSpec(SchemaTestCase):
+    """Tests for the `FieldSpec` class."""
+
+    def test_from_question(self):
+        """Test that a question is compiled to a field specification."""
+        spec = fc_schema.FieldSpec.from_question(self.choice_q)
+        self.assertEqual(spec.name, f"question_{self.choice_q.id}")
+        self.assertEqual(spec.question_id, self.choice_q.id)
+        self.assertEqual(spec.choices, (("a", "a"), ("b", "b"), ("c", "c")))
+        self.assertEqual(
+            spec.option_ids,
+            tuple(self.choice_q.choice_options.values_list("id", flat=True)),
+        )
+
+    def test_no_choices(self):
+        """Test that only choice fields have choices."""
+        spec = fc_schema.FieldSpec.from_question(self.text_q)
+        self.assertIsNone(spec.choices)
+
+    def test_build(self):
+        """Test that a new field is built from the specification."""
+        spec = fc_schema.FieldSpec.from_question(self.choice_q)
+        field = spec.build()
+        self.assertIsInstance(field, forms.ChoiceField)
+        self.assertEqual(field.label, self.choice_q.question)
+        self.assertEqual(field.choices, [("a", "a"), ("b", "b"), ("c", "c")])
+        self.assertIsNot(field, spec.build())
+
+
+class TestFormSchema(SchemaTestCase):
+    """Tests for the `FormSchema` class."""
+
+    def test_option_ids(self):
+        """Test that the options are keyed by question and choice."""
+        schema = fc_schema.compile_schema(self.form)
+        self.assertEqual(
+            schema.option_ids(),
+            {
+                (self.choice_q.id, option.value): option.id
+                for option in self.choice_q.choice_options.all()
+            },
+        )
+
+
+class TestGetSchema(SchemaTestCase):
+    """Tests for the `get_schema` function."""
+
+    def test_compiles(self):
+        """Test that the schema holds a field for each question, in order."""
+        schema = fc_schema.get_schema(self.form)
+        self.assertEqual(schema.form_id, self.form.id)
+        self.assertEqual(
+            [spec.question_id for spec in schema.fields],
+            [self.text_q.id, self.choice_q.id],
+        )
+
+    def test_cached(self):
+        """Test that a cached schema is used without any queries."""
+        schema = fc_schema.get_schema(self.form)
+        with self.assertNumQueries(0):
+            self.assertIs(fc_schema.get_schema(self.form), schema)
+
+    def test_django_cache(self):
+        """Test that a schema in Django's cache is used when it is not in
+        the process cache.
+        """
+        schema = fc_schema.get_schema(self.form)
+        fc_schema._schemas.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(fc_schema.get_schema(self.form), schema)
+
+    def test_question_edit(self):
+        """Test that editing a question gives a new schema."""
+        fc_schema.get_schema(self.form)
+        self.text_q.question = "Edited"
+        self.text_q.save()
+        self.form.refresh_from_db()
+
+        schema = fc_schema.get_schema(self.form)
+        self.assertEqual(schema.fields[0].label, "Edited")
+
+    @override_settings(FORM_CREATOR_SCHEMA_CACHE_SIZE=1)
+    def test_evicts_least_recently_used(self):
+        """Test that the process cache is bounded in size."""
+        other_form = baker.make(fc_models.Form)
+        fc_schema.get_schema(self.form)
+        fc_schema.get_schema(other_form)
+        self.assertIsNone(
+            fc_schema._schemas.get((self.form.id, self.form.version.hex))
+        )
+        self.assertIsNotNone(
+            fc_schema._schemas.get((other_form.id, other_form.version.hex))
+        )
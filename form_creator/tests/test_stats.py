@@ -0,0 +1,183 @@
+"""Tests for the `stats` module."""
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from model_bakery import baker
+from .. import models as fc_models, stats as fc_stats
+from ..question_form_fields import FieldTypeChoices
+
+
+class StatsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.form = baker.make(fc_models.Form)
+        cls.number_q = baker.make(
+            fc_models.FormQuestion,
+            form=cls.form,
+            field_type=FieldTypeChoices.INTEGER,
+        )
+        cls.choices_q = baker.make(
+            fc_models.FormQuestion,
+            form=cls.form,
+            field_type=FieldTypeChoices.MULTIPLE_CHOICE,
+            choices="a|b|c",
+        )
+
+    def answers(self, number, choices) -> list:
+        """Get the answers to each question."""
+        return [
+            (self.number_q.id, self.number_q.field_type, number),
+            (self.choices_q.id, self.choices_q.field_type, choices),
+        ]
+
+
+class TestTally(StatsTestCase):
+    """Tests for the `tally` function."""
+
+    def test_tally(self):
+        """Test that empty answers are counted as responses only."""
+        questions, choices = fc_stats.tally(
+            self.answers(3, ["a", "b"])
+            + self.answers("5", "['b']")
+            + self.answers(None, [])
+        )
+        self.assertEqual(
+            questions[self.number_q.id],
+            {
+                "responses": 3,
+                "answered": 2,
+                "number_sum": 8,
+                "number_min": 3,
+                "number_max": 5,
+            },
+        )
+        self.assertEqual(questions[self.choices_q.id]["answered"], 2)
+        self.assertEqual(
+            choices,
+            {(self.choices_q.id, "a"): 1, (self.choices_q.id, "b"): 2},
+        )
+
+
+class TestRecord(StatsTestCase):
+    """Tests for the `record` function."""
+
+    def test_record(self):
+        """Test that the totals are added to those already recorded."""
+        fc_stats.record(self.answers(3, ["a", "b"]))
+        with self.assertNumQueries(4):
+            fc_stats.record(self.answers(-1, ["b"]) + self.answers(None, []))
+
+        question_stats = self.number_q.stats
+        self.assertEqual(
+            (
+                question_stats.responses,
+                question_stats.answered,
+                question_stats.number_sum,
+                question_stats.number_min,
+                question_stats.number_max,
+            ),
+            (3, 2, 2, -1, 3),
+        )
+        self.assertEqual(question_stats.response_rate, 2 / 3)
+        self.assertEqual(
+            dict(self.choices_q.choice_stats.values_list("choice", "count")),
+            {"a": 1, "b": 2},
+        )
+
+    def test_nothing(self):
+        """Test that nothing is written when there are no answers."""
+        with self.assertNumQueries(0):
+            fc_stats.record([])
+
+
+class TestRebuild(StatsTestCase):
+    """Tests for the `rebuild` function."""
+
+    def test_rebuild(self):
+        """Test that the statistics match those recorded, for answers stored
+        both as rows and as documents.
+        """
+        for number, choices in ((3, "['a', 'b']"), (5, "['b']")):
+            form_responder = baker.make(
+                fc_models.FormResponder, form=self.form
+            )
+            baker.make(
+                fc_models.FormResponse,
+                form_responder=form_responder,
+                question=self.number_q,
+                answer=str(number),
+            )
+            baker.make(
+                fc_models.FormResponse,
+                form_responder=form_responder,
+                question=self.choices_q,
+                answer=choices,
+            )
+        baker.make(
+            fc_models.FormResponder,
+            form=self.form,
+            answers={
+                str(self.number_q.id): "-1",
+                str(self.choices_q.id): "['c']",
+            },
+        )
+        fc_stats.record(self.answers(100, ["a"]))
+
+        self.assertEqual(fc_stats.rebuild(form_ids=[self.form.id]), 2)
+        stats = fc_stats.form_stats(self.form)
+        self.assertEqual(
+            stats[self.number_q.id],
+            {
+                "responses": 3,
+                "answered": 3,
+                "number_sum": 7,
+                "number_min": -1,
+                "number_max": 5,
+                "choices": {},
+            },
+        )
+        self.assertEqual(
+            stats[self.choices_q.id]["choices"], {"a": 1, "b": 2, "c": 1}
+        )
+
+    def test_reads_in_transaction(self):
+        """Test that the answers are read in the transaction which replaces
+        the statistics, so that none saved in between are lost.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            fc_stats.rebuild(form_ids=[self.form.id])
+        sql = [query["sql"] for query in queries]
+        savepoint = next(
+            i for i, query in enumerate(sql) if query.startswith("SAVEPOINT")
+        )
+        reads = [
+            i
+            for i, query in enumerate(sql)
+            if fc_models.FormResponse._meta.db_table in query
+        ]
+        self.assertTrue(reads)
+        self.assertTrue(all(i > savepoint for i in reads))
+
+    def test_unanswered(self):
+        """Test that questions without answers are left without
+        statistics.
+        """
+        self.assertEqual(fc_stats.rebuild(form_ids=[self.form.id]), 0)
+        self.assertFalse(
+            fc_models.QuestionStats.objects.filter(
+                question__form=self.form
+            ).exists()
+        )
+
+
+class TestFormStats(StatsTestCase):
+    """Tests for the `form_stats` function."""
+
+    def test_queries(self):
+        """Test that the statistics are read in two queries."""
+        fc_stats.record(self.answers(3, ["a"]))
+        with self.assertNumQueries(2):
+            stats = fc_stats.form_stats(self.form)
+        self.assertEqual(stats[self.choices_q.id]["choices"], {"a": 1})
+        self.assertEqual(stats[self.number_q.id]["number_sum"], 3)
@@ -0,0 +1,183 @@
+"""Tests for the `summary` module."""
+
+from django.core.cache import cache
+from django.test import TestCase
+from model_bakery import baker
+from .. import models as fc_models, summary as fc_summary
+from ..question_form_fields import FieldTypeChoices
+
+
+class SummaryTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.form = baker.make(fc_models.Form)
+        cls.text_q = baker.make(
+            fc_models.FormQuestion, form=cls.form, seq_no=1
+        )
+        cls.number_q = baker.make(
+            fc_models.FormQuestion,
+            form=cls.form,
+            field_type=FieldTypeChoices.INTEGER,
+            seq_no=2,
+        )
+        cls.choice_q = baker.make(
+            fc_models.FormQuestion,
+            form=cls.form,
+            field_type=FieldTypeChoices.CHOICE,
+            choices="a|b|c",
+            seq_no=3,
+        )
+        for text, number, choice in (
+            ("x", "1", "a"),
+            ("", "2", "a"),
+            ("y", "3", "b"),
+            ("z", "10", ""),
+        ):
+            form_responder = baker.make(fc_models.FormResponder, form=cls.form)
+            for question, answer in (
+                (cls.text_q, text),
+                (cls.number_q, number),
+                (cls.choice_q, choice),
+            ):
+                baker.make(
+                    fc_models.FormResponse,
+                    form_responder=form_responder,
+                    question=question,
+                    answer=answer,
+                )
+
+    def setUp(self):
+        cache.clear()
+
+
+class TestBuildSummary(SummaryTestCase):
+    """Tests for the `build_summary` function."""
+
+    def test_summary(self):
+        """Test that each question is summarised in the question order."""
+        with self.assertNumQueries(6):
+            summary = fc_summary.build_summary(self.form)
+        text, number, choice = summary["questions"]
+        self.assertEqual(
+            text,
+            {
+                "id": self.text_q.id,
+                "question": self.text_q.question,
+                "field_type": self.text_q.field_type,
+                "responses": 4,
+                "answered": 3,
+            },
+        )
+        self.assertEqual(number["mean"], 4)
+        for percentile, expected in (
+            ("25", 1.75),
+            ("50", 2.5),
+            ("75", 4.75),
+            ("90", 7.9),
+        ):
+            self.assertAlmostEqual(number["percentiles"][percentile], expected)
+        self.assertEqual(choice["answered"], 3)
+        self.assertEqual(choice["choices"], {"a": 2, "b": 1, "c": 0})
+
+    def test_choice_options(self):
+        """Test that the choices are listed from the choice options, in
+        their order, rather than split from the question.
+        """
+        fc_models.FormQuestion.objects.filter(id=self.choice_q.id).update(
+            choices="ignored"
+        )
+        fc_models.FormQuestionChoice.objects.filter(
+            question=self.choice_q, value="a"
+        ).update(seq_no=5)
+        (choice,) = [
+            question
+            for question in fc_summary.build_summary(self.form)["questions"]
+            if question["id"] == self.choice_q.id
+        ]
+        self.assertEqual(list(choice["choices"]), ["b", "c", "a"])
+
+    def test_documents(self):
+        """Test that answers stored as documents are summarised along with
+        those stored as rows.
+        """
+        for text, number, choice in (("w", "20", "c"), ("", "", "a")):
+            baker.make(
+                fc_models.FormResponder,
+                form=self.form,
+                answers={
+                    str(self.text_q.id): text,
+                    str(self.number_q.id): number,
+                    str(self.choice_q.id): choice,
+                },
+            )
+        text, number, choice = fc_summary.build_summary(self.form)["questions"]
+        self.assertEqual((text["responses"], text["answered"]), (6, 4))
+        self.assertEqual((number["responses"], number["answered"]), (6, 5))
+        self.assertEqual(number["mean"], 36 / 5)
+        self.assertEqual(number["percentiles"]["50"], 3)
+        self.assertAlmostEqual(number["percentiles"]["90"], 16)
+        self.assertEqual(choice["choices"], {"a": 3, "b": 1, "c": 1})
+
+    def test_documents_only(self):
+        """Test that a form whose answers are all stored as documents is
+        summarised.
+        """
+        form = baker.make(fc_models.Form)
+        question = baker.make(
+            fc_models.FormQuestion,
+            form=form,
+            field_type=FieldTypeChoices.INTEGER,
+        )
+        for answer in ("1", "2"):
+            baker.make(
+                fc_models.FormResponder,
+                form=form,
+                answers={str(question.id): answer},
+            )
+        (summary,) = fc_summary.build_summary(form)["questions"]
+        self.assertEqual(summary["responses"], 2)
+        self.assertEqual(summary["mean"], 1.5)
+        self.assertEqual(summary["percentiles"]["50"], 1.5)
+
+    def test_no_responses(self):
+        """Test that questions without responses are still listed."""
+        form = baker.make(fc_models.Form)
+        baker.make(fc_models.FormQuestion, form=form)
+        summary = fc_summary.build_summary(form)
+        self.assertEqual(summary["questions"][0]["responses"], 0)
+
+
+class TestGetSummary(SummaryTestCase):
+    """Tests for the `get_summary` function."""
+
+    def test_cached(self):
+        """Test that the summary is only built again once the responses
+        change.
+        """
+        summary = fc_summary.get_summary(self.form)
+        # The content version only.
+        with self.assertNumQueries(2):
+            self.assertEqual(fc_summary.get_summary(self.form), summary)
+
+        baker.make(
+            fc_models.FormResponse,
+            form_responder__form=self.form,
+            question=self.text_q,
+            answer="new",
+        )
+        self.assertEqual(
+            fc_summary.get_summary(self.form)["questions"][0]["responses"], 5
+        )
+
+    def test_edited(self):
+        """Test that editing a response discards the summary."""
+        fc_summary.get_summary(self.form)
+        form_response = fc_models.FormResponse.objects.get(
+            question=self.choice_q, answer="b"
+        )
+        form_response.answer = "c"
+        form_response.save()
+        self.assertEqual(
+            fc_summary.get_summary(self.form)["questions"][2]["choices"],
+            {"a": 2, "b": 0, "c": 1},
+        )
@@ -0,0 +1,301 @@
+"""Tests for the `typed_answers` module."""
+
+import datetime
+from decimal import Decimal
+from django.db.models import Avg, Sum
+from django.test import SimpleTestCase, TestCase
+from model_bakery import baker
+from .. import models as fc_models, typed_answers
+from ..question_form_fields import FieldTypeChoices
+
+
+class TestTypedValues(SimpleTestCase):
+    """Tests for the `typed_values` function."""
+
+    def test_columns(self):
+        """Test that each answer is stored in the column for its type, from
+        either the cleaned value or its text.
+        """
+        cases = [
+            (FieldTypeChoices.INTEGER, "5", "number_answer", 5),
+            (FieldTypeChoices.FLOAT, 2.5, "number_answer", 2.5),
+            (FieldTypeChoices.BOOLEAN, "False", "boolean_answer", False),
+            (FieldTypeChoices.BOOLEAN, True, "boolean_answer", True),
+            (
+                FieldTypeChoices.DATE,
+                "2022-01-02",
+                "date_answer",
+                datetime.date(2022, 1, 2),
+            ),
+            (
+                FieldTypeChoices.DATETIME,
+                "2022-01-02 03:04:05+00:00",
+                "datetime_answer",
+                datetime.datetime(
+                    2022, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc
+                ),
+            ),
+            (
+                FieldTypeChoices.TIME,
+                datetime.time(3, 4),
+                "time_answer",
+                datetime.time(3, 4),
+            ),
+        ]
+        for field_type, answer, column, expected in cases:
+            with self.subTest(field_type=field_type, answer=answer):
+                values = typed_answers.typed_values(field_type, answer)
+                self.assertEqual(values.pop(column), expected)
+                self.assertEqual(set(values.values()), {None})
+
+    def test_decimal(self):
+        """Test that decimal answers are also kept exactly, unless they do
+        not fit the column.
+        """
+        values = typed_answers.typed_values(
+            FieldTypeChoices.DECIMAL, "0.10000000000000000001"
+        )
+        self.assertEqual(values.pop("number_answer"), 0.1)
+        self.assertIsNone(values.pop("decimal_answer"))
+        self.assertEqual(set(values.values()), {None})
+
+        values = typed_answers.typed_values(
+            FieldTypeChoices.DECIMAL, Decimal("1234567890.123456789")
+        )
+        self.assertEqual(
+            values["decimal_answer"], Decimal("1234567890.123456789")
+        )
+        self.assertIsNone(
+            typed_answers.typed_values(FieldTypeChoices.FLOAT, "1.5")[
+                "decimal_answer"
+            ]
+        )
+
+    def test_untyped(self):
+        """Test that text answers are not stored in a typed column."""
+        self.assertEqual(
+            set(
+                typed_answers.typed_values(FieldTypeChoices.TEXT, "5").values()
+            ),
+            {None},
+        )
+
+    def test_unparseable(self):
+        """Test that an answer which cannot be parsed is left out."""
+        self.assertIsNone(
+            typed_answers.typed_values(FieldTypeChoices.INTEGER, "five")[
+                "number_answer"
+            ]
+        )
+
+
+class TestAnswerChoices(SimpleTestCase):
+    """Tests for the `answer_choices` function."""
+
+    def test_choice(self):
+        self.assertEqual(
+            typed_answers.answer_choices(FieldTypeChoices.CHOICE, "a"), ["a"]
+        )
+
+    def test_multiple_choice(self):
+        """Test that the choices are read from the cleaned list or its
+        text.
+        """
+        for answer in (["a", "b"], "['a', 'b']"):
+            with self.subTest(answer=answer):
+                self.assertEqual(
+                    typed_answers.answer_choices(
+                        FieldTypeChoices.MULTIPLE_CHOICE, answer
+                    ),
+                    ["a", "b"],
+                )
+
+    def test_not_choice(self):
+        self.assertEqual(
+            typed_answers.answer_choices(FieldTypeChoices.TEXT, "a"), []
+        )
+
+
+class TypedAnswersTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.form = baker.make(fc_models.Form)
+        cls.number_q = baker.make(
+            fc_models.FormQuestion,
+            form=cls.form,
+            field_type=FieldTypeChoices.INTEGER,
+        )
+        cls.choices_q = baker.make(
+            fc_models.FormQuestion,
+            form=cls.form,
+            field_type=FieldTypeChoices.MULTIPLE_CHOICE,
+            choices="a|b|c",
+        )
+        cls.field_types = {
+            cls.number_q.id: cls.number_q.field_type,
+            cls.choices_q.id: cls.choices_q.field_type,
+        }
+
+
+class TestCreateResponses(TypedAnswersTestCase):
+    """Tests for the `create_responses` function."""
+
+    def test_create(self):
+        """Test that the typed columns and choices are stored."""
+        for number, choices in ((1, ["a", "b"]), (4, ["b"])):
+            form_responder = baker.make(
+                fc_models.FormResponder, form=self.form
+            )
+            typed_answers.create_responses(
+                [
+                    typed_answers.build_response(
+                        form_responder,
+                        self.number_q.id,
+                        self.number_q.field_type,
+                        number,
+                    ),
+                    typed_answers.build_response(
+                        form_responder,
+                        self.choices_q.id,
+                        self.choices_q.field_type,
+                        choices,
+                    ),
+                ],
+                self.field_types,
+            )
+
+        self.assertEqual(
+            fc_models.FormResponse.objects.filter(
+                question=self.number_q
+            ).aggregate(avg=Avg("number_answer"))["avg"],
+            2.5,
+        )
+        self.assertEqual(
+            set(
+                fc_models.FormResponse.objects.filter(
+                    question=self.choices_q
+                ).values_list("answer", flat=True)
+            ),
+            {"['a', 'b']", "['b']"},
+        )
+        self.assertEqual(
+            sorted(
+                self.choices_q.response_choices.values_list(
+                    "choice", flat=True
+                )
+            ),
+            ["a", "b", "b"],
+        )
+        # The choices refer to the options selected.
+        self.assertEqual(
+            self.choices_q.choice_options.get(
+                value="b"
+            ).response_choices.count(),
+            2,
+        )
+
+    def test_decimal_sum(self):
+        """Test that the database sums decimal answers exactly."""
+        question = baker.make(
+            fc_models.FormQuestion,
+            form=self.form,
+            field_type=FieldTypeChoices.DECIMAL,
+        )
+        form_responder = baker.make(fc_models.FormResponder, form=self.form)
+        typed_answers.create_responses(
+            [
+                typed_answers.build_response(
+                    form_responder, question.id, question.field_type, answer
+                )
+                for answer in ("0.1", "0.2")
+            ],
+            {question.id: question.field_type},
+        )
+        self.assertEqual(
+            fc_models.FormResponse.objects.filter(question=question).aggregate(
+                total=Sum("decimal_answer")
+            )["total"],
+            Decimal("0.3"),
+        )
+
+
+class TestSingleSave(TypedAnswersTestCase):
+    """Tests for keeping the typed columns up to date when a response is
+    saved on its own.
+    """
+
+    def test_edit(self):
+        form_response = baker.make(
+            fc_models.FormResponse, question=self.choices_q, answer="['a']"
+        )
+        form_response.answer = "['b', 'c']"
+        form_response.save()
+        self.assertEqual(
+            list(form_response.choices.values_list("choice", flat=True)),
+            ["b", "c"],
+        )
+
+        form_response = baker.make(
+            fc_models.FormResponse, question=self.number_q, answer="3"
+        )
+        self.assertEqual(form_response.number_answer, 3)
+
+
+class TestBackfill(TypedAnswersTestCase):
+    """Tests for the `backfill` function."""
+
+    def setUp(self):
+        baker.make(
+            fc_models.FormResponse,
+            question=self.number_q,
+            answer="7",
+            _quantity=3,
+        )
+        baker.make(
+            fc_models.FormResponse, question=self.choices_q, answer="['c']"
+        )
+        # Clear the columns, as they were before typed answers were stored.
+        fc_models.FormResponse.objects.update(number_answer=None)
+        fc_models.FormResponseChoice.objects.all().delete()
+
+    def test_backfill(self):
+        """Test that the responses are updated in chunks."""
+        chunks = list(typed_answers.backfill(batch_size=3))
+        last_id = fc_models.FormResponse.objects.order_by("id").last().id
+        self.assertEqual([count for count, _ in chunks], [3, 1])
+        self.assertEqual(chunks[-1][1], last_id)
+        self.assertEqual(
+            fc_models.FormResponse.objects.filter(number_answer=7).count(), 3
+        )
+        self.assertEqual(
+            list(
+                fc_models.FormResponseChoice.objects.values_list(
+                    "choice", flat=True
+                )
+            ),
+            ["c"],
+        )
+
+    def test_resume(self):
+        """Test that only the responses after `after_id` are updated."""
+        first_id = fc_models.FormResponse.objects.order_by("id").first().id
+        self.assertEqual(
+            sum(
+                count
+                for count, _ in typed_answers.backfill(
+                    batch_size=10, after_id=first_id
+                )
+            ),
+            3,
+        )
+        self.assertIsNone(
+            fc_models.FormResponse.objects.get(id=first_id).number_answer
+        )
+
+    def test_idempotent(self):
+        """Test that running the backfill twice does not duplicate
+        choices.
+        """
+        list(typed_answers.backfill(batch_size=10))
+        list(typed_answers.backfill(batch_size=10))
+        self.assertEqual(fc_models.FormResponseChoice.objects.count(), 1)
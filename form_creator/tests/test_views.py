@@ -1,12 +1,20 @@
+import gzip
+import io
+import shutil
+import tempfile
 from types import SimpleNamespace
 from django.test import TestCase, Client
 from django.urls import reverse
-from django.http import Http404
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.contrib.messages import get_messages
 from django.contrib.auth import get_user_model
 import mock
 from model_bakery import baker
-from .. import views as fc_views, models as fc_models
+from .. import (
+    views as fc_views,
+    models as fc_models,
+    compression as fc_compression,
+)
 from ..question_form_fields import FieldTypeChoices
 
 User = get_user_model()
@@ -116,6 +124,50 @@ class TestFormListView(TestCase):
         self.assertEqual(result.count(), 1)
         self.assertEqual(result.first(), self.editors_form)
 
+    def test_queries(self):
+        """Test that the number of queries does not depend on the number of
+        forms listed.
+        """
+        client = Client()
+        client.force_login(self.editor)
+        with self.assertNumQueries(5):
+            client.get(reverse("form_creator:form_list"))
+        baker.make(
+            fc_models.Form,
+            editors=[self.editor],
+            status=fc_models.Form.StatusChoices.ACTIVE,
+            _quantity=5,
+        )
+        with self.assertNumQueries(5):
+            response = client.get(reverse("form_creator:form_list"))
+        self.assertContains(response, "Edit Questions", count=6)
+
+    @mock.patch("form_creator.views.get_setting", return_value=2)
+    def test_pages(self, _):
+        """Test that the forms are split into pages linked by tokens."""
+        baker.make(fc_models.Form, owner=self.owner, _quantity=2)
+        client = Client()
+        client.force_login(self.owner)
+        response = client.get(reverse("form_creator:form_list"))
+        page = response.context["page_obj"]
+        self.assertEqual(len(page.object_list), 2)
+        self.assertContains(response, f"?page={page.next_token}")
+
+        response = client.get(
+            reverse("form_creator:form_list"), {"page": page.next_token}
+        )
+        self.assertEqual(len(response.context["object_list"]), 1)
+        self.assertIsNone(response.context["page_obj"].next_token)
+
+    def test_invalid_page(self):
+        """Test that an invalid page token raises a 404."""
+        client = Client()
+        client.force_login(self.owner)
+        response = client.get(
+            reverse("form_creator:form_list"), {"page": "abc"}
+        )
+        self.assertEqual(response.status_code, 404)
+
 
 class TestFormDeleteView(TestCase):
     def setUp(self):
@@ -367,6 +419,27 @@ class TestFormResponseView(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(fc_models.FormResponder.objects.count(), 0)
 
+    def test_post_buffered(self):
+        """Test that a post request stages the submission when submissions
+        are buffered.
+        """
+        data = {
+            f"question_{self.text_q.id}": "text answer",
+            f"question_{self.choice_q.id}": "b",
+        }
+        with self.settings(FORM_CREATOR_BUFFER_SUBMISSIONS=True):
+            response = self.client.post(self.view_url(), data=data)
+            self.assertEqual(response.status_code, 302)
+            self.client.post(self.view_url(), data=data)
+
+        self.assertFalse(fc_models.FormResponder.objects.exists())
+        submission = fc_models.PendingSubmission.objects.get()
+        self.assertEqual(submission.user, self.user)
+        self.assertEqual(
+            submission.answers,
+            {str(self.text_q.id): "text answer", str(self.choice_q.id): "b"},
+        )
+
 
 class TestDownloadQuestions(TestCase):
     """Tests the `download_questions view."""
@@ -404,6 +477,61 @@ class TestDownloadQuestions(TestCase):
         )
         self.assertEqual(response.status_code, 200)
 
+    def test_compression_parameter(self):
+        """Test that a gzip file is downloaded when requested."""
+        response = self.client.get(
+            reverse(
+                "form_creator:download_questions",
+                kwargs={
+                    "pk": self.form.id,
+                    "slug": self.form.slug,
+                },
+            ),
+            {"compression": "gzip"},
+        )
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertEqual(
+            response["Content-Disposition"],
+            "attachment; filename=questions.csv.gz",
+        )
+        content = gzip.decompress(b"".join(response.streaming_content))
+        self.assertIn(self.text_q.question, content.decode("utf-8"))
+
+    def test_accept_encoding(self):
+        """Test that the content is encoded using a method the client
+        accepts.
+        """
+        with mock.patch.object(fc_compression, "zstandard", None):
+            response = self.client.get(
+                reverse(
+                    "form_creator:download_questions",
+                    kwargs={
+                        "pk": self.form.id,
+                        "slug": self.form.slug,
+                    },
+                ),
+                HTTP_ACCEPT_ENCODING="gzip, deflate",
+            )
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        content = gzip.decompress(b"".join(response.streaming_content))
+        self.assertIn(self.text_q.question, content.decode("utf-8"))
+
+    def test_invalid_compression(self):
+        """Test that an unknown compression method is rejected."""
+        response = self.client.get(
+            reverse(
+                "form_creator:download_questions",
+                kwargs={
+                    "pk": self.form.id,
+                    "slug": self.form.slug,
+                },
+            ),
+            {"compression": "rar"},
+        )
+        self.assertEqual(response.status_code, 400)
+
 
 class TestDownloadResponses(TestCase):
     """Tests the `download_responses view."""
@@ -440,3 +568,320 @@ class TestDownloadResponses(TestCase):
             )
         )
         self.assertEqual(response.status_code, 200)
+
+    def test_streams_responses(self):
+        """Test that the responses are streamed as a CSV attachment."""
+        form_response = baker.make(
+            fc_models.FormResponse,
+            form_responder__form=self.form,
+            question=self.text_q,
+            answer="streamed answer",
+        )
+        response = self.client.get(
+            reverse(
+                "form_creator:download_responses",
+                kwargs={
+                    "pk": self.form.id,
+                    "slug": self.form.slug,
+                },
+            )
+        )
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content).decode("utf-8")
+        self.assertIn(form_response.answer, content)
+        self.assertIn(form_response.form_responder.user.username, content)
+
+    def test_documents(self):
+        """Test that answers stored as documents are streamed."""
+        baker.make(
+            fc_models.FormResponder,
+            form=self.form,
+            answers={str(self.text_q.id): "document answer"},
+        )
+        response = self.client.get(
+            reverse(
+                "form_creator:download_responses",
+                kwargs={
+                    "pk": self.form.id,
+                    "slug": self.form.slug,
+                },
+            ),
+            {"after_id": 0},
+        )
+        content = b"".join(response.streaming_content).decode("utf-8")
+        self.assertIn("document answer", content)
+        self.assertIn("X-Export-Cursor-Dt", response)
+
+    def test_documents_incremental(self):
+        """Test that answers stored as documents have a cursor of their own,
+        so that they are only exported once, and that the cursors never
+        move back.
+        """
+        form_responder = baker.make(
+            fc_models.FormResponder,
+            form=self.form,
+            answers={str(self.text_q.id): "document answer"},
+        )
+        url = reverse(
+            "form_creator:download_responses",
+            kwargs={"pk": self.form.id, "slug": self.form.slug},
+        )
+        response = self.client.get(url, {"after_id": 5})
+        self.assertIn(
+            "document answer",
+            b"".join(response.streaming_content).decode("utf-8"),
+        )
+        self.assertEqual(response["X-Export-Cursor-Id"], "5")
+        self.assertEqual(
+            response["X-Export-Cursor-Document-Id"], str(form_responder.id)
+        )
+
+        response = self.client.get(
+            url,
+            {
+                "after_id": response["X-Export-Cursor-Id"],
+                "after_document_id": response["X-Export-Cursor-Document-Id"],
+            },
+        )
+        self.assertNotIn(
+            "document answer",
+            b"".join(response.streaming_content).decode("utf-8"),
+        )
+        self.assertEqual(response["X-Export-Cursor-Id"], "5")
+        self.assertEqual(
+            response["X-Export-Cursor-Document-Id"], str(form_responder.id)
+        )
+
+    def test_wide_layout(self):
+        """Test that the wide layout has a column per question."""
+        baker.make(
+            fc_models.FormResponse,
+            form_responder__form=self.form,
+            question=self.text_q,
+            answer="wide answer",
+        )
+        response = self.client.get(
+            reverse(
+                "form_creator:download_responses",
+                kwargs={
+                    "pk": self.form.id,
+                    "slug": self.form.slug,
+                },
+            ),
+            {"layout": "wide"},
+        )
+        content = b"".join(response.streaming_content).decode("utf-8")
+        header, row = content.splitlines()
+        self.assertIn(self.choice_q.question, header)
+        self.assertIn("wide answer", row)
+
+    def test_invalid_layout(self):
+        """Test that an unknown layout is rejected."""
+        response = self.client.get(
+            reverse(
+                "form_creator:download_responses",
+                kwargs={
+                    "pk": self.form.id,
+                    "slug": self.form.slug,
+                },
+            ),
+            {"layout": "sideways"},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_incremental(self):
+        """Test that only newer responses are exported and the cursor is
+        returned in the headers.
+        """
+        old, new = baker.make(
+            fc_models.FormResponse,
+            form_responder__form=self.form,
+            question=self.text_q,
+            _quantity=2,
+        )
+        response = self.client.get(
+            reverse(
+                "form_creator:download_responses",
+                kwargs={
+                    "pk": self.form.id,
+                    "slug": self.form.slug,
+                },
+            ),
+            {"after_id": old.id},
+        )
+        content = b"".join(response.streaming_content).decode("utf-8")
+        self.assertEqual(len(content.splitlines()), 2)
+        self.assertEqual(response["X-Export-Cursor-Id"], str(new.id))
+        self.assertEqual(
+            response["X-Export-Cursor-Dt"],
+            new.form_responder.created_dt.isoformat(),
+        )
+
+    def test_not_incremental_has_no_cursor(self):
+        """Test that a full export does not return a cursor."""
+        response = self.client.get(
+            reverse(
+                "form_creator:download_responses",
+                kwargs={
+                    "pk": self.form.id,
+                    "slug": self.form.slug,
+                },
+            )
+        )
+        self.assertFalse(response.has_header("X-Export-Cursor-Id"))
+
+    def test_narrowed(self):
+        """Test that the export can be narrowed to some questions and
+        columns.
+        """
+        for question in (self.text_q, self.choice_q):
+            baker.make(
+                fc_models.FormResponse,
+                form_responder__form=self.form,
+                question=question,
+                answer=question.question,
+            )
+        response = self.client.get(
+            reverse(
+                "form_creator:download_responses",
+                kwargs={
+                    "pk": self.form.id,
+                    "slug": self.form.slug,
+                },
+            ),
+            {"questions": self.choice_q.id, "columns": ["answer"]},
+        )
+        content = b"".join(response.streaming_content).decode("utf-8")
+        self.assertEqual(
+            content.splitlines(), ["Answer", self.choice_q.question]
+        )
+
+    def test_invalid_date_window(self):
+        """Test that a start after the end is rejected."""
+        response = self.client.get(
+            reverse(
+                "form_creator:download_responses",
+                kwargs={
+                    "pk": self.form.id,
+                    "slug": self.form.slug,
+                },
+            ),
+            {"start": "2022-02-01", "end": "2022-01-01"},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_cached(self):
+        """Test that full exports are served from the export cache, and
+        narrowed exports are streamed.
+        """
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        url = reverse(
+            "form_creator:download_responses",
+            kwargs={
+                "pk": self.form.id,
+                "slug": self.form.slug,
+            },
+        )
+        with self.settings(
+            MEDIA_ROOT=media_root, FORM_CREATOR_EXPORT_CACHE=True
+        ):
+            response = self.client.get(url)
+            self.assertNotIsInstance(response, FileResponse)
+            b"".join(response.streaming_content)
+            response.close()
+
+            response = self.client.get(url)
+            self.assertIsInstance(response, FileResponse)
+            response.close()
+
+            response = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+            self.assertEqual(response.status_code, 304)
+
+            response = self.client.get(url, {"columns": ["answer"]})
+            self.assertIsInstance(response, StreamingHttpResponse)
+            self.assertNotIsInstance(response, FileResponse)
+
+
+class TestFormSummary(TestCase):
+    """Tests the `form_summary` view."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = baker.make(User)
+        cls.form = baker.make(fc_models.Form, owner=cls.user)
+        cls.question = baker.make(fc_models.FormQuestion, form=cls.form)
+        baker.make(
+            fc_models.FormResponse,
+            form_responder__form=cls.form,
+            question=cls.question,
+            answer="answer",
+        )
+
+    def url(self) -> str:
+        return reverse(
+            "form_creator:form_summary",
+            kwargs={"pk": self.form.id, "slug": self.form.slug},
+        )
+
+    def test_summary(self):
+        """Test that the summary is returned as JSON."""
+        self.client.force_login(self.user)
+        response = self.client.get(self.url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["questions"][0]["responses"], 1)
+
+    def test_not_editor(self):
+        """Test that only editors can see the summary."""
+        self.client.force_login(baker.make(User))
+        self.assertEqual(self.client.get(self.url()).status_code, 403)
+
+
+class TestExportJobViews(TestCase):
+    """Tests the `export_job_status` and `export_job_download` views."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = baker.make(User)
+        self.client.force_login(self.user)
+        self.job = baker.make(fc_models.ExportJob, requested_by=self.user)
+
+    def test_status(self):
+        """Test that the status of the job is returned."""
+        response = self.client.get(self.job.get_status_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "pending")
+        self.assertIsNone(response.json()["download_url"])
+
+    def test_status_other_user(self):
+        """Test that other users cannot see the job."""
+        self.client.force_login(baker.make(User))
+        response = self.client.get(self.job.get_status_url())
+        self.assertEqual(response.status_code, 403)
+
+    def test_download_not_ready(self):
+        """Test that a 404 is returned while the job is incomplete."""
+        response = self.client.get(self.job.get_download_url())
+        self.assertEqual(response.status_code, 404)
+
+    def test_download(self):
+        """Test that the file is downloaded once the job has completed."""
+        self.job.status = self.job.StatusChoices.COMPLETED
+        self.job.kind = self.job.KindChoices.RESPONSES
+        self.job.file.name = "form_creator/exports/responses.csv"
+        self.job.save()
+
+        with mock.patch.object(
+            fc_models.ExportJob.file.field.storage,
+            "open",
+            return_value=io.BytesIO(b"a,b\r\n"),
+        ):
+            response = self.client.get(self.job.get_download_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response["Content-Disposition"],
+            'attachment; filename="responses.csv"',
+        )
+        self.assertEqual(b"".join(response.streaming_content), b"a,b\r\n")
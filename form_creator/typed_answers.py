@@ -0,0 +1,387 @@
+"""This module contains methods to store answers in typed columns as well as
+text. The answer to a numeric, boolean, date or time question is also stored
+in the matching column of `FormResponse`, and each choice selected for a
+choice question is stored as a `FormResponseChoice`. Sums, averages, date
+filters and choice counts can then be run by the database.
+
+The column is picked from the form field class `field_type_map` gives for
+the question's field type. The text answer is kept as it is.
+"""
+
+import ast
+import datetime
+import decimal
+import typing as _t
+from django import forms
+from django.core.exceptions import ValidationError
+from django.core.validators import DecimalValidator
+from django.db import transaction
+from django.utils.dateparse import parse_date, parse_datetime, parse_time
+from . import models as fc_models
+from .question_form_fields import field_type_map
+
+# The typed column of `FormResponse` used for each form field class. The
+# first class which the question's form field is a subclass of is used.
+TYPED_COLUMNS = (
+    (forms.IntegerField, "number_answer"),
+    (forms.BooleanField, "boolean_answer"),
+    (forms.DateTimeField, "datetime_answer"),
+    (forms.DateField, "date_answer"),
+    (forms.TimeField, "time_answer"),
+)
+
+# The columns which also keep the answers to some questions exactly, as well
+# as their typed column.
+EXACT_COLUMNS = ((forms.DecimalField, "decimal_answer"),)
+
+ANSWER_COLUMNS = tuple(column for _, column in TYPED_COLUMNS + EXACT_COLUMNS)
+
+
+def typed_column(field_type: str) -> _t.Optional[str]:
+    """Get the typed column the answers to a type of question are stored in.
+
+    `DecimalField` and `FloatField` are subclasses of `IntegerField`, so all
+    numbers are stored in `number_answer`. Decimals are also kept exactly in
+    `decimal_answer`.
+
+    :param field_type: The field type of the question.
+    :type field_type: str
+    :return: The name of the column, or None if the answers are only stored
+        as text.
+    :rtype: str or None
+    """
+    field = field_type_map[field_type]
+    for field_class, column in TYPED_COLUMNS:
+        if issubclass(field, field_class):
+            return column
+    return None
+
+
+def has_choices(field_type: str) -> bool:
+    """Check if the answers to a type of question are stored as choices."""
+    return issubclass(field_type_map[field_type], forms.ChoiceField)
+
+
+def _to_number(answer: _t.Any) -> _t.Optional[float]:
+    """Convert an answer to a number."""
+    try:
+        return float(answer)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def _to_decimal(answer: _t.Any) -> _t.Optional[decimal.Decimal]:
+    """Convert an answer to a decimal, if it fits the column exactly."""
+    try:
+        value = decimal.Decimal(str(answer))
+        DecimalValidator(
+            fc_models.DECIMAL_ANSWER_MAX_DIGITS,
+            fc_models.DECIMAL_ANSWER_PLACES,
+        )(value)
+    except (decimal.InvalidOperation, ValidationError):
+        return None
+    return value
+
+
+def _to_boolean(answer: _t.Any) -> _t.Optional[bool]:
+    """Convert an answer to a boolean. Text answers are the `str` of the
+    cleaned value.
+    """
+    if isinstance(answer, bool):
+        return answer
+    return {"True": True, "False": False}.get(answer)
+
+
+def _parser(
+    value_type: type,
+    parse: _t.Callable[[str], _t.Any],
+) -> _t.Callable[[_t.Any], _t.Any]:
+    """Create a function converting an answer to a date, time or datetime."""
+
+    def convert(answer: _t.Any) -> _t.Any:
+        if isinstance(answer, value_type):
+            return answer
+        try:
+            return parse(answer)
+        except (TypeError, ValueError):
+            return None
+
+    return convert
+
+
+_CONVERTERS = {
+    "number_answer": _to_number,
+    "decimal_answer": _to_decimal,
+    "boolean_answer": _to_boolean,
+    "datetime_answer": _parser(datetime.datetime, parse_datetime),
+    "date_answer": _parser(datetime.date, parse_date),
+    "time_answer": _parser(datetime.time, parse_time),
+}
+
+
+def typed_values(field_type: str, answer: _t.Any) -> _t.Dict[str, _t.Any]:
+    """Get the value of each typed column for an answer.
+
+    :param field_type: The field type of the question.
+    :type field_type: str
+    :param answer: The cleaned answer, or the text it was stored as.
+    :type answer: Any
+    :return: The value of every typed column, keyed by column name. All are
+        None except the columns for the field type.
+    :rtype: Dict[str, Any]
+    """
+    values = dict.fromkeys(ANSWER_COLUMNS)
+    if answer in (None, ""):
+        return values
+    columns = [typed_column(field_type)]
+    columns += [
+        column
+        for field_class, column in EXACT_COLUMNS
+        if issubclass(field_type_map[field_type], field_class)
+    ]
+    for column in filter(None, columns):
+        values[column] = _CONVERTERS[column](answer)
+    return values
+
+
+def answer_choices(field_type: str, answer: _t.Any) -> _t.List[str]:
+    """Get the choices selected in an answer.
+
+    The text of a multiple choice answer is the `repr` of the list of
+    choices.
+
+    :param field_type: The field type of the question.
+    :type field_type: str
+    :param answer: The cleaned answer, or the text it was stored as.
+    :type answer: Any
+    :return: The choices selected, if the question is a choice question.
+    :rtype: List[str]
+    """
+    if not has_choices(field_type) or answer in (None, "", []):
+        return []
+    if isinstance(answer, (list, tuple)):
+        return [str(choice) for choice in answer]
+    if issubclass(field_type_map[field_type], forms.MultipleChoiceField):
+        try:
+            choices = ast.literal_eval(answer)
+        except (ValueError, SyntaxError):
+            return [answer]
+        if isinstance(choices, (list, tuple)):
+            return [str(choice) for choice in choices]
+    return [str(answer)]
+
+
+OptionIds = _t.Dict[_t.Tuple[int, str], int]
+
+
+def option_ids(question_ids: _t.Iterable[int]) -> OptionIds:
+    """Get the id of each choice option of the questions.
+
+    :param question_ids: The ids of the questions.
+    :type question_ids: Iterable[int]
+    :return: The id of each option, keyed by question id and choice.
+    :rtype: Dict[Tuple[int, str], int]
+    """
+    return {
+        (question_id, value): id_
+        for id_, question_id, value in (
+            fc_models.FormQuestionChoice.objects.filter(
+                question_id__in=list(question_ids)
+            )
+            .order_by()
+            .values_list("id", "question_id", "value")
+        )
+    }
+
+
+def _response_choice(
+    response_id: int,
+    question_id: int,
+    choice: str,
+    options: OptionIds,
+) -> fc_models.FormResponseChoice:
+    """Build a choice selected in a response, linked to its option."""
+    return fc_models.FormResponseChoice(
+        response_id=response_id,
+        question_id=question_id,
+        choice=choice,
+        option_id=options.get((question_id, choice)),
+    )
+
+
+def to_text(answer: _t.Any) -> _t.Optional[str]:
+    """Convert an answer to the text it is stored as."""
+    return fc_models.FormResponse._meta.get_field("answer").to_python(answer)
+
+
+def build_response(
+    form_responder: fc_models.FormResponder,
+    question_id: int,
+    field_type: str,
+    answer: _t.Any,
+) -> fc_models.FormResponse:
+    """Build an unsaved response with its text and typed columns set.
+
+    :param form_responder: The responder.
+    :type form_responder: FormResponder
+    :param question_id: The id of the question answered.
+    :type question_id: int
+    :param field_type: The field type of the question.
+    :type field_type: str
+    :param answer: The cleaned answer, or the text it was stored as.
+    :type answer: Any
+    :return: The response.
+    :rtype: FormResponse
+    """
+    return fc_models.FormResponse(
+        form_responder=form_responder,
+        question_id=question_id,
+        answer=to_text(answer),
+        **typed_values(field_type, answer),
+    )
+
+
+def create_responses(
+    form_responses: _t.List[fc_models.FormResponse],
+    field_types: _t.Dict[int, str],
+    options: _t.Optional[OptionIds] = None,
+) -> _t.List[fc_models.FormResponse]:
+    """Insert responses built by `build_response`, followed by the choices
+    selected in them. Each takes a single statement.
+
+    :param form_responses: The unsaved responses.
+    :type form_responses: List[FormResponse]
+    :param field_types: The field type of each question, keyed by id.
+    :type field_types: Dict[int, str]
+    :param options: The ids of the choice options, as returned by
+        `option_ids`. Looked up if not given.
+    :type options: Dict[Tuple[int, str], int]
+    :return: The saved responses.
+    :rtype: List[FormResponse]
+    """
+    form_responses = fc_models.FormResponse.objects.bulk_create(form_responses)
+    choices = [
+        (form_response, choice)
+        for form_response in form_responses
+        for choice in answer_choices(
+            field_types[form_response.question_id], form_response.answer
+        )
+    ]
+    if not choices:
+        return form_responses
+
+    if form_responses[0].pk is None:
+        # The database cannot return the ids of the inserted rows.
+        ids = {
+            (form_responder_id, question_id): id_
+            for id_, form_responder_id, question_id in (
+                fc_models.FormResponse.objects.filter(
+                    form_responder_id__in={
+                        r.form_responder_id for r in form_responses
+                    }
+                ).values_list("id", "form_responder_id", "question_id")
+            )
+        }
+        for form_response in form_responses:
+            form_response.pk = ids[
+                (form_response.form_responder_id, form_response.question_id)
+            ]
+
+    if options is None:
+        options = option_ids({r.question_id for r, _ in choices})
+    fc_models.FormResponseChoice.objects.bulk_create(
+        _response_choice(
+            form_response.pk, form_response.question_id, choice, options
+        )
+        for form_response, choice in choices
+    )
+    return form_responses
+
+
+def sync_response(form_response: fc_models.FormResponse) -> None:
+    """Set the typed columns of a response from its text answer."""
+    for column, value in typed_values(
+        form_response.question.field_type, form_response.answer
+    ).items():
+        setattr(form_response, column, value)
+
+
+def sync_choices(
+    form_response: fc_models.FormResponse,
+    created: bool = False,
+) -> None:
+    """Replace the stored choices of a saved response with those in its text
+    answer. A response which was just created has none to replace.
+    """
+    if not created:
+        form_response.choices.all().delete()
+    choices = answer_choices(
+        form_response.question.field_type, form_response.answer
+    )
+    if not choices:
+        return
+    options = option_ids([form_response.question_id])
+    fc_models.FormResponseChoice.objects.bulk_create(
+        _response_choice(
+            form_response.id, form_response.question_id, choice, options
+        )
+        for choice in choices
+    )
+
+
+def backfill(
+    batch_size: int,
+    form_ids: _t.Optional[_t.Iterable[int]] = None,
+    after_id: int = 0,
+) -> _t.Iterator[_t.Tuple[int, int]]:
+    """Set the typed columns and choices of existing responses, a chunk at a
+    time. Responses are read in primary key order, so the backfill can be
+    resumed after the last id it reported.
+
+    :param batch_size: The number of responses updated per chunk.
+    :type batch_size: int
+    :param form_ids: Only update the responses to these forms.
+    :type form_ids: Iterable[int]
+    :param after_id: Only update the responses after this id.
+    :type after_id: int
+    :return: Yields the number of responses and the last id of each chunk.
+    :rtype: Iterator[Tuple[int, int]]
+    """
+    form_responses = fc_models.FormResponse.objects.select_related(
+        "question"
+    ).order_by("id")
+    if form_ids:
+        form_responses = form_responses.filter(
+            form_responder__form_id__in=form_ids
+        )
+
+    while True:
+        chunk = list(form_responses.filter(id__gt=after_id)[:batch_size])
+        if not chunk:
+            return
+
+        for form_response in chunk:
+            sync_response(form_response)
+        options = option_ids({r.question_id for r in chunk})
+        with transaction.atomic():
+            fc_models.FormResponse.objects.bulk_update(chunk, ANSWER_COLUMNS)
+            fc_models.FormResponseChoice.objects.filter(
+                response_id__in=[r.id for r in chunk]
+            ).delete()
+            fc_models.FormResponseChoice.objects.bulk_create(
+                _response_choice(
+                    form_response.id,
+                    form_response.question_id,
+                    choice,
+                    options,
+                )
+                for form_response in chunk
+                for choice in answer_choices(
+                    form_response.question.field_type, form_response.answer
+                )
+            )
+
+        after_id = chunk[-1].id
+        yield len(chunk), after_id
+        if len(chunk) < batch_size:
+            return
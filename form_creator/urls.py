@@ -36,9 +36,24 @@ urlpatterns = [
         views.download_responses,
         name="download_responses",
     ),
+    path(
+        "forms/<int:pk>-<slug:slug>/summary/",
+        views.form_summary,
+        name="form_summary",
+    ),
     path(
         "forms/<int:pk>-<slug:slug>/questions/edit/",
         views.FormQuestionsEditView.as_view(),
         name="form_questions_edit",
     ),
+    path(
+        "exports/<int:pk>/",
+        views.export_job_status,
+        name="export_job_status",
+    ),
+    path(
+        "exports/<int:pk>/download/",
+        views.export_job_download,
+        name="export_job_download",
+    ),
 ]
@@ -1,19 +1,36 @@
 import re
+import typing as _t
 from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib import messages
-from django.http import HttpRequest, HttpResponse
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.urls import reverse_lazy
 from django.forms import modelformset_factory
 from django.views import View
-from django.core.exceptions import PermissionDenied
-from django.db.models import QuerySet
+from django.core.exceptions import BadRequest, PermissionDenied
+from django.db.models import Prefetch, QuerySet, prefetch_related_objects
 from django.utils.decorators import method_decorator
 from django.views.generic.list import ListView
 from django.views.generic.detail import DetailView
 from django.views.generic.edit import CreateView, UpdateView, DeleteView
 from django.contrib.auth.decorators import login_required
-from . import models as fc_models, forms as fc_forms, exporters as fc_exporters
-from .decorators import with_form, redirect_if_form_completed
+from . import (
+    models as fc_models,
+    forms as fc_forms,
+    exporters as fc_exporters,
+    export_cache as fc_export_cache,
+    ingestion as fc_ingestion,
+    pagination as fc_pagination,
+    summary as fc_summary,
+)
+from .conf import get_setting
+from .decorators import get_form, with_form, redirect_if_form_completed
 
 
 class FormBaseView(View):
@@ -30,11 +47,15 @@ class FormBaseView(View):
         return kwargs
 
 
+# The primary key and slug of the form in the path of the request.
+_FORM_PATH = re.compile("/forms/(\\d{1,})-(.*?)/")
+
+
 class FormSingleItemMixin:
     def get_object(self, *args, **kwargs):
-        pattern = re.compile("/forms/(\\d{1,})-(.*?)/")
-        pk, slug = pattern.search(self.request.path).groups()
-        return get_object_or_404(self.model, pk=pk, slug=slug)
+        """Get the form from the path, fetching it once per request."""
+        pk, slug = _FORM_PATH.search(self.request.path).groups()
+        return get_form(self.request, pk, slug)
 
     def get_context_data(self, **kwargs):
         """Adds permissions to the context."""
@@ -56,16 +77,33 @@ class FormListView(FormBaseView, ListView):
         """If the user is a staff member, return all forms. Otherwise, return
         only live forms and those which the user can edit/owns.
         """
-        if self.request.user.is_staff:
-            return self.model.objects.all()
+        user = self.request.user
+        # The template checks the user's permissions for each form, and does
+        # not show the description.
+        return (
+            self.model.objects.visible_to(user)
+            .with_permissions_for(user)
+            .defer("description")
+        )
 
-        # Forms that are editable by the user
-        qs = self.model.get_editable_forms(self.request.user)
+    def get_paginate_by(self, queryset) -> int:
+        """Get the number of forms on each page."""
+        return get_setting("FORM_LIST_PAGE_SIZE")
 
-        # Forms that are live
-        qs |= self.model.objects.live()
+    def get_cursor(self) -> _t.Optional[fc_pagination.Cursor]:
+        """Get the position to page from given in the request."""
+        token = self.request.GET.get("page")
+        if not token:
+            return None
+        try:
+            return fc_pagination.decode_token(token)
+        except ValueError:
+            raise Http404("Invalid page.")
 
-        return qs
+    def paginate_queryset(self, queryset, page_size):
+        """Get the page of forms from the position given in the request."""
+        page = fc_pagination.paginate(queryset, page_size, self.get_cursor())
+        return None, page, page.object_list, page.has_other_pages
 
 
 class FormCreateView(FormBaseView, CreateView):
@@ -79,6 +117,25 @@ class FormDetailView(FormBaseView, FormSingleItemMixin, DetailView):
 
     template_name = "form_creator/form_detail.html"
 
+    def get_context_data(self, **kwargs):
+        """Load the questions listed for editors along with their choices."""
+        context = super().get_context_data(**kwargs)
+        if context["can_edit"]:
+            prefetch_related_objects(
+                [self.object],
+                Prefetch("questions", queryset=_listed_questions()),
+            )
+        return context
+
+
+def _listed_questions() -> QuerySet[fc_models.FormQuestion]:
+    """Get the questions with what is shown of them in the questions
+    table.
+    """
+    return fc_models.FormQuestion.objects.select_related(
+        "related_question__form"
+    ).prefetch_related("choice_options")
+
 
 class FormUpdateView(FormBaseView, FormSingleItemMixin, UpdateView):
     """View to edit a form."""
@@ -192,8 +249,15 @@ class FormResponseView(View):
     def post(self, request: HttpRequest, form: fc_models.Form) -> HttpResponse:
         response_form = fc_forms.CaptureResponseForm(form, request.POST)
         if response_form.is_valid():
-            response_form.save(request.user)
-            messages.success(request, "Response saved.")
+            if not get_setting("BUFFER_SUBMISSIONS"):
+                response_form.save(request.user)
+                messages.success(request, "Response saved.")
+            elif fc_ingestion.enqueue(
+                form, request.user, response_form.get_answers()
+            ):
+                messages.success(request, "Response received.")
+            else:
+                messages.error(request, "You have already responded.")
             return redirect(self.success_url or form.get_absolute_url())
         else:
             messages.error(request, "Please correct the errors below.")
@@ -207,26 +271,184 @@ class FormResponseView(View):
 @with_form(can_edit=True)
 def download_questions(
     request: HttpRequest, form: fc_models.Form
-) -> HttpResponse:
-    """View to download a form's questions as a CSV file."""
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = "attachment; filename=questions.csv"
-    fc_exporters.export_questions(
-        fc_models.FormQuestion.objects.filter(form=form),
-        response,
+) -> StreamingHttpResponse:
+    """View to download a form's questions as a CSV file.
+
+    Passing `compression=gzip` (or `zstd` where available) in the query
+    string will download a compressed file.
+
+    When `FORM_CREATOR_EXPORT_CACHE` is enabled, the file is served from the
+    export cache.
+    """
+    options = fc_forms.DownloadOptionsForm(request.GET)
+    if not options.is_valid():
+        raise BadRequest(options.errors.as_text())
+
+    def render():
+        return fc_exporters.stream_questions(
+            fc_models.FormQuestion.objects.filter(form=form)
+        )
+
+    compression, content_encoding = options.get_compression(request)
+    if get_setting("EXPORT_CACHE"):
+        return fc_export_cache.cached_csv_response(
+            request,
+            form,
+            fc_export_cache.QUESTIONS,
+            render,
+            "questions.csv",
+            compression=compression,
+            content_encoding=content_encoding,
+        )
+    return fc_exporters.streaming_csv_response(
+        render(),
+        "questions.csv",
+        compression=compression,
+        content_encoding=content_encoding,
     )
-    return response
 
 
 @with_form(can_edit=True)
 def download_responses(
     request: HttpRequest, form: fc_models.Form
-) -> HttpResponse:
-    """View to download a form's responses as a CSV file."""
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = "attachment; filename=responses.csv"
-    fc_exporters.export_responses(
-        fc_models.FormResponse.objects.filter(form_responder__form=form),
-        response,
+) -> StreamingHttpResponse:
+    """View to download a form's responses as a CSV file. The file is
+    streamed so that memory use stays flat regardless of the number of
+    responses.
+
+    Passing `layout=wide` in the query string will export one row per
+    responder with a column per question instead of one row per answer.
+
+    Passing `after_id`, `after_document_id` and/or `after` will export only
+    the responses newer than those ids or submission time. The values to
+    pass in the next export are returned in the `X-Export-Cursor-Id`,
+    `X-Export-Cursor-Document-Id` and `X-Export-Cursor-Dt` headers.
+
+    The export can be narrowed with `start` and `end` submission times,
+    `questions` and `responders` ids and the `columns` to include. These are
+    applied in the query, so narrow exports only read what they return.
+
+    Passing `compression=gzip` (or `zstd` where available) will download a
+    compressed file.
+
+    When `FORM_CREATOR_EXPORT_CACHE` is enabled, full exports are served
+    from the export cache.
+    """
+    options = fc_forms.ExportOptionsForm(request.GET)
+    if not options.is_valid():
+        raise BadRequest(options.errors.as_text())
+
+    form_responses = options.filter_responses(
+        fc_models.FormResponse.objects.filter(form_responder__form=form)
+    )
+    documents = options.filter_documents(
+        fc_exporters.form_documents([form.id])
     )
+    wide = options.cleaned_data["layout"] == options.LAYOUT_WIDE
+    cacheable = not (options.is_narrowed or options.is_incremental)
+    cursor = None
+    if options.is_incremental:
+        form_responses, cursor = fc_exporters.apply_cursor(
+            form_responses,
+            after_id=options.cleaned_data["after_id"],
+            after_dt=options.cleaned_data["after"],
+        )
+        documents, cursor = fc_exporters.apply_document_cursor(
+            documents,
+            cursor,
+            after_dt=options.cleaned_data["after"],
+            after_document_id=options.cleaned_data["after_document_id"],
+        )
+
+    def render():
+        columns = options.cleaned_data["columns"]
+        if wide:
+            return fc_exporters.stream_wide_responses(
+                form,
+                form_responses,
+                question_ids=options.cleaned_data["questions"],
+                columns=columns,
+                documents=documents,
+            )
+        return fc_exporters.stream_responses(
+            form_responses, columns, documents=documents
+        )
+
+    compression, content_encoding = options.get_compression(request)
+    if get_setting("EXPORT_CACHE") and cacheable:
+        return fc_export_cache.cached_csv_response(
+            request,
+            form,
+            (
+                fc_export_cache.WIDE_RESPONSES
+                if wide
+                else fc_export_cache.RESPONSES
+            ),
+            render,
+            "responses.csv",
+            compression=compression,
+            content_encoding=content_encoding,
+        )
+
+    response = fc_exporters.streaming_csv_response(
+        render(),
+        "responses.csv",
+        compression=compression,
+        content_encoding=content_encoding,
+    )
+    if cursor is not None:
+        options.set_cursor_headers(response, cursor)
     return response
+
+
+@with_form(can_edit=True)
+def form_summary(request: HttpRequest, form: fc_models.Form) -> JsonResponse:
+    """View to get a summary of the answers to each question in a form as
+    JSON: the number of responses and answers, the number of times each
+    choice was selected and the mean and percentiles of numeric answers.
+    """
+    return JsonResponse(fc_summary.get_summary(form))
+
+
+def _get_export_job(request: HttpRequest, pk: int) -> fc_models.ExportJob:
+    """Get the export job, ensuring the user is allowed to see it."""
+    job = get_object_or_404(fc_models.ExportJob, pk=pk)
+    if not job.can_view(request.user):
+        raise PermissionDenied
+    return job
+
+
+@login_required
+def export_job_status(request: HttpRequest, pk: int) -> JsonResponse:
+    """View to poll the status of an export job."""
+    job = _get_export_job(request, pk)
+    return JsonResponse(
+        {
+            "id": job.id,
+            "kind": job.kind,
+            "status": job.status,
+            "rows_total": job.rows_total,
+            "rows_written": job.rows_written,
+            "progress": job.progress,
+            "error": job.error,
+            "download_url": (
+                job.get_download_url()
+                if job.status == job.StatusChoices.COMPLETED
+                else None
+            ),
+        }
+    )
+
+
+@login_required
+def export_job_download(request: HttpRequest, pk: int) -> FileResponse:
+    """View to download the result of a completed export job."""
+    job = _get_export_job(request, pk)
+    if job.status != job.StatusChoices.COMPLETED or not job.file:
+        raise Http404("The export has not completed.")
+    return FileResponse(
+        job.file.open("rb"),
+        as_attachment=True,
+        filename=job.filename,
+        content_type="text/csv",
+    )